@@ -0,0 +1,236 @@
+import numpy as np
+from .engine import (
+    HIT_SLOT,
+    CRIT_SLOT,
+    HITS_SLOT,
+    FACTOR_SLOT,
+    STATUS_SLOT,
+    FIRST_HIT_SLOT,
+    SLOTS_PER_HIT,
+    CRIT_CHANCE,
+    DETAIL_FULL,
+    apply_detail_level,
+    roll_width,
+)
+from .moves import resolve_move
+from .utils import (
+    get_type_effectiveness,
+    type_id,
+    defender_type_ids,
+    type_effectiveness_ids,
+)
+
+# Vectorized damage resolution for /calculate_damage/batch.
+# The arithmetic runs on NumPy arrays across the whole batch; results are then
+# assembled into the exact response bodies engine.calculate_damage produces for
+# the same roll vectors.
+
+
+def _hit_range(move):
+    if move.effect_type == "multi_hit" and move.hit_range and len(move.hit_range) == 2:
+        return move.hit_range
+    return None
+
+
+def batch_roll_width(moves) -> int:
+    """Roll vector width needed to resolve every (resolved) move in the batch."""
+    max_hits = 1
+    for move in moves:
+        hit_range = _hit_range(move)
+        if hit_range:
+            max_hits = max(max_hits, hit_range[1])
+    return roll_width(max_hits)
+
+
+def resolve_moves(attacks):
+    return [resolve_move(battle.move) for battle in attacks]
+
+
+def calculate_damage_batch(attacks, moves, rolls, detail=DETAIL_FULL) -> list:
+    """
+    Resolve a list of BattleRequest objects at once.
+
+    moves: ResolvedMove per attack (see resolve_moves).
+    rolls: float array of shape (len(attacks), width) with width >= batch_roll_width.
+    detail: "full", "summary" or "none", as for engine.calculate_damage.
+    """
+    n = len(attacks)
+    if n == 0:
+        return []
+
+    # --- Gather inputs into column arrays ---
+    categories = [move.category for move in moves]
+    special = np.array([c == "special" for c in categories])
+    level = np.array([battle.attacker.level for battle in attacks], dtype=np.float64)
+    attack = np.array([battle.attacker.attack for battle in attacks], dtype=np.float64)
+    special_atk = np.array([battle.attacker.special_atk for battle in attacks], dtype=np.float64)
+    defense = np.array([battle.defender.defense for battle in attacks], dtype=np.float64)
+    special_def = np.array([battle.defender.special_def for battle in attacks], dtype=np.float64)
+    power = np.array([m.power or 0.0 for m in moves], dtype=np.float64)
+    accuracy = np.array([m.accuracy for m in moves], dtype=np.float64)
+
+    attack_type = np.array([type_id(m.move_type) for m in moves])
+    defender_ids = np.array([defender_type_ids(battle.defender.types or ["normal"]) for battle in attacks])
+    type_multiplier = type_effectiveness_ids(attack_type, defender_ids[:, 0], defender_ids[:, 1])
+    for i, battle in enumerate(attacks):
+        # The dual-type table covers up to two defender types.
+        if battle.defender.types and len(battle.defender.types) > 2:
+            type_multiplier[i] = get_type_effectiveness(moves[i].move_type, battle.defender.types)
+
+    # --- Shared stat and level terms ---
+    stat = np.where(special, special_atk, attack)
+    raw_defense = np.where(special, special_def, defense)
+    has_defense = raw_defense != 0
+    safe_defense = np.where(has_defense, raw_defense, 1.0)
+    stat_ratio_multi = stat / safe_defense
+    stat_ratio = np.where(has_defense, stat_ratio_multi, 1.0)
+    level_factor = (2 * level / 5) + 2
+
+    hit = rolls[:, HIT_SLOT] <= accuracy
+
+    # --- Standard damage ---
+    base_damage = ((level_factor * power * stat_ratio) / 50) + 2
+    typed_damage = base_damage * type_multiplier
+    crit = rolls[:, CRIT_SLOT] < CRIT_CHANCE
+    crit_multiplier = np.where(crit, 1.5, 1.0)
+    random_factor = 0.85 + (1.0 - 0.85) * rolls[:, FACTOR_SLOT]
+    raw_damage = typed_damage * crit_multiplier * random_factor
+
+    # --- Multi-hit ---
+    hit_slots = (rolls.shape[1] - FIRST_HIT_SLOT) // SLOTS_PER_HIT
+    per_hit = rolls[:, FIRST_HIT_SLOT:FIRST_HIT_SLOT + SLOTS_PER_HIT * hit_slots].reshape(n, hit_slots, SLOTS_PER_HIT)
+    multi_hit_lands = per_hit[:, :, 0] <= accuracy[:, None]
+    multi_crit = per_hit[:, :, 1] < CRIT_CHANCE
+    multi_crit_multiplier = np.where(multi_crit, 1.5, 1.0)
+    multi_random_factor = 0.85 + (1.0 - 0.85) * per_hit[:, :, 2]
+    multi_base_damage = ((level_factor * power * stat_ratio_multi) / 50) + 2
+    multi_raw_damage = (multi_base_damage * type_multiplier)[:, None] * multi_crit_multiplier * multi_random_factor
+
+    ranges = [_hit_range(m) or (1, 1) for m in moves]
+    low = np.array([r[0] for r in ranges])
+    high = np.array([r[1] for r in ranges])
+    num_hits = low + (rolls[:, HITS_SLOT] * (high - low + 1)).astype(np.int64)
+
+    # --- Heal ---
+    heal_factor = 0.9 + (1.0 - 0.9) * rolls[:, FACTOR_SLOT]
+    raw_heal = power * heal_factor
+
+    # --- Assemble responses (Python floats, same keys as the scalar path) ---
+    full = detail == DETAIL_FULL
+    hit_roll_l = rolls[:, HIT_SLOT].tolist()
+    status_roll_l = rolls[:, STATUS_SLOT].tolist()
+    results = []
+    for i, move in enumerate(moves):
+        details = {"hit_roll": hit_roll_l[i], "accuracy": move.accuracy}
+        if not hit[i]:
+            details["hit"] = False
+            results.append({"result": "miss", "damage": 0, "details": details})
+            continue
+        details["hit"] = True
+        effect_type = move.effect_type
+
+        if effect_type == "multi_hit":
+            hits = int(num_hits[i]) if _hit_range(move) else 1
+            if _hit_range(move):
+                details["hit_range"] = move.hit_range
+            details["num_hits"] = hits
+            total_damage = 0
+            hit_details = []
+            if full:
+                details["individual_hits"] = []
+            for j in range(hits):
+                if multi_hit_lands[i, j]:
+                    hit_damage = round(float(multi_raw_damage[i, j]), 2)
+                    total_damage += hit_damage
+                    hit_details.append(hit_damage)
+                    if full:
+                        details["individual_hits"].append({
+                            "hit_roll": float(per_hit[i, j, 0]),
+                            "stat_ratio": float(stat_ratio_multi[i]),
+                            "level_factor": float(level_factor[i]),
+                            "base_damage": float(multi_base_damage[i]),
+                            "type_multiplier": type_multiplier[i].item(),
+                            "critical_hit": bool(multi_crit[i, j]),
+                            "crit_multiplier": float(multi_crit_multiplier[i, j]),
+                            "random_factor": float(multi_random_factor[i, j]),
+                            "hit_damage": hit_damage,
+                        })
+                else:
+                    hit_details.append(0)
+                    if full:
+                        details["individual_hits"].append({"hit_roll": float(per_hit[i, j, 0]), "hit_damage": 0})
+            details["total_damage"] = total_damage
+            results.append({
+                "result": "hit",
+                "damage": total_damage,
+                "hits": hits,
+                "hit_details": hit_details,
+                "details": details
+            })
+
+        elif effect_type == "heal":
+            heal_amount = round(float(raw_heal[i]), 2)
+            details["heal_amount"] = heal_amount
+            details["random_factor"] = float(heal_factor[i])
+            results.append({
+                "result": "heal",
+                "heal_amount": heal_amount,
+                "target": "self",
+                "details": details
+            })
+
+        elif effect_type == "status":
+            status_applied = None
+            details["status_roll"] = status_roll_l[i]
+            details["effect_chance"] = move.effect_chance
+            if move.status_effect and move.effect_chance:
+                if status_roll_l[i] < move.effect_chance:
+                    status_applied = move.status_effect
+            details["status_effect_applied"] = status_applied
+            results.append({
+                "result": "status",
+                "status_effect_applied": status_applied,
+                "details": details
+            })
+
+        else:
+            if not move.power:
+                results.append({
+                    "result": "hit",
+                    "damage": 0,
+                    "category": categories[i],
+                    "critical_hit": False,
+                    "type_multiplier": 1.0,
+                    "status_effect_applied": None,
+                    "details": {"reason": "Move has no power"}
+                })
+                continue
+            details["stat_ratio"] = float(stat_ratio[i])
+            details["level_factor"] = float(level_factor[i])
+            details["base_damage_pre_type"] = float(base_damage[i])
+            details["type_multiplier"] = type_multiplier[i].item()
+            details["critical_hit"] = bool(crit[i])
+            details["crit_multiplier"] = float(crit_multiplier[i])
+            details["random_factor"] = float(random_factor[i])
+            damage = round(float(raw_damage[i]), 2)
+            details["final_damage"] = damage
+            status_applied = None
+            if move.status_effect and move.effect_chance:
+                details["status_roll"] = status_roll_l[i]
+                if status_roll_l[i] < move.effect_chance:
+                    status_applied = move.status_effect
+                details["status_effect_applied"] = status_applied
+            results.append({
+                "result": "hit",
+                "damage": damage,
+                "category": categories[i],
+                "critical_hit": bool(crit[i]),
+                "type_multiplier": type_multiplier[i].item(),
+                "status_effect_applied": status_applied,
+                "details": details
+            })
+
+    if not full:
+        for result in results:
+            apply_detail_level(result, detail)
+    return results
@@ -0,0 +1,290 @@
+import atexit
+import glob
+import gzip
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+import zlib
+
+from . import metrics
+from .log import get_logger
+from .moves import MOVE_FIELDS
+
+# Event-sourced battle history.
+#
+# Battles are recorded as compact typed events, not as their text logs: a
+# battle_started event holds the seed, policies and both Pokémon's stat
+# blocks, and the recorded move indices (actions) are enough for
+# engine.replay_battle to rebuild every turn and log line. Each event is a
+# positional JSON array [type, *fields] with the fields in EVENT_FIELDS order.
+#
+# The request path only puts a tuple on a bounded queue. A background thread
+# drains it in batches; each batch is gzip-compressed into one member and
+# appended to the current segment file, and segments rotate once they pass
+# segment_bytes. Each process writes its own segments (the pid is in the
+# file name), so uvicorn workers sharing BATTLE_LOG_DIR never interleave
+# members in one file. When the queue is full, new events are dropped and counted
+# (battle_log_dropped_events_total): record() runs on the event loop, so it
+# must never wait for the writer.
+#
+#   BATTLE_LOG_DIR            segment directory; battle logging is off when unset
+#   BATTLE_LOG_QUEUE          queued events before backpressure (default 10000)
+#   BATTLE_LOG_SEGMENT_BYTES  compressed bytes per segment (default 64 MiB)
+
+EVENT_FIELDS = {
+    "battle_started": ("battle_id", "ts", "source", "seed", "user", "trainer", "user_policy", "trainer_policy"),
+    "turn": ("battle_id", "ts", "turn", "actions", "user_hp", "trainer_hp"),
+    "battle_finished": ("battle_id", "ts", "winner", "actions"),
+}
+POKEMON_FIELDS = ("pokemon_id", "nickname", "level", "max_hp", "current_hp", "attack", "defense", "speed",
+                  "special_atk", "special_def", "status", "types")
+
+DEFAULT_QUEUE_SIZE = 10_000
+DEFAULT_BATCH_SIZE = 1024
+DEFAULT_FLUSH_INTERVAL = 0.5
+DEFAULT_SEGMENT_BYTES = 64 * 1024 * 1024
+SEGMENT_PATTERN = "battles-{:08d}-{}.jsonl.gz"  # index, writer id
+_SEGMENT_RE = re.compile(r"battles-(\d{8})(?:-(\d+))?\.jsonl\.gz$")
+
+log = get_logger("battlelog")
+
+EVENTS = metrics.registry.counter(
+    "battle_log_events_total", "Battle log events written to storage by type.", labelnames=("type",))
+DROPPED = metrics.registry.counter(
+    "battle_log_dropped_events_total", "Battle log events dropped because the queue was full.", labelnames=("type",))
+WRITE_ERRORS = metrics.registry.counter(
+    "battle_log_write_errors_total", "Batches of battle log events the sink failed to store.")
+BYTES = metrics.registry.counter(
+    "battle_log_written_bytes_total", "Compressed battle log bytes appended to storage.")
+
+
+def pokemon_record(pokemon) -> list:
+    """Positional snapshot of a Pokemon model (POKEMON_FIELDS, then its moves as MOVE_FIELDS rows)."""
+    return [getattr(pokemon, f) for f in POKEMON_FIELDS] + [
+        [[getattr(m, f) for f in MOVE_FIELDS] for m in pokemon.moves]
+    ]
+
+
+def expand_pokemon(record: list) -> dict:
+    """pokemon_record back to a Pokemon-shaped dict (accepted by /replay)."""
+    pokemon = dict(zip(POKEMON_FIELDS, record))
+    pokemon["moves"] = [dict(zip(MOVE_FIELDS, move)) for move in record[len(POKEMON_FIELDS)]]
+    return pokemon
+
+
+def expand_event(record: list) -> dict:
+    event_type, values = record[0], record[1:]
+    event = {"type": event_type, **dict(zip(EVENT_FIELDS[event_type], values))}
+    if event_type == "battle_started":
+        event["user"], event["trainer"] = expand_pokemon(event["user"]), expand_pokemon(event["trainer"])
+    return event
+
+
+class BattleLogSink:
+    """Storage for encoded events: newline-terminated JSON records, oldest first."""
+
+    def write(self, lines: list) -> None:
+        raise NotImplementedError
+
+    def scan(self):
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+def _segment_key(path: str) -> tuple:
+    index, writer_id = _SEGMENT_RE.search(path).groups()
+    return int(index), int(writer_id or 0)
+
+
+class SegmentFileSink(BattleLogSink):
+    """
+    Append-only gzip segments in a local directory.
+
+    Every write() appends one gzip member, so a segment reads back as the
+    concatenation of its batches. A member cut short by a crash (or still
+    being written while a scan runs) ends that segment's scan.
+
+    Segments are named by index and writer_id (default: the pid), so several
+    processes can share a directory; a new sink continues from the highest
+    index already there, and scans read segments in index order.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = DEFAULT_SEGMENT_BYTES, compresslevel: int = 6,
+                 writer_id: int = None):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.compresslevel = compresslevel
+        self.writer_id = os.getpid() if writer_id is None else writer_id
+        os.makedirs(directory, exist_ok=True)
+        segments = self.segments()
+        self._index = _segment_key(segments[-1])[0] if segments else 0
+        self._file = None
+
+    def segments(self) -> list:
+        paths = glob.glob(os.path.join(self.directory, "battles-*.jsonl.gz"))
+        return sorted((p for p in paths if _SEGMENT_RE.search(p)), key=_segment_key)
+
+    def write(self, lines: list) -> None:
+        data = gzip.compress(b"".join(lines), compresslevel=self.compresslevel)
+        if self._file is None:
+            self._file = open(os.path.join(self.directory, SEGMENT_PATTERN.format(self._index, self.writer_id)), "ab")
+        self._file.write(data)
+        self._file.flush()
+        BYTES.inc(amount=len(data))
+        if self._file.tell() >= self.segment_bytes:
+            self._file.close()
+            self._file = None
+            self._index += 1
+
+    def scan(self):
+        for path in self.segments():
+            try:
+                with gzip.open(path, "rb") as f:
+                    yield from f
+            except (EOFError, OSError, zlib.error):
+                log.warning("battle log segment ends in a truncated batch", extra={"fields": {"path": path}})
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+_STOP = object()
+
+
+class BattleLogWriter:
+    """Bounded queue of events drained in batches to a sink by one background thread."""
+
+    def __init__(self, sink: BattleLogSink, max_queue: int = DEFAULT_QUEUE_SIZE, batch_size: int = DEFAULT_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(max_queue)
+        self._thread = threading.Thread(target=self._run, name="battle-log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, event_type: str, *values) -> bool:
+        """Queue one event without waiting; False if it was dropped because the queue is full."""
+        try:
+            self.queue.put_nowait((event_type, *values))
+        except queue.Full:
+            DROPPED.inc(event_type)
+            return False
+        return True
+
+    def flush(self) -> None:
+        """Block until every event queued so far has been handed to the sink."""
+        self.queue.join()
+
+    def close(self) -> None:
+        self.queue.put(_STOP)
+        self._thread.join()
+        self.sink.close()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            # Collect for up to flush_interval after the first event, so a
+            # quiet service still writes a few large batches, not many tiny ones.
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1] is not _STOP:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            events = batch[:-1] if stop else batch
+            if events:
+                self._write(events)
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                return
+
+    def _write(self, events):
+        lines = [json.dumps(event, separators=(",", ":")).encode() + b"\n" for event in events]
+        try:
+            self.sink.write(lines)
+        except Exception:
+            WRITE_ERRORS.inc()
+            log.exception("battle log batch lost", extra={"fields": {"events": len(events)}})
+            return
+        for event in events:
+            EVENTS.inc(event[0])
+
+
+writer = None
+
+
+def configure(directory=None, **kwargs):
+    """
+    Start the background writer for directory (default BATTLE_LOG_DIR); with
+    neither set, battle logging stays off. Returns the writer or None.
+    """
+    global writer
+    directory = directory or os.environ.get("BATTLE_LOG_DIR")
+    if writer is not None:
+        writer.close()
+        writer = None
+    if not directory:
+        return None
+    sink = SegmentFileSink(directory, int(os.environ.get("BATTLE_LOG_SEGMENT_BYTES", DEFAULT_SEGMENT_BYTES)))
+    kwargs.setdefault("max_queue", int(os.environ.get("BATTLE_LOG_QUEUE", DEFAULT_QUEUE_SIZE)))
+    writer = BattleLogWriter(sink, **kwargs)
+    return writer
+
+
+def close():
+    """Flush and stop the writer, if logging is on."""
+    global writer
+    if writer is not None:
+        writer.close()
+        writer = None
+
+
+atexit.register(close)
+# Reads the module attribute so a reconfigured writer is reported.
+metrics.registry.register_gauge("battle_log_queue_depth", "Battle log events waiting for the writer.",
+                                lambda: writer.queue.qsize() if writer is not None else 0)
+
+
+def enabled() -> bool:
+    return writer is not None
+
+
+def new_battle_id() -> str:
+    return uuid.uuid4().hex
+
+
+def record(event_type: str, battle_id: str, *values) -> bool:
+    """Queue one event (fields after battle_id and ts, in EVENT_FIELDS order); no-op when logging is off."""
+    current = writer
+    if current is None:
+        return False
+    return current.submit(event_type, battle_id, time.time(), *values)
+
+
+def scan(event_type=None, battle_id=None, since=None, until=None):
+    """Stored events as dicts, oldest first, filtered by type, battle and ts range."""
+    current = writer
+    if current is None:
+        return
+    for line in current.sink.scan():
+        record = json.loads(line)
+        if event_type is not None and record[0] != event_type:
+            continue
+        if battle_id is not None and record[1] != battle_id:
+            continue
+        ts = record[2]
+        if (since is not None and ts < since) or (until is not None and ts >= until):
+            continue
+        yield expand_event(record)
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from . import metrics
+from .log import get_logger
+
+# Cached, hot-reloadable store for the JSON files in app/data.
+# Each file is parsed once into an immutable snapshot (parsed data, indexes,
+# pre-serialized response bytes and an ETag). Accessors re-check the file's
+# mtime at most every check_interval seconds and swap in a freshly built
+# snapshot when it changed, so readers always see either the old or the new
+# file, never a half-loaded one.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+LEVEL_FILES = {1: "level1.json"}
+MOVE_EFFECTS_FILE = "move_effects.json"
+CHECK_INTERVAL_SECONDS = 1.0
+
+log = get_logger("datastore")
+
+
+class Snapshot:
+    """One loaded version of a data file."""
+
+    __slots__ = ("mtime_ns", "data", "body", "etag", "index")
+
+    def __init__(self, mtime_ns, data, index=None):
+        self.mtime_ns = mtime_ns
+        self.data = data
+        self.body = json.dumps(data, separators=(",", ":")).encode()
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest() + '"'
+        self.index = index
+
+
+def index_level(data: dict) -> dict:
+    """trainer_id -> trainer for every trainer of a level, boss included."""
+    index = {t["trainer_id"]: t for t in data.get("trainers", [])}
+    boss = data.get("boss")
+    if boss and "trainer_id" in boss:
+        index.setdefault(boss["trainer_id"], boss)
+    return index
+
+
+class WatchedJSONFile:
+    def __init__(self, path, build_index=None, default=None, check_interval=CHECK_INTERVAL_SECONDS,
+                 clock=time.monotonic):
+        self.path = path
+        self.build_index = build_index
+        self.default = default
+        self.check_interval = check_interval
+        self.clock = clock
+        self.reloads = 0
+        self._snapshot = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> Snapshot:
+        now = self.clock()
+        snapshot = self._snapshot
+        if snapshot is not None and now < self._next_check:
+            return snapshot
+        with self._lock:
+            self._next_check = now + self.check_interval
+            try:
+                mtime_ns = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                if self._snapshot is None and self.default is not None:
+                    log.warning("data file not found; using defaults", extra={"fields": {"path": self.path}})
+                    self._snapshot = self._build(None, self.default())
+                if self._snapshot is None:
+                    raise
+                return self._snapshot
+            if self._snapshot is None or self._snapshot.mtime_ns != mtime_ns:
+                try:
+                    with open(self.path, "r") as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    # Keep serving the last good version while a file is mid-write.
+                    if self._snapshot is None:
+                        raise
+                    return self._snapshot
+                self._snapshot = self._build(mtime_ns, data)
+                self.reloads += 1
+            return self._snapshot
+
+    def _build(self, mtime_ns, data) -> Snapshot:
+        index = self.build_index(data) if self.build_index else None
+        return Snapshot(mtime_ns, data, index)
+
+
+class DataStore:
+    def __init__(self, data_dir=DATA_DIR, check_interval=CHECK_INTERVAL_SECONDS, clock=time.monotonic):
+        self.data_dir = data_dir
+        self._levels = {
+            level: WatchedJSONFile(os.path.join(data_dir, name), index_level,
+                                   check_interval=check_interval, clock=clock)
+            for level, name in LEVEL_FILES.items()
+        }
+        self._move_effects = WatchedJSONFile(os.path.join(data_dir, MOVE_EFFECTS_FILE), default=dict,
+                                             check_interval=check_interval, clock=clock)
+
+    def level(self, level: int) -> Snapshot:
+        """Snapshot of a level file; KeyError for an unknown level."""
+        return self._levels[level].get()
+
+    def trainer(self, level: int, trainer_id: int):
+        """Trainer (or boss) of a level by id, or None."""
+        return self.level(level).index.get(trainer_id)
+
+    def move_effects(self) -> dict:
+        return self._move_effects.get().data
+
+    def move_effects_snapshot(self) -> Snapshot:
+        return self._move_effects.get()
+
+    def reloads(self) -> int:
+        """Number of times any data file was (re)parsed."""
+        return self._move_effects.reloads + sum(f.reloads for f in self._levels.values())
+
+
+store = DataStore()
+# Reads the module attribute so a swapped-in store is reported.
+metrics.registry.register_gauge("battle_data_file_loads", "Data file parses since start, reloads included.",
+                                lambda: store.reloads())
@@ -0,0 +1,197 @@
+import math
+from functools import lru_cache
+
+import numpy as np
+from . import metrics
+from .engine import CRIT_CHANCE, _attack_and_defense
+from .moves import resolve_move
+from .utils import get_type_effectiveness
+
+# Exact damage distributions for engine.calculate_damage.
+#
+# Damage is rounded to 2 decimals, so it lives on a grid of hundredths
+# ("cents"). A single hit deals round(K * f, 2) with f uniform on
+# [0.85, 1.0) and K = base damage * type multiplier * crit multiplier; the
+# probability of each rounded value is the length of the slice of [0.85, 1.0)
+# that rounds to it. Misses, the 1/16 crit chance, per-hit accuracy and the
+# uniform number of hits of multi_hit moves are mixed in on that grid, and
+# repeated uses are convolutions of it. Probabilities are indexed by damage
+# in cents: dist[c] = P(damage == c / 100).
+#
+# The grid grows with the damage and HP involved, so it is bounded: a move
+# whose single use could exceed MAX_SUPPORT_CENTS, or a defender with more
+# than MAX_HP_CENTS of HP, is rejected with DistributionTooLarge before
+# anything is allocated; past MAX_LISTED_VALUES distinct damage values the
+# result is returned as a FORCED_BINS histogram instead of a full listing.
+
+CACHE_SIZE = 1024
+MAX_SUPPORT_CENTS = 1_000_000  # 10,000 damage per use
+MAX_HP_CENTS = 1_000_000
+MAX_LISTED_VALUES = 10_000
+FORCED_BINS = 1000
+# Above this many multiply-adds a convolution goes through the FFT.
+DIRECT_CONVOLVE_LIMIT = 2_000_000
+FFT_FLOOR = 1e-12
+
+
+class DistributionTooLarge(ValueError):
+    """The exact distribution would exceed the grid limits."""
+
+
+def _convolve(a, b):
+    if len(a) * len(b) <= DIRECT_CONVOLVE_LIMIT:
+        return np.convolve(a, b)
+    size = len(a) + len(b) - 1
+    n = 1 << (size - 1).bit_length()
+    out = np.fft.irfft(np.fft.rfft(a, n) * np.fft.rfft(b, n), n)[:size]
+    # FFT round-off leaves ~1e-17 noise around true zeros; drop it so the
+    # support stays exact (far tails below FFT_FLOOR are lost with it).
+    out[out < FFT_FLOOR * out.max()] = 0.0
+    return out
+
+
+def _mix(parts):
+    """Sum of weighted distributions of different lengths."""
+    out = np.zeros(max(len(dist) for _, dist in parts))
+    for weight, dist in parts:
+        out[:len(dist)] += weight * dist
+    return out
+
+
+def rounded_uniform(k: float):
+    """Distribution of round(k * f, 2) for f uniform on [0.85, 1.0)."""
+    if k <= 0:
+        return np.ones(1)
+    low, high = 85.0 * k, 100.0 * k  # in cents
+    cents = np.arange(math.floor(low + 0.5), math.floor(high + 0.5) + 1)
+    lower = np.clip(cents - 0.5, low, high)
+    upper = np.clip(cents + 0.5, low, high)
+    dist = np.zeros(int(cents[-1]) + 1)
+    dist[cents[0]:] = (upper - lower) / (high - low)
+    return dist
+
+
+def hit_distribution(k: float, accuracy: float):
+    """One hit that must pass its own accuracy check, then may crit."""
+    landed = _mix([(1 - CRIT_CHANCE, rounded_uniform(k)), (CRIT_CHANCE, rounded_uniform(k * 1.5))])
+    miss = max(0.0, 1.0 - min(accuracy, 1.0))
+    return _mix([(miss, np.ones(1)), (1.0 - miss, landed)])
+
+
+def _base_damage(key: tuple) -> float:
+    """K of one hit (before the roll and crit), as in engine.calculate_damage."""
+    level, stat, defense, power, _, type_multiplier, effect_type, _ = key
+    level_factor = (2 * level / 5) + 2
+    if effect_type == "multi_hit":
+        return (((level_factor * (power or 0) * (stat / (defense or 1))) / 50) + 2) * type_multiplier
+    stat_ratio = stat / defense if defense else 1
+    return (((level_factor * power * stat_ratio) / 50) + 2) * type_multiplier
+
+
+def max_damage_cents(key: tuple) -> float:
+    """Upper bound of one use's damage in cents: every hit a maximum crit."""
+    _, _, _, power, _, _, effect_type, hit_range = key
+    if effect_type in ("heal", "status") or (not power and effect_type != "multi_hit"):
+        return 0.0
+    hits = hit_range[1] if effect_type == "multi_hit" and hit_range else 1
+    return 100.0 * 1.5 * max(_base_damage(key), 0.0) * hits
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _single_use(key: tuple):
+    _, _, _, power, accuracy, _, effect_type, hit_range = key
+    if effect_type == "multi_hit":
+        k = _base_damage(key)
+        per_hit = hit_distribution(k, accuracy)
+        low, high = hit_range if hit_range else (1, 1)
+        parts, total = [], per_hit
+        for hits in range(1, high + 1):
+            if hits >= low:
+                parts.append((1.0 / (high - low + 1), total))
+            if hits < high:
+                total = _convolve(total, per_hit)
+        landed = _mix(parts)
+    elif effect_type in ("heal", "status") or not power:
+        landed = np.ones(1)
+    else:
+        k = _base_damage(key)
+        landed = _mix([(1 - CRIT_CHANCE, rounded_uniform(k)), (CRIT_CHANCE, rounded_uniform(k * 1.5))])
+    # The move's own accuracy check comes first, for every effect type.
+    miss = max(0.0, 1.0 - min(accuracy, 1.0))
+    dist = _mix([(miss, np.ones(1)), (1.0 - miss, landed)])
+    dist.setflags(write=False)
+    return dist
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _ko_chances(key: tuple, hp_cents: int, uses: int) -> tuple:
+    dist = _single_use(key)
+    if hp_cents <= 0:
+        return (1.0,) * uses
+    # Only damage totals short of the defender's HP matter; everything past
+    # it is a KO, so the running distribution is truncated at hp_cents.
+    alive = np.ones(1)
+    chances = []
+    for _ in range(uses):
+        alive = _convolve(alive, dist)[:hp_cents]
+        chances.append(min(1.0, max(0.0, 1.0 - float(alive.sum()))))
+    return tuple(chances)
+
+
+def distribution_key(attacker, defender, move) -> tuple:
+    """The stat tuple a move's damage distribution depends on."""
+    move = resolve_move(move)
+    stat, defense = _attack_and_defense(attacker, defender, move.category)
+    type_multiplier = get_type_effectiveness(move.move_type, defender.types or ["normal"])
+    hit_range = move.hit_range if move.hit_range and len(move.hit_range) == 2 else None
+    return (attacker.level, stat, defense, move.power, move.accuracy, type_multiplier,
+            move.effect_type, hit_range)
+
+
+def damage_distribution(attacker, defender, move, uses: int = 5, bins=None) -> dict:
+    """
+    Exact damage distribution of one use of move and the chance that
+    1..uses uses knock out defender from its current_hp.
+
+    Raises DistributionTooLarge past the grid limits (see module comment).
+    """
+    key = distribution_key(attacker, defender, move)
+    if max_damage_cents(key) > MAX_SUPPORT_CENTS:
+        raise DistributionTooLarge(f"One use can deal more than {MAX_SUPPORT_CENTS / 100:g} damage")
+    hp_cents = math.ceil(round(defender.current_hp * 100, 6))
+    if hp_cents > MAX_HP_CENTS:
+        raise DistributionTooLarge(f"Defender HP is above {MAX_HP_CENTS / 100:g}")
+    dist = _single_use(key)
+    cents = np.flatnonzero(dist)
+    probabilities = dist[cents]
+    body = {
+        "expected_damage": float(np.dot(np.arange(len(dist)), dist)) / 100,
+        "min_damage": float(cents[0]) / 100,
+        "max_damage": float(cents[-1]) / 100,
+        "no_damage_chance": float(dist[0]),
+        "ko_chance": [{"uses": n + 1, "probability": p} for n, p in enumerate(_ko_chances(key, hp_cents, uses))],
+    }
+    if not bins and len(cents) > MAX_LISTED_VALUES:
+        bins = FORCED_BINS
+    if bins:
+        counts, edges = np.histogram(cents / 100, bins=bins, weights=probabilities)
+        body["histogram"] = [
+            {"low": float(edges[i]), "high": float(edges[i + 1]), "probability": float(counts[i])}
+            for i in range(len(counts))
+        ]
+    else:
+        body["distribution"] = [
+            {"damage": d, "probability": p} for d, p in zip((cents / 100).tolist(), probabilities.tolist())
+        ]
+    return body
+
+
+def _cache_stats(cached):
+    def stats():
+        info = cached.cache_info()
+        return info.hits, info.misses, info.currsize
+    return stats
+
+
+metrics.registry.register_cache("damage_distributions", _cache_stats(_single_use))
+metrics.registry.register_cache("ko_chances", _cache_stats(_ko_chances))
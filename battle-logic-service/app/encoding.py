@@ -0,0 +1,73 @@
+import json
+from fastapi import Request, Response
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Content negotiation for the damage, batch and simulation endpoints.
+# Plain JSON (the full dict bodies) stays the default; clients that send a
+# matching Accept header get fixed-position arrays instead of keyed objects,
+# either as JSON or as msgpack.
+
+MSGPACK = "application/msgpack"
+COMPACT_JSON = "application/x-compact+json"
+
+# Field order of one compact damage row; the compact encoders below are
+# built from these tuples, so they are the documented layout.
+DAMAGE_FIELDS = ("result", "damage", "critical_hit", "type_multiplier", "status_effect_applied", "hits")
+# Field order of a compact simulation. The battle log is left out: it can be
+# rebuilt from seed and actions through /replay.
+SIMULATION_FIELDS = ("winner", "seed", "actions", "reason", "battle_id")
+
+_DAMAGE_COLUMN = DAMAGE_FIELDS.index("damage")
+
+
+def compact_damage(result: dict) -> list:
+    row = [result.get(field) for field in DAMAGE_FIELDS]
+    # Heals report their amount in the damage column.
+    row[_DAMAGE_COLUMN] = result.get("heal_amount", result.get("damage", 0))
+    return row
+
+
+def compact_batch(body: dict) -> list:
+    return [compact_damage(result) for result in body["results"]]
+
+
+def compact_simulation(body: dict) -> list:
+    return [body.get(field) for field in SIMULATION_FIELDS]
+
+
+def negotiate(request: Request):
+    """Compact media type requested through Accept, or None for plain JSON."""
+    accept = request.headers.get("accept", "")
+    if MSGPACK in accept and msgpack is not None:
+        return MSGPACK
+    if COMPACT_JSON in accept:
+        return COMPACT_JSON
+    return None
+
+
+def dumps(value, media_type: str) -> bytes:
+    if media_type == MSGPACK:
+        return msgpack.packb(value)
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def respond(request: Request, body, compact):
+    """
+    Return body as-is for JSON clients, or compact(body) encoded in the
+    negotiated media type.
+    """
+    media_type = negotiate(request)
+    if media_type is None:
+        return body
+    return Response(content=dumps(compact(body), media_type), media_type=media_type)
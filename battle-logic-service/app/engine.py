@@ -0,0 +1,436 @@
+import logging
+import time
+from . import metrics
+from .rng import make_rng, new_seed, battle_streams
+from .log import get_logger
+from .moves import resolve_move
+from .state import Combatant
+from .utils import get_type_effectiveness, type_effectiveness_by_id
+
+# Pure-Python battle engine shared by the HTTP endpoints and the battle simulator.
+# Everything in here runs in-process: no HTTP calls, no Pydantic re-validation.
+
+MAX_TURNS = 100
+
+log = get_logger("engine")
+
+# Every attack is resolved from a fixed layout of uniform [0, 1) rolls so the
+# scalar path and the vectorized batch path (app/batch.py) consume randomness
+# identically: a given roll vector always produces the same result.
+HIT_SLOT = 0        # accuracy check
+CRIT_SLOT = 1       # critical hit (single-hit moves)
+HITS_SLOT = 1       # number of hits (multi-hit moves)
+FACTOR_SLOT = 2     # damage / heal random factor
+STATUS_SLOT = 3     # status effect chance
+FIRST_HIT_SLOT = 4  # multi-hit: (hit, crit, factor) triple per hit
+SLOTS_PER_HIT = 3
+CRIT_CHANCE = 0.0625
+
+
+def roll_width(max_hits: int = 1) -> int:
+    """Number of rolls needed to resolve a move hitting at most max_hits times."""
+    return FIRST_HIT_SLOT + SLOTS_PER_HIT * max(max_hits, 1)
+
+
+def roll_randint(u: float, low: int, high: int) -> int:
+    # Same distribution as random.randint(low, high).
+    return low + int(u * (high - low + 1))
+
+
+def roll_uniform(u: float, low: float, high: float) -> float:
+    # Same formula as random.uniform(low, high).
+    return low + (high - low) * u
+
+
+# Detail levels for the "details" breakdown of a damage result.
+DETAIL_NONE, DETAIL_SUMMARY, DETAIL_FULL = "none", "summary", "full"
+SUMMARY_KEYS = (
+    "hit", "num_hits", "total_damage", "critical_hit", "type_multiplier", "final_damage",
+    "heal_amount", "status_effect_applied", "reason",
+)
+
+
+def apply_detail_level(result: dict, detail: str) -> dict:
+    """
+    Trim a damage result's "details" to the requested level.
+
+    full keeps everything, summary keeps only the outcome keys in SUMMARY_KEYS
+    (no rolls, intermediate values or per-hit breakdown), none drops "details".
+    Per-hit breakdowns are only built at all for full.
+    """
+    if detail == DETAIL_FULL:
+        return result
+    if detail == DETAIL_NONE:
+        del result["details"]
+    else:
+        details = result["details"]
+        result["details"] = {key: details[key] for key in SUMMARY_KEYS if key in details}
+    return result
+
+
+def turn_order(speed1: float, speed2: float) -> str:
+    """Return which Pokémon moves first: "pokemon1", "pokemon2" or "tie"."""
+    if speed1 > speed2:
+        return "pokemon1"
+    elif speed1 < speed2:
+        return "pokemon2"
+    return "tie"
+
+
+def _attack_and_defense(attacker, defender, category: str):
+    # Pick the correct attack/defense stats based on move category.
+    if category == "special":
+        return attacker.special_atk, defender.special_def
+    return attacker.attack, defender.defense
+
+
+def type_multiplier_of(move, defender) -> float:
+    """Type effectiveness of a resolved move against defender (a Pokemon model or Combatant)."""
+    # Combatants carry integer type ids; request models are looked up by name
+    # (isinstance, since a missing attribute on a Pydantic model is slow).
+    if isinstance(defender, Combatant) and defender.type_ids is not None:
+        return type_effectiveness_by_id(move.type_id, *defender.type_ids)
+    return get_type_effectiveness(move.move_type, defender.types or ["normal"])
+
+
+def calculate_damage(attacker, defender, move, rolls=None, rng=None, detail=DETAIL_FULL) -> dict:
+    """
+    Resolve a single move used by attacker against defender.
+
+    attacker, defender: Pokemon models (or any object with the same attributes).
+    move: Move model or ResolvedMove.
+    rolls: optional sequence of uniform [0, 1) values laid out as described by
+    the *_SLOT constants; drawn from rng (a fresh unseeded one by default) when omitted.
+    detail: "full" (default), "summary" or "none"; see apply_detail_level.
+    Returns the same response body as the /calculate_damage/ endpoint.
+    """
+    # Move fields merged with their extra effects, cached per move.
+    move = resolve_move(move)
+    start = time.perf_counter()
+    result = _resolve_attack(attacker, defender, move, rolls, rng, detail)
+    metrics.DAMAGE_SECONDS.observe(time.perf_counter() - start, move.effect_type)
+    return result
+
+
+def _resolve_attack(attacker, defender, move, rolls, rng, detail) -> dict:
+    category = move.category
+    effect_type = move.effect_type
+    if rolls is None:
+        hit_range = move.hit_range or (1, 1)
+        rolls = (rng or make_rng()).random(roll_width(hit_range[-1])).tolist()
+
+    # Prepare a dictionary to capture details.
+    details = {}
+
+    # Check if the move hits.
+    hit_roll = rolls[HIT_SLOT]
+    details["hit_roll"] = hit_roll
+    details["accuracy"] = move.accuracy
+    if hit_roll > move.accuracy:
+        details["hit"] = False
+        return apply_detail_level({
+            "result": "miss",
+            "damage": 0,
+            "details": details
+        }, detail)
+    details["hit"] = True
+
+    # --- Multi-hit Moves ---
+    if effect_type == "multi_hit":
+        if move.hit_range and len(move.hit_range) == 2:
+            min_hits, max_hits = move.hit_range
+            num_hits = roll_randint(rolls[HITS_SLOT], min_hits, max_hits)
+            details["hit_range"] = move.hit_range
+            details["num_hits"] = num_hits
+        else:
+            num_hits = 1
+            details["num_hits"] = num_hits
+        total_damage = 0
+        hit_details = []
+        full = detail == DETAIL_FULL
+        if full:
+            details["individual_hits"] = []
+
+        # Stats, level factor and type effectiveness are the same for every hit.
+        stat, defense = _attack_and_defense(attacker, defender, category)
+        defense = defense if defense else 1
+        stat_ratio = stat / defense
+
+        # Incorporate the level factor similar to the Pokémon formula.
+        level_factor = ((2 * attacker.level) / 5) + 2
+
+        # Calculate type effectiveness multiplier.
+        type_multiplier = type_multiplier_of(move, defender)
+
+        for i in range(num_hits):
+            slot = FIRST_HIT_SLOT + SLOTS_PER_HIT * i
+            hit_roll = rolls[slot]
+            if hit_roll <= move.accuracy:
+                # Calculate base damage using the formula: (((level_factor * power * (attack/defense)) / 50) + 2)
+                base_damage = ((level_factor * move.power * stat_ratio) / 50) + 2
+
+                # Determine if this hit is a critical hit.
+                crit = rolls[slot + 1] < CRIT_CHANCE
+                crit_multiplier = 1.5 if crit else 1.0
+
+                # Apply a random damage variation factor.
+                random_factor = roll_uniform(rolls[slot + 2], 0.85, 1.0)
+
+                # Final damage calculation includes all modifiers.
+                final_damage = base_damage * type_multiplier * crit_multiplier * random_factor
+                hit_damage = round(final_damage, 2)
+
+                total_damage += hit_damage
+                hit_details.append(hit_damage)
+                if full:
+                    details["individual_hits"].append({
+                        "hit_roll": hit_roll,
+                        "stat_ratio": stat_ratio,
+                        "level_factor": level_factor,
+                        "base_damage": base_damage,
+                        "type_multiplier": type_multiplier,
+                        "critical_hit": crit,
+                        "crit_multiplier": crit_multiplier,
+                        "random_factor": random_factor,
+                        "hit_damage": hit_damage,
+                    })
+            else:
+                hit_details.append(0)
+                if full:
+                    details["individual_hits"].append({"hit_roll": hit_roll, "hit_damage": 0})
+
+        details["total_damage"] = total_damage
+
+        return apply_detail_level({
+            "result": "hit",
+            "damage": total_damage,
+            "hits": num_hits,
+            "hit_details": hit_details,
+            "details": details
+        }, detail)
+
+    # --- Healing Moves ---
+    elif effect_type == "heal":
+        heal_amount = move.power
+        random_factor = roll_uniform(rolls[FACTOR_SLOT], 0.9, 1.0)
+        heal_amount = round(heal_amount * random_factor, 2)
+        details["heal_amount"] = heal_amount
+        details["random_factor"] = random_factor
+        return apply_detail_level({
+            "result": "heal",
+            "heal_amount": heal_amount,
+            "target": "self",
+            "details": details
+        }, detail)
+
+    # --- Status-only Moves ---
+    elif effect_type == "status":
+        status_applied = None
+        status_roll = rolls[STATUS_SLOT]
+        details["status_roll"] = status_roll
+        details["effect_chance"] = move.effect_chance
+        if move.status_effect and move.effect_chance:
+            if status_roll < move.effect_chance:
+                status_applied = move.status_effect
+        details["status_effect_applied"] = status_applied
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("status roll", extra={"fields": {
+                "move": move.name, "roll": status_roll, "effect_chance": move.effect_chance, "applied": status_applied,
+            }})
+        return apply_detail_level({
+            "result": "status",
+            "status_effect_applied": status_applied,
+            "details": details
+        }, detail)
+
+    # --- Default: Standard Damage Moves ---
+    else:
+        move_power = move.power  # None if power is not provided
+        if move_power is None or move_power == 0:
+            return apply_detail_level({
+                "result": "hit",
+                "damage": 0,  # No damage for non-damaging moves
+                "category": category,
+                "critical_hit": False,
+                "type_multiplier": 1.0,
+                "status_effect_applied": None,
+                "details": {"reason": "Move has no power"}
+            }, detail)
+        stat, defense = _attack_and_defense(attacker, defender, category)
+        stat_ratio = stat / defense if defense else 1
+
+        details["stat_ratio"] = stat_ratio
+
+        # **Add Level Factor**
+        level_factor = (2 * attacker.level / 5) + 2
+        details["level_factor"] = level_factor
+
+        # **Use the proper Pokémon-like formula**
+        base_damage = ((level_factor * move_power * stat_ratio) / 50) + 2
+        details["base_damage_pre_type"] = base_damage
+
+        # Apply type effectiveness
+        type_multiplier = type_multiplier_of(move, defender)
+        details["type_multiplier"] = type_multiplier
+        base_damage *= type_multiplier
+
+        # Apply critical hit multiplier
+        crit = rolls[CRIT_SLOT] < CRIT_CHANCE
+        details["critical_hit"] = crit
+        crit_multiplier = 1.5 if crit else 1.0
+        details["crit_multiplier"] = crit_multiplier
+        base_damage *= crit_multiplier
+
+        # Apply random factor (for variability)
+        random_factor = roll_uniform(rolls[FACTOR_SLOT], 0.85, 1.0)
+        details["random_factor"] = random_factor
+        damage = round(base_damage * random_factor, 2)
+        details["final_damage"] = damage
+
+        # Check for status effect application.
+        status_applied = None
+        if move.status_effect and move.effect_chance:
+            status_roll = rolls[STATUS_SLOT]
+            details["status_roll"] = status_roll
+            if status_roll < move.effect_chance:
+                status_applied = move.status_effect
+            details["status_effect_applied"] = status_applied
+
+        return apply_detail_level({
+            "result": "hit",
+            "damage": damage,
+            "category": category,
+            "critical_hit": crit,
+            "type_multiplier": type_multiplier,
+            "status_effect_applied": status_applied,
+            "details": details
+        }, detail)
+
+
+def battle_events(user_pokemon, trainer_pokemon, seed=None, actions=None,
+                  user_policy="first", trainer_policy="random"):
+    """
+    Run a battle one attack at a time, yielding an event as each resolves.
+
+    The first event is {"type": "start", "seed", "first"}; then one
+    {"type": "attack", "turn", "attacker", "defender", "move", "move_index",
+    "defender_hp", "fainted", **damage fields} per attack; then
+    {"type": "end", "winner", "seed", "actions"} (plus "reason" on a turn-limit
+    tie). Moves, seeds and metrics behave as in simulate_battle, and both
+    models get their final current_hp when the end event is produced; a
+    generator closed early leaves the models untouched.
+    """
+    from .policies import ExpectedDamageCache, make_policy  # policies build on this module
+
+    if seed is None:
+        seed = new_seed()
+    policy_rng, damage_rng = battle_streams(seed)
+    cache = ExpectedDamageCache()
+    user_policy = make_policy(user_policy, policy_rng, cache)
+    trainer_policy = make_policy(trainer_policy, policy_rng, cache)
+    chosen = []
+    models = (user_pokemon, trainer_pokemon)
+    user_pokemon, trainer_pokemon = Combatant.from_pokemon(user_pokemon), Combatant.from_pokemon(trainer_pokemon)
+    # Only replays return the per-attack breakdown.
+    detail = DETAIL_FULL if actions is not None else DETAIL_NONE
+
+    def finish(winner, **extra):
+        metrics.BATTLE_TURNS.observe(min(turn_counter, MAX_TURNS))
+        models[0].current_hp, models[1].current_hp = user_pokemon.current_hp, trainer_pokemon.current_hp
+        return {"type": "end", "winner": winner, **extra, "seed": seed, "actions": chosen}
+
+    # Determine which Pokemon goes first
+    first = turn_order(user_pokemon.speed, trainer_pokemon.speed)
+    if first == "pokemon1":
+        first_pokemon, second_pokemon = user_pokemon, trainer_pokemon
+    else:
+        first_pokemon, second_pokemon = trainer_pokemon, user_pokemon
+    yield {"type": "start", "seed": seed, "first": first_pokemon.nickname}
+
+    turn_counter = 0
+    while user_pokemon.current_hp > 0 and trainer_pokemon.current_hp > 0:
+        turn_counter += 1
+        if turn_counter > MAX_TURNS:
+            yield finish("tie", reason="Turn limit reached")
+            return
+
+        for attacker, defender in ((first_pokemon, second_pokemon), (second_pokemon, first_pokemon)):
+            if attacker.current_hp <= 0:
+                continue  # Skip turn if fainted
+
+            if actions is not None:
+                if len(chosen) >= len(actions):
+                    raise ValueError("Action list ended before the battle did")
+                move_index = actions[len(chosen)]
+                if not 0 <= move_index < len(attacker.moves):
+                    raise ValueError(f"Invalid move index {move_index} for {attacker.nickname}")
+            else:
+                policy = user_policy if attacker is user_pokemon else trainer_policy
+                move_index = policy.choose(attacker, defender)
+            chosen.append(move_index)
+            move = attacker.moves[move_index]
+
+            damage_data = calculate_damage(attacker, defender, move, rng=damage_rng, detail=detail)
+
+            defender.current_hp -= damage_data.get("damage", 0)
+            yield {
+                "type": "attack",
+                "turn": turn_counter,
+                "attacker": attacker.nickname,
+                "defender": defender.nickname,
+                "move": move.name,
+                "move_index": move_index,
+                "defender_hp": defender.current_hp,
+                "fainted": defender.current_hp <= 0,
+                **damage_data,
+            }
+            if defender.current_hp <= 0:
+                yield finish(attacker.nickname)
+                return
+
+    yield finish("tie")
+
+
+def simulate_battle(user_pokemon, trainer_pokemon, seed=None, actions=None,
+                    user_policy="first", trainer_policy="random") -> dict:
+    """
+    Run a full battle between two Pokemon models until one faints.
+
+    Moves are picked by the named policies (see app/policies.py); by default
+    the user Pokémon always uses its first move and the trainer a random one.
+    The loop (battle_events) runs on Combatant copies; their final current_hp
+    is written back to both models.
+
+    The result records the seed and the move index chosen for every attack
+    ("actions"); that is all replay_battle needs to rebuild the battle.
+    """
+    battle_log = []
+    turns = []
+    for event in battle_events(user_pokemon, trainer_pokemon, seed, actions, user_policy, trainer_policy):
+        kind = event["type"]
+        if kind == "attack":
+            battle_log.append(f"{event['attacker']} used {event['move']}, dealing {event.get('damage', 0)} damage!")
+            if actions is not None:
+                turns.append({k: v for k, v in event.items() if k not in _EVENT_ONLY_FIELDS})
+            if event["fainted"]:
+                battle_log.append(f"{event['defender']} fainted!")
+        elif kind == "end":
+            del event["type"]
+            result = {"battle_log": battle_log, **event}
+            if actions is not None:
+                result["turns"] = turns
+            return result
+
+
+# Attack event fields that replay turns leave out.
+_EVENT_ONLY_FIELDS = ("type", "move_index", "fainted")
+
+
+def replay_battle(user_pokemon, trainer_pokemon, seed: int, actions: list) -> dict:
+    """
+    Rebuild a battle from its seed and recorded action list.
+
+    Returns the simulate_battle result plus "turns": the full damage
+    breakdown (including details) for every attack.
+    """
+    return simulate_battle(user_pokemon, trainer_pokemon, seed=seed, actions=actions)
@@ -0,0 +1,320 @@
+import hashlib
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from . import engine, metrics
+from .log import get_logger
+from .rng import SEED_BITS, new_seed
+
+# Background simulation jobs.
+#
+# Simulations submitted through /jobs run on their own bounded process pool,
+# not on the threads that serve live /calculate_damage/ and turn requests. A
+# job is cut into chunks of CHUNK_BATTLES battles; chunks wait in a priority
+# queue ordered by the job's priority class, then by submission, and only
+# IN_FLIGHT_PER_PROCESS chunks per process are handed to the pool at a time,
+# so a high-priority job overtakes queued bulk work after at most one chunk.
+# Pool processes run at a lower scheduling priority (BATTLE_JOB_NICE), so on a
+# busy host the CPU goes to the request-serving worker first. Like the shared
+# pool (app/pool.py) they start from a forkserver: forking the threaded
+# server could hand a worker a lock that another thread held at the time.
+#
+# Admission control: at most max_queue unfinished jobs. Past that, submit()
+# raises QueueFull with a Retry-After estimate from the recent chunk
+# duration, and the route sheds the request with 429. A request identical to
+# an unfinished job (same payload and seed) joins that job instead of
+# starting another; unseeded requests are never coalesced.
+#
+#   BATTLE_JOB_PROCESSES  pool processes (default: CPU count)
+#   BATTLE_JOB_QUEUE      unfinished jobs before requests are shed (default 1000)
+#   BATTLE_JOB_NICE       niceness added to pool processes (default 10)
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+CHUNK_BATTLES = 50
+IN_FLIGHT_PER_PROCESS = 2
+DEFAULT_MAX_QUEUE = 1000
+DEFAULT_NICE = 10
+DEFAULT_TTL_SECONDS = 15 * 60  # finished jobs stay readable this long
+DEFAULT_MAX_FINISHED = 10_000
+MAX_RETRY_AFTER = 60
+
+log = get_logger("jobs")
+
+SUBMITTED = metrics.registry.counter(
+    "battle_jobs_submitted_total", "Simulation jobs accepted by priority class.", labelnames=("priority",))
+REJECTED = metrics.registry.counter(
+    "battle_jobs_rejected_total", "Simulation jobs shed with 429 by priority class.", labelnames=("priority",))
+COALESCED = metrics.registry.counter(
+    "battle_jobs_coalesced_total", "Job requests answered by an identical unfinished job.")
+CHUNK_SECONDS = metrics.registry.histogram(
+    "battle_job_chunk_duration_seconds", "Seconds from handing a job chunk to the pool to its result.")
+
+
+class QueueFull(Exception):
+    """The job queue is at capacity; retry_after is a whole number of seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Simulation queue is full; retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+def run_chunk(user_pokemon, trainer_pokemon, seed, start, count, user_policy, trainer_policy):
+    """
+    Battles start..start+count of a job, battle i seeded with seed + i.
+    Returns the simulate_battle result for a one-battle job, else (wins, losses, ties).
+    """
+    if start == 0 and count == 1:
+        return engine.simulate_battle(user_pokemon, trainer_pokemon, seed, user_policy=user_policy,
+                                      trainer_policy=trainer_policy)
+    wins = losses = ties = 0
+    for i in range(start, start + count):
+        user, trainer = user_pokemon.model_copy(), trainer_pokemon.model_copy()
+        engine.simulate_battle(user, trainer, (seed + i) % (1 << SEED_BITS), user_policy=user_policy,
+                               trainer_policy=trainer_policy)
+        # Counted by side, not by the winner's nickname: both sides of a
+        # mirror match share one.
+        if trainer.current_hp <= 0:
+            wins += 1
+        elif user.current_hp <= 0:
+            losses += 1
+        else:
+            ties += 1
+    return wins, losses, ties
+
+
+def _init_worker(nice):
+    # Workers must not keep handlers that would swallow SIGTERM; Ctrl-C is
+    # left to the parent, which shuts the pool down.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        os.nice(nice)
+    except OSError:
+        pass
+
+
+class Job:
+    """One submitted simulation: its request, progress and result."""
+
+    def __init__(self, request, seed, key, clock):
+        self.job_id = uuid.uuid4().hex
+        self.request = request
+        self.seed = seed
+        self.key = key
+        self.priority = request.priority
+        self.battles = request.battles
+        self.status = "queued"
+        self.completed = 0
+        self.counts = [0, 0, 0]
+        self.result = None
+        self.error = None
+        self.created_at = clock()
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def state(self) -> dict:
+        state = {
+            "job_id": self.job_id,
+            "status": self.status,
+            "priority": self.priority,
+            "battles": self.battles,
+            "completed": self.completed,
+            "progress": self.completed / self.battles,
+            "seed": self.seed,
+        }
+        if self.result is not None:
+            state["result"] = self.result
+        if self.error is not None:
+            state["error"] = self.error
+        return state
+
+
+def request_key(request):
+    """Coalescing key: the request minus its priority, or None for unseeded requests."""
+    if request.seed is None:
+        return None
+    body = request.model_dump_json(exclude={"priority"})
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class JobQueue:
+    """Priority-ordered chunks of simulation jobs drained onto a process pool by one dispatcher thread."""
+
+    def __init__(self, processes=None, max_queue=DEFAULT_MAX_QUEUE, nice=DEFAULT_NICE,
+                 ttl_seconds=DEFAULT_TTL_SECONDS, max_finished=DEFAULT_MAX_FINISHED, clock=time.monotonic):
+        self.processes = processes or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max_finished
+        self.clock = clock
+        self.chunk_seconds = 0.05  # moving average, seeds the Retry-After estimate
+        self._pool = ProcessPoolExecutor(max_workers=self.processes, initializer=_init_worker, initargs=(nice,),
+                                         mp_context=multiprocessing.get_context("forkserver"))
+        self._chunks = queue.PriorityQueue()  # (priority rank, sequence, job, start, count)
+        self._slots = threading.BoundedSemaphore(self.processes * IN_FLIGHT_PER_PROCESS)
+        self._sequence = 0
+        self._jobs = OrderedDict()  # job_id -> Job, in submission order
+        self._unfinished = {}  # coalescing key -> unfinished Job
+        self._pending = 0  # unfinished jobs
+        self._queued_chunks = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._dispatch, name="battle-job-dispatcher", daemon=True)
+        self._thread.start()
+
+    def __len__(self):
+        return self._pending
+
+    def submit(self, request):
+        """(job, coalesced) for a JobRequest; raises QueueFull when at capacity."""
+        key = request_key(request)
+        with self._lock:
+            job = self._unfinished.get(key) if key is not None else None
+            if job is not None:
+                COALESCED.inc()
+                return job, True
+            if self._pending >= self.max_queue:
+                REJECTED.inc(request.priority)
+                raise QueueFull(self.retry_after())
+            job = Job(request, new_seed() if request.seed is None else request.seed, key, self.clock)
+            self._evict_finished()
+            self._jobs[job.job_id] = job
+            if key is not None:
+                self._unfinished[key] = job
+            self._pending += 1
+            rank = PRIORITIES[job.priority]
+            for start in range(0, job.battles, CHUNK_BATTLES):
+                self._sequence += 1
+                self._queued_chunks += 1
+                self._chunks.put((rank, self._sequence, job, start, min(CHUNK_BATTLES, job.battles - start)))
+        SUBMITTED.inc(job.priority)
+        return job, False
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def retry_after(self) -> int:
+        """Seconds until the queued chunks should have drained, clamped to 1..MAX_RETRY_AFTER."""
+        # chunk_seconds runs from pool submission to result, with every slot
+        # busy, so it already includes the wait behind the other in-flight chunks.
+        estimate = self._queued_chunks * self.chunk_seconds / (self.processes * IN_FLIGHT_PER_PROCESS)
+        return max(1, min(MAX_RETRY_AFTER, math.ceil(estimate)))
+
+    def close(self) -> None:
+        self._closed = True
+        self._chunks.put((-1, 0, None, 0, 0))  # sorts first: wakes the dispatcher to stop
+        self._thread.join()
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _dispatch(self):
+        while True:
+            self._slots.acquire()
+            _, _, job, start, count = self._chunks.get()
+            if job is None or self._closed:
+                return
+            with self._lock:
+                self._queued_chunks -= 1
+                if job.finished:  # an earlier chunk failed
+                    self._slots.release()
+                    continue
+                if job.status == "queued":
+                    job.status = "running"
+                    job.started_at = self.clock()
+                request = job.request
+            future = self._pool.submit(run_chunk, request.user_pokemon, request.trainer_pokemon, job.seed, start,
+                                       count, request.user_policy, request.trainer_policy)
+            future.add_done_callback(lambda f, job=job, count=count, began=time.perf_counter():
+                                     self._chunk_done(f, job, count, began))
+
+    def _chunk_done(self, future, job, count, began):
+        elapsed = time.perf_counter() - began
+        CHUNK_SECONDS.observe(elapsed)
+        try:
+            outcome = future.result()
+        except Exception as e:
+            outcome, error = None, e
+        else:
+            error = None
+        with self._lock:
+            self.chunk_seconds += 0.2 * (elapsed - self.chunk_seconds)
+            if not job.finished:
+                if error is not None:
+                    log.error("simulation job chunk failed", extra={"fields": {"job_id": job.job_id, "error": repr(error)}})
+                    job.error = str(error) or type(error).__name__
+                    self._finish(job, "failed")
+                else:
+                    job.completed += count
+                    if isinstance(outcome, dict):
+                        job.result = outcome
+                    else:
+                        job.counts = [a + b for a, b in zip(job.counts, outcome)]
+                    if job.completed == job.battles:
+                        if job.result is None:
+                            wins, losses, ties = job.counts
+                            job.result = {"wins": wins, "losses": losses, "ties": ties,
+                                          "win_rate": wins / job.battles, "loss_rate": losses / job.battles,
+                                          "tie_rate": ties / job.battles}
+                        self._finish(job, "done")
+        self._slots.release()
+
+    def _finish(self, job, status):
+        job.status = status
+        job.finished_at = self.clock()
+        job.request = None  # the Pokémon are no longer needed
+        self._pending -= 1
+        if job.key is not None and self._unfinished.get(job.key) is job:
+            del self._unfinished[job.key]
+
+    def _evict_finished(self):
+        # Finished jobs are dropped once past the TTL, oldest first, or when
+        # too many are held; unfinished ones stay until they finish.
+        now = self.clock()
+        finished = len(self._jobs) - self._pending
+        for job_id, job in list(self._jobs.items()):
+            if not job.finished:
+                continue
+            if job.finished_at + self.ttl_seconds > now and finished <= self.max_finished:
+                break
+            del self._jobs[job_id]
+            finished -= 1
+
+
+jobs = None
+_lock = threading.Lock()
+
+
+def get() -> JobQueue:
+    """The worker's job queue, started on first use so workers that never run jobs never fork a pool."""
+    global jobs
+    if jobs is None:
+        with _lock:
+            if jobs is None:
+                processes = int(os.environ.get("BATTLE_JOB_PROCESSES", 0)) or None
+                jobs = JobQueue(processes, int(os.environ.get("BATTLE_JOB_QUEUE", DEFAULT_MAX_QUEUE)),
+                                int(os.environ.get("BATTLE_JOB_NICE", DEFAULT_NICE)))
+    return jobs
+
+
+def close():
+    """Stop the job queue and its pool, if one was started."""
+    global jobs
+    if jobs is not None:
+        jobs.close()
+        jobs = None
+
+
+metrics.registry.register_gauge("battle_jobs_unfinished", "Simulation jobs queued or running.",
+                                lambda: len(jobs) if jobs is not None else 0)
@@ -0,0 +1,63 @@
+import json
+import logging
+import os
+import random
+import sys
+
+# Structured, leveled logging for the battle service.
+#
+# Records are written as one JSON object per line to stderr by a single
+# handler on the "battle" logger. Hot-path events are logged at DEBUG and
+# guarded with isEnabledFor, so they cost one cached level check when DEBUG is
+# off; when it is on, only a sample of them (BATTLE_LOG_SAMPLE_RATE) is kept.
+#
+#   BATTLE_LOG_LEVEL        DEBUG / INFO / WARNING ... (default WARNING)
+#   BATTLE_LOG_SAMPLE_RATE  fraction of DEBUG records kept (default 0.01)
+
+ROOT = "battle"
+
+
+class JSONFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a random fraction of records below min_level; pass the rest."""
+
+    def __init__(self, rate: float, min_level=logging.INFO):
+        super().__init__()
+        self.rate = rate
+        self.min_level = min_level
+
+    def filter(self, record):
+        return record.levelno >= self.min_level or random.random() < self.rate
+
+
+def configure(level=None, sample_rate=None, stream=None) -> logging.Logger:
+    """(Re)configure the service logger; safe to call more than once."""
+    logger = logging.getLogger(ROOT)
+    level = level or os.environ.get("BATTLE_LOG_LEVEL", "WARNING")
+    if sample_rate is None:
+        sample_rate = float(os.environ.get("BATTLE_LOG_SAMPLE_RATE", "0.01"))
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JSONFormatter())
+    handler.addFilter(SamplingFilter(sample_rate))
+    logger.addHandler(handler)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    return logger
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Child of the service logger, e.g. get_logger("engine") -> "battle.engine"."""
+    return logging.getLogger(f"{ROOT}.{name}")
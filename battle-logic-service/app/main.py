@@ -1,18 +1,39 @@
-from fastapi import FastAPI
-from .models import BattleRequest, XPUpdateRequest
-import random
+import contextlib
+from typing import Literal
+from fastapi import FastAPI, HTTPException, Request, Response
+from .models import (
+    BattleRequest, BatchBattleRequest, DamageDistributionRequest, XPUpdateRequest, BatchXPUpdateRequest,
+)
 import uvicorn
+from . import battlelog, encoding, engine, jobs, log, metrics, pool, references
+from .profiler import ProfilerMiddleware
+from .rng import make_rng
+from .batch import resolve_moves, batch_roll_width, calculate_damage_batch
+from .distribution import DistributionTooLarge, damage_distribution
 from .routes.level1 import router as level1_router
-from .utils import (
-    get_type_effectiveness,
-    augment_move_data,
-    get_move_category,
-    add_experience,
-    xp_needed_for_level
-)
+from .routes.battles import router as battles_router
+from .routes.tournament import router as tournament_router
+from .routes.battle_log import router as battle_log_router
+from .routes.live import router as live_router
+from .routes.jobs import router as jobs_router
+from .utils import LEVEL_UP_INCREMENTS, add_experience
+from .xp import add_experience_batch
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+
+log.configure()
+battlelog.configure()
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    yield
+    # uvicorn re-raises SIGTERM once it has shut down, so atexit hooks never
+    # run: stop the process pools and flush the battle log here.
+    pool.shutdown()
+    jobs.close()
+    battlelog.close()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,239 +43,84 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ProfilerMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+
 app.include_router(level1_router)
+app.include_router(battles_router)
+app.include_router(tournament_router)
+app.include_router(battle_log_router)
+app.include_router(live_router)
+app.include_router(jobs_router)
 
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Welcome to the Battle Logic Service with detailed breakdown!"}
 
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "ok"}
 
-@app.post("/calculate_damage/")
-def calculate_damage(battle: BattleRequest):
-    # Convert move to dict and augment with extra effects.
-    move_dict = battle.move.dict()  # Use model_dump() if using Pydantic V2.
-    print("Original move data:", move_dict)
-    move_dict = augment_move_data(move_dict)
-    print("Augmented move data:", move_dict)
-
-    # Prepare a dictionary to capture details.
-    details = {}
-    
-    # Check if the move hits.
-    hit_roll = random.random()
-    details["hit_roll"] = hit_roll
-    details["accuracy"] = move_dict["accuracy"]
-    if hit_roll > move_dict["accuracy"]:
-        details["hit"] = False
-        return {
-            "result": "miss",
-            "damage": 0,
-            "details": details
-        }
-    details["hit"] = True
-
-    effect_type = move_dict.get("effect_type", "damage")
-    
-    # --- Multi-hit Moves ---
-    if effect_type == "multi_hit":
-        if move_dict.get("hit_range") and len(move_dict["hit_range"]) == 2:
-            min_hits, max_hits = move_dict["hit_range"]
-            num_hits = random.randint(min_hits, max_hits)
-            details["hit_range"] = move_dict["hit_range"]
-            details["num_hits"] = num_hits
-        else:
-            num_hits = 1
-            details["num_hits"] = num_hits
-        total_damage = 0
-        hit_details = []
-        details["individual_hits"] = []
-        for i in range(num_hits):
-            current_hit = {}
-            current_hit["hit_roll"] = random.random()
-            if current_hit["hit_roll"] <= move_dict["accuracy"]:
-                # Determine the correct attack/defense stats based on move category.
-                if battle.move.category == "physical":
-                    stat = battle.attacker.attack
-                    defense = battle.defender.defense if battle.defender.defense else 1
-                elif battle.move.category == "special":
-                    stat = battle.attacker.special_atk
-                    defense = battle.defender.special_def if battle.defender.special_def else 1
-                else:
-                    stat = battle.attacker.attack
-                    defense = battle.defender.defense if battle.defender.defense else 1
-
-                # Incorporate the level factor similar to the Pokémon formula.
-                level_factor = ((2 * battle.attacker.level) / 5) + 2
-
-                # Calculate base damage using the formula: (((level_factor * power * (attack/defense)) / 50) + 2)
-                base_damage = ((level_factor * move_dict["power"] * (stat / defense)) / 50) + 2
-                current_hit["stat_ratio"] = stat / defense
-                current_hit["level_factor"] = level_factor
-                current_hit["base_damage"] = base_damage
-
-                # Calculate type effectiveness multiplier.
-                defender_types = battle.defender.types or ["normal"]
-                type_multiplier = get_type_effectiveness(move_dict["move_type"], defender_types)
-                current_hit["type_multiplier"] = type_multiplier
-
-                # Determine if this hit is a critical hit.
-                crit = random.random() < 0.0625
-                crit_multiplier = 1.5 if crit else 1.0
-                current_hit["critical_hit"] = crit
-                current_hit["crit_multiplier"] = crit_multiplier
-
-                # Apply a random damage variation factor.
-                random_factor = random.uniform(0.85, 1.0)
-                current_hit["random_factor"] = random_factor
+@app.get("/metrics")
+async def metrics_endpoint():
+    return Response(content=metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
-                # Final damage calculation includes all modifiers.
-                final_damage = base_damage * type_multiplier * crit_multiplier * random_factor
-                hit_damage = round(final_damage, 2)
-                current_hit["hit_damage"] = hit_damage
+Detail = Literal["none", "summary", "full"]
+DAMAGE_FIELDS = ("attacker", "defender", "move")  # may be sent as pokedex references
 
-                total_damage += hit_damage
-                hit_details.append(hit_damage)
-            else:
-                hit_details.append(0)
-                current_hit["hit_damage"] = 0
-
-            details["individual_hits"].append(current_hit)
-            details["total_damage"] = total_damage
-
-        return {
-            "result": "hit",
-            "damage": total_damage,
-            "hits": num_hits,
-            "hit_details": hit_details,
-            "details": details
-        }
-    
-    # --- Healing Moves ---
-    elif effect_type == "heal":
-        heal_amount = move_dict.get("power", 0)
-        random_factor = random.uniform(0.9, 1.0)
-        heal_amount = round(heal_amount * random_factor, 2)
-        details["heal_amount"] = heal_amount
-        details["random_factor"] = random_factor
-        return {
-            "result": "heal",
-            "heal_amount": heal_amount,
-            "target": "self",
-            "details": details
-        }
-    
-    # --- Status-only Moves ---
-    elif effect_type == "status":
-        status_applied = None
-        status_roll = random.random()
-        details["status_roll"] = status_roll
-        details["effect_chance"] = move_dict.get("effect_chance")
-        if move_dict.get("status_effect") and move_dict.get("effect_chance"):
-            if status_roll < move_dict["effect_chance"]:
-                status_applied = move_dict["status_effect"]
-        details["status_effect_applied"] = status_applied
-        print("Status branch - roll:", status_roll, "effect_chance:", move_dict.get("effect_chance"), "applied:", status_applied)
-        return {
-            "result": "status",
-            "status_effect_applied": status_applied,
-            "details": details
-        }
-    
-    # --- Default: Standard Damage Moves ---
-    else:
-        move_power = move_dict.get("power", 0.0)  # Default to 0 if power is not provided
-        if move_power is None or move_power == 0:
-            return {
-                "result": "hit",
-                "damage": 0,  # No damage for non-damaging moves
-                "category": battle.move.category,
-                "critical_hit": False,
-                "type_multiplier": 1.0,
-                "status_effect_applied": None,
-                "details": {"reason": "Move has no power"}
-            }
-        if battle.move.category == "physical":
-            stat_ratio = battle.attacker.attack / battle.defender.defense if battle.defender.defense else 1
-        elif battle.move.category == "special":
-            stat_ratio = battle.attacker.special_atk / battle.defender.special_def if battle.defender.special_def else 1
-        else:
-            stat_ratio = battle.attacker.attack / battle.defender.defense if battle.defender.defense else 1
-
-        details["stat_ratio"] = stat_ratio
-
-        # **Add Level Factor**
-        level_factor = (2 * battle.attacker.level / 5) + 2
-        details["level_factor"] = level_factor
-
-        # **Use the proper Pokémon-like formula**
-        base_damage = ((level_factor * move_power * stat_ratio) / 50) + 2
-        details["base_damage_pre_type"] = base_damage
-
-        # Apply type effectiveness
-        defender_types = battle.defender.types or ["normal"]
-        type_multiplier = get_type_effectiveness(move_dict["move_type"], defender_types)
-        details["type_multiplier"] = type_multiplier
-        base_damage *= type_multiplier
-
-        # Apply critical hit multiplier
-        crit = random.random() < 0.0625
-        details["critical_hit"] = crit
-        crit_multiplier = 1.5 if crit else 1.0
-        details["crit_multiplier"] = crit_multiplier
-        base_damage *= crit_multiplier
-
-        # Apply random factor (for variability)
-        random_factor = random.uniform(0.85, 1.0)
-        details["random_factor"] = random_factor
-        damage = round(base_damage * random_factor, 2)
-        details["final_damage"] = damage
-
-        # Check for status effect application.
-        status_applied = None
-        if move_dict.get("status_effect") and move_dict.get("effect_chance"):
-            status_roll = random.random()
-            details["status_roll"] = status_roll
-            if status_roll < move_dict["effect_chance"]:
-                status_applied = move_dict["status_effect"]
-            details["status_effect_applied"] = status_applied
-
-        return {
-            "result": "hit",
-            "damage": damage,
-            "category": battle.move.category,
-            "critical_hit": crit,
-            "type_multiplier": type_multiplier,
-            "status_effect_applied": status_applied,
-            "details": details
-        }
+@app.post("/calculate_damage/")
+async def calculate_damage(battle: BattleRequest, request: Request, detail: Detail = engine.DETAIL_FULL):
+    [battle] = await references.resolve_references([battle], DAMAGE_FIELDS)
+    result = engine.calculate_damage(
+        battle.attacker, battle.defender, battle.move, rng=make_rng(battle.seed), detail=detail
+    )
+    return encoding.respond(request, result, encoding.compact_damage)
+
+def _calculate_damage_batch(batch: BatchBattleRequest, detail: str = engine.DETAIL_FULL) -> list:
+    # One prefetch for every id referenced anywhere in the batch.
+    attacks = references.resolve(batch.attacks, DAMAGE_FIELDS)
+    moves = resolve_moves(attacks)
+    rng = make_rng(batch.seed)
+    rolls = rng.random((len(attacks), batch_roll_width(moves)))
+    return calculate_damage_batch(attacks, moves, rolls, detail)
+
+# Large batches are CPU-bound for tens of milliseconds: keep them off the event loop.
+@app.post("/calculate_damage/batch")
+async def calculate_damage_batch_endpoint(batch: BatchBattleRequest, request: Request,
+                                          detail: Detail = engine.DETAIL_FULL):
+    body = {"results": await run_in_threadpool(_calculate_damage_batch, batch, detail)}
+    return encoding.respond(request, body, encoding.compact_batch)
+
+# Exact distribution instead of sampling /calculate_damage/; memoized per stat tuple.
+@app.post("/damage_distribution")
+async def damage_distribution_endpoint(request: DamageDistributionRequest):
+    [request] = await references.resolve_references([request], DAMAGE_FIELDS)
+    try:
+        return await run_in_threadpool(
+            damage_distribution, request.attacker, request.defender, request.move, request.uses, request.bins
+        )
+    except DistributionTooLarge as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 
 @app.post("/add_experience/")
-def add_experience_endpoint(xp_update: XPUpdateRequest):
+async def add_experience_endpoint(xp_update: XPUpdateRequest):
     stats_dict = xp_update.attacker.dict()
-    increments = {
-        "attack": 2,
-        "defense": 2,
-        "hp": 5,
-        "speed": 1,
-        "special_atk": 2,
-        "special_def": 2
-    }
-    updated_stats = add_experience(stats_dict, xp_update.xp_gained, increments)
+    updated_stats = add_experience(stats_dict, xp_update.xp_gained, LEVEL_UP_INCREMENTS)
     return {"updated_stats": updated_stats}
 
+def _add_experience_batch(batch: BatchXPUpdateRequest) -> list:
+    stats = [update.attacker.model_dump() for update in batch.updates]
+    xp_gained = [update.xp_gained for update in batch.updates]
+    return add_experience_batch(stats, xp_gained, LEVEL_UP_INCREMENTS)
+
+@app.post("/add_experience/batch")
+async def add_experience_batch_endpoint(batch: BatchXPUpdateRequest):
+    return {"results": [{"updated_stats": stats} for stats in await run_in_threadpool(_add_experience_batch, batch)]}
+
 @app.post("/turn_order/")
-def turn_order(data: dict):
-    if data["pokemon1"]["speed"] > data["pokemon2"]["speed"]:
-        first = "pokemon1"
-    elif data["pokemon1"]["speed"] < data["pokemon2"]["speed"]:
-        first = "pokemon2"
-    else:
-        first = "tie"
-    return {"first": first}
+async def turn_order(data: dict):
+    return {"first": engine.turn_order(data["pokemon1"]["speed"], data["pokemon2"]["speed"])}
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
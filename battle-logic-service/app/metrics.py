@@ -0,0 +1,187 @@
+import bisect
+import os
+import threading
+import time
+
+# In-process metrics for the battle service, rendered in the Prometheus text
+# exposition format by GET /metrics. No client library or collector is
+# needed: counters and histograms live in this module and are read on
+# scrape, caches report through callbacks registered with register_cache.
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds: 10us .. 10s, roughly x2.5 per bucket.
+LATENCY_BUCKETS = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                   1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TURN_BUCKETS = (1, 2, 3, 4, 5, 7, 10, 15, 20, 30, 50, 75, 100)
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        values = self._values or ({} if self.labelnames else {(): 0})
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets=LATENCY_BUCKETS, labelnames=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}  # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series else 0
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            series_items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in series_items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._caches = {}  # name -> callable returning (hits, misses, size)
+        self._gauges = []  # (name, help, callable)
+
+    def counter(self, *args, **kwargs) -> Counter:
+        metric = Counter(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        metric = Histogram(*args, **kwargs)
+        self._metrics.append(metric)
+        return metric
+
+    def register_cache(self, name: str, info):
+        """info() -> (hits, misses, current size) for the named cache."""
+        self._caches[name] = info
+
+    def register_gauge(self, name: str, help: str, value):
+        self._gauges.append((name, help, value))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        lines.extend(self._render_caches())
+        for name, help, value in self._gauges:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} gauge", f"{name} {value()}"]
+        return "\n".join(lines) + "\n"
+
+    def _render_caches(self) -> list:
+        stats = {name: info() for name, info in sorted(self._caches.items())}
+        lines = []
+        for suffix, kind, help, pick in (
+            ("hits_total", "counter", "Cache lookups served from the cache.", lambda s: s[0]),
+            ("misses_total", "counter", "Cache lookups that had to compute the value.", lambda s: s[1]),
+            ("size", "gauge", "Entries currently held by the cache.", lambda s: s[2]),
+            ("hit_ratio", "gauge", "Hits over lookups since start.",
+             lambda s: s[0] / (s[0] + s[1]) if s[0] + s[1] else 0.0),
+        ):
+            name = f"battle_cache_{suffix}"
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            lines += [f'{name}{{cache="{cache}"}} {pick(s)}' for cache, s in stats.items()]
+        return lines
+
+
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    "battle_http_request_duration_seconds", "Request latency by route template.",
+    labelnames=("method", "route", "status"))
+DAMAGE_SECONDS = registry.histogram(
+    "battle_damage_duration_seconds", "engine.calculate_damage latency by move effect_type.",
+    labelnames=("effect_type",))
+BATTLE_TURNS = registry.histogram(
+    "battle_simulated_turns", "Turns per simulated battle.", buckets=TURN_BUCKETS)
+PROFILES = registry.counter(
+    "battle_profiles_written_total", "Request profiles written by the sampling profiler.")
+
+
+def _resident_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0  # not Linux
+
+
+registry.register_gauge("process_resident_memory_bytes", "Resident set size of this worker.", _resident_bytes)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording REQUEST_SECONDS for every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope; unmatched
+            # paths share one label so scanners cannot blow up cardinality.
+            route = scope.get("route")
+            REQUEST_SECONDS.observe(time.perf_counter() - start, scope["method"],
+                                    getattr(route, "path", "<unmatched>"), str(status[0]))
@@ -1,12 +1,16 @@
 # models.py
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Annotated, List, Literal, Optional, Union
 
 
+# XP values past this could level a Pokémon up one step at a time for hours
+# (see app/xp.py); level and xp_to_next below 1 would never stop levelling.
+MAX_XP = 2 ** 53
+
 class Stats(BaseModel):
-    level: int = 1         # Starting level
-    xp: int = 0            # Current experience points
-    xp_to_next: int = 100  # XP required to level up (initial threshold)
+    level: int = Field(1, ge=1)                  # Starting level
+    xp: int = Field(0, le=MAX_XP)                # Current experience points
+    xp_to_next: int = Field(100, ge=1)           # XP required to level up (initial threshold)
     attack: float
     defense: float
     hp: float
@@ -29,7 +33,7 @@ class Move(BaseModel):
 
     @property
     def category(self) -> str:
-        from utils import get_move_category
+        from .utils import get_move_category
         return get_move_category(self.move_type)
 
 # New model for a full Pokemon in battle (extends Stats)
@@ -48,13 +52,64 @@ class Pokemon(BaseModel):
     types: List[str]
     moves: List[Move]
 
+# References resolved against the pokedex database (see app/pokedex.py)
+# Unknown keys are rejected, so a malformed full body fails validation instead
+# of being read as a reference.
+class MoveRef(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    move_id: int
+
+class PokemonRef(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+    trainer_pokemon_id: int
+    current_hp: Optional[float] = None  # in-battle state the database does not track
+    status: Optional[str] = None
+
+# A Pokemon or move sent in full, or by reference; full models are tried first
+PokemonOrRef = Annotated[Union[Pokemon, PokemonRef], Field(union_mode="left_to_right")]
+MoveOrRef = Annotated[Union[Move, MoveRef], Field(union_mode="left_to_right")]
+
 # Model for a battle request (for calculate_damage endpoint)
 class BattleRequest(BaseModel):
-    attacker: Pokemon
-    defender: Pokemon
-    move: Move
+    attacker: PokemonOrRef
+    defender: PokemonOrRef
+    move: MoveOrRef
+    seed: Optional[int] = None  # Fixes the damage rolls; ignored inside a batch
+
+# Model for the batch damage endpoint: many attacks resolved in one request
+class BatchBattleRequest(BaseModel):
+    attacks: List[BattleRequest]
+    seed: Optional[int] = None
+
+# Move-selection policies for simulated battles (see app/policies.py)
+PolicyName = Literal["first", "random", "greedy", "expectimax"]
+
+# A full Pokemon with the stat and HP bounds the exact distribution accepts:
+# its damage grid grows with them (see app/distribution.py)
+class DistributionPokemon(Pokemon):
+    level: int = Field(..., ge=1, le=1000)
+    max_hp: float = Field(..., ge=0, le=10_000)
+    current_hp: float = Field(..., le=10_000)
+    attack: float = Field(..., ge=0, le=10_000)
+    defense: float = Field(..., ge=0, le=10_000)
+    special_atk: float = Field(..., ge=0, le=10_000)
+    special_def: float = Field(..., ge=0, le=10_000)
+
+DistributionPokemonOrRef = Annotated[Union[DistributionPokemon, PokemonRef], Field(union_mode="left_to_right")]
+
+# Model for the exact damage distribution of one move
+class DamageDistributionRequest(BaseModel):
+    attacker: DistributionPokemonOrRef
+    defender: DistributionPokemonOrRef
+    move: MoveOrRef
+    uses: int = Field(5, gt=0, le=20)  # KO chance is reported for 1..uses uses of the move
+    bins: Optional[int] = Field(None, gt=0, le=1000)  # histogram instead of every damage value
 
 # Model for experience update
 class XPUpdateRequest(BaseModel):
     attacker: Stats
-    xp_gained: int
+    xp_gained: int = Field(..., le=MAX_XP)
+
+# Model for awarding XP to many Pokemon (whole teams or rosters) in one request
+class BatchXPUpdateRequest(BaseModel):
+    updates: List[XPUpdateRequest]
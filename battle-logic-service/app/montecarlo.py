@@ -0,0 +1,209 @@
+import math
+
+import numpy as np
+from .engine import (
+    MAX_TURNS,
+    HIT_SLOT,
+    CRIT_SLOT,
+    HITS_SLOT,
+    FACTOR_SLOT,
+    FIRST_HIT_SLOT,
+    SLOTS_PER_HIT,
+    CRIT_CHANCE,
+    roll_width,
+    turn_order,
+)
+from . import pool
+from .rng import make_rng
+from .moves import resolve_move
+from .utils import type_id, defender_type_ids, type_effectiveness_ids
+
+# Monte Carlo battle simulator: runs many independent copies of the
+# engine.simulate_battle loop at once on NumPy state arrays (one row per
+# battle) and spreads chunks of battles across the shared process pool.
+
+TIE, USER, TRAINER = 0, 1, 2
+CHUNK_SIZE = 20_000
+HP_BINS = 10
+
+# Effect codes used by the damage kernel.
+NO_DAMAGE, SINGLE_HIT, MULTI_HIT = 0, 1, 2
+
+
+def build_move_table(attacker, defender) -> dict:
+    """Precompute per-move constants for attacker's moves against defender."""
+    level_factor = (2 * attacker.level / 5) + 2
+    type1, type2 = defender_type_ids(defender.types or ["normal"])
+    table = {"effect": [], "accuracy": [], "type": [], "single": [], "multi": [], "low": [], "high": []}
+    for move in attacker.moves:
+        move = resolve_move(move)
+        effect_type = move.effect_type
+        power = move.power or 0.0
+        if move.category == "special":
+            stat, defense = attacker.special_atk, defender.special_def
+        else:
+            stat, defense = attacker.attack, defender.defense
+        stat_ratio = stat / defense if defense else 1
+        hit_range = move.hit_range
+        if effect_type == "multi_hit":
+            effect = MULTI_HIT
+        elif effect_type in ("heal", "status") or not power:
+            effect = NO_DAMAGE
+        else:
+            effect = SINGLE_HIT
+        if not (effect == MULTI_HIT and hit_range and len(hit_range) == 2):
+            hit_range = (1, 1)
+        table["effect"].append(effect)
+        table["accuracy"].append(move.accuracy)
+        table["type"].append(type_id(move.move_type))
+        table["single"].append(((level_factor * power * stat_ratio) / 50) + 2)
+        table["multi"].append(((level_factor * power * (stat / (defense or 1))) / 50) + 2)
+        table["low"].append(hit_range[0])
+        table["high"].append(hit_range[1])
+    table = {key: np.array(values) for key, values in table.items()}
+    type_multiplier = type_effectiveness_ids(table.pop("type"), type1, type2)
+    table["single"] *= type_multiplier
+    table["multi"] *= type_multiplier
+    table["width"] = roll_width(int(table["high"].max()))
+    return table
+
+
+def damage_kernel(table, move_idx, rolls):
+    """Damage dealt by the moves in move_idx given one roll row per attack."""
+    effect = table["effect"][move_idx]
+    accuracy = table["accuracy"][move_idx]
+    hit = rolls[:, HIT_SLOT] <= accuracy
+
+    crit = np.where(rolls[:, CRIT_SLOT] < CRIT_CHANCE, 1.5, 1.0)
+    factor = 0.85 + (1.0 - 0.85) * rolls[:, FACTOR_SLOT]
+    single = np.round(table["single"][move_idx] * crit * factor, 2)
+
+    multi = np.zeros(len(move_idx))
+    if (effect == MULTI_HIT).any():
+        low, high = table["low"][move_idx], table["high"][move_idx]
+        num_hits = low + (rolls[:, HITS_SLOT] * (high - low + 1)).astype(np.int64)
+        base = table["multi"][move_idx]
+        for j in range((rolls.shape[1] - FIRST_HIT_SLOT) // SLOTS_PER_HIT):
+            slot = FIRST_HIT_SLOT + SLOTS_PER_HIT * j
+            lands = (j < num_hits) & (rolls[:, slot] <= accuracy)
+            hit_crit = np.where(rolls[:, slot + 1] < CRIT_CHANCE, 1.5, 1.0)
+            hit_factor = 0.85 + (1.0 - 0.85) * rolls[:, slot + 2]
+            multi += np.where(lands, np.round(base * hit_crit * hit_factor, 2), 0.0)
+
+    damage = np.where(effect == MULTI_HIT, multi, np.where(effect == SINGLE_HIT, single, 0.0))
+    return np.where(hit, damage, 0.0)
+
+
+def simulate_chunk(user_table, trainer_table, user_hp, trainer_hp, user_first, n, seed_seq):
+    """
+    Run n battles on state arrays; mirrors engine.simulate_battle.
+
+    user_hp, trainer_hp: starting HP, a scalar or one value per battle.
+    Returns (winner, turns, user_hp, trainer_hp) arrays of length n.
+    """
+    rng = make_rng(seed_seq)
+    hp = {
+        USER: np.broadcast_to(np.asarray(user_hp, dtype=np.float64), (n,)).copy(),
+        TRAINER: np.broadcast_to(np.asarray(trainer_hp, dtype=np.float64), (n,)).copy(),
+    }
+    tables = {USER: user_table, TRAINER: trainer_table}
+    order = (USER, TRAINER) if user_first else (TRAINER, USER)
+    winner = np.full(n, TIE, dtype=np.int8)
+    turns = np.zeros(n, dtype=np.int16)
+    active = np.flatnonzero((hp[USER] > 0) & (hp[TRAINER] > 0))
+
+    for _ in range(MAX_TURNS):
+        if active.size == 0:
+            break
+        turns[active] += 1
+        for side in order:
+            if active.size == 0:
+                break
+            other = TRAINER if side == USER else USER
+            table = tables[side]
+            if side == USER:
+                move_idx = np.zeros(active.size, dtype=np.int64)
+            else:
+                move_idx = rng.integers(len(table["effect"]), size=active.size)
+            rolls = rng.random((active.size, table["width"]))
+            hp[other][active] -= damage_kernel(table, move_idx, rolls)
+            fainted = hp[other][active] <= 0
+            winner[active[fainted]] = side
+            active = active[~fainted]
+
+    # Battles still running after MAX_TURNS hit the turn limit: ties.
+    turns[active] += 1
+    return winner, turns, hp[USER], hp[TRAINER]
+
+
+def wilson_interval(successes: int, n: int, z: float = 1.96):
+    """95% Wilson score interval for a binomial proportion."""
+    if n == 0:
+        return 0.0, 0.0
+    p = successes / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def _distribution(values, bins):
+    if values.size == 0:
+        return {"mean": None, "p5": None, "p50": None, "p95": None, "histogram": []}
+    counts, edges = np.histogram(values, bins=bins)
+    p5, p50, p95 = np.percentile(values, [5, 50, 95]).tolist()
+    return {
+        "mean": float(values.mean()),
+        "p5": p5,
+        "p50": p50,
+        "p95": p95,
+        "histogram": [
+            {"low": float(edges[i]), "high": float(edges[i + 1]), "count": int(counts[i])}
+            for i in range(len(counts))
+        ],
+    }
+
+
+def _hp_bins(pokemon):
+    return np.linspace(0, max(pokemon.max_hp, pokemon.current_hp), HP_BINS + 1)
+
+
+def run_monte_carlo(user_pokemon, trainer_pokemon, n: int, seed=None, processes=None) -> dict:
+    """Simulate n independent battles and summarize the outcomes."""
+    user_table = build_move_table(user_pokemon, trainer_pokemon)
+    trainer_table = build_move_table(trainer_pokemon, user_pokemon)
+    user_first = turn_order(user_pokemon.speed, trainer_pokemon.speed) == "pokemon1"
+
+    sizes = [CHUNK_SIZE] * (n // CHUNK_SIZE) + ([n % CHUNK_SIZE] if n % CHUNK_SIZE else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [
+        (user_table, trainer_table, user_pokemon.current_hp, trainer_pokemon.current_hp, user_first, size, s)
+        for size, s in zip(sizes, seeds)
+    ]
+    processes = min(pool.processes(processes), len(sizes))
+    if processes <= 1:
+        chunks = [simulate_chunk(*a) for a in args]
+    else:
+        chunks = list(pool.imap(simulate_chunk, args, processes))
+
+    winner = np.concatenate([c[0] for c in chunks])
+    turns = np.concatenate([c[1] for c in chunks])
+    user_hp = np.concatenate([c[2] for c in chunks])
+    trainer_hp = np.concatenate([c[3] for c in chunks])
+
+    wins = int((winner == USER).sum())
+    low, high = wilson_interval(wins, n)
+    return {
+        "battles": n,
+        "seed": seed,
+        "processes": processes,
+        "win_rate": wins / n,
+        "loss_rate": float((winner == TRAINER).mean()),
+        "tie_rate": float((winner == TIE).mean()),
+        "confidence_interval": {"level": 0.95, "low": low, "high": high},
+        "turns": _distribution(turns, np.arange(turns.min(), turns.max() + 2) - 0.5),
+        "remaining_hp": {
+            "user": _distribution(user_hp[winner == USER], _hp_bins(user_pokemon)),
+            "trainer": _distribution(trainer_hp[winner == TRAINER], _hp_bins(trainer_pokemon)),
+        },
+    }
@@ -0,0 +1,68 @@
+from functools import lru_cache
+from types import MappingProxyType
+
+from . import datastore, metrics
+from .utils import augment_move_data, get_move_category, type_id
+
+# Resolved moves: a Move's own fields merged with its move_effects.json entry,
+# computed once and cached. The damage path reads plain attributes instead of
+# dumping the Pydantic model and augmenting a fresh dict on every request.
+
+MOVE_FIELDS = ("move_id", "name", "power", "accuracy", "move_type", "pp", "status_effect", "effect_chance")
+CACHE_SIZE = 4096
+
+
+class ResolvedMove:
+    """Immutable view of a move with its extra effects applied."""
+
+    __slots__ = ("move_id", "name", "power", "accuracy", "move_type", "pp", "status_effect",
+                 "effect_chance", "category", "effect_type", "hit_range", "type_id", "data")
+
+    def __init__(self, data: dict):
+        for field in MOVE_FIELDS:
+            object.__setattr__(self, field, data.get(field))
+        object.__setattr__(self, "category", get_move_category(data["move_type"]))
+        object.__setattr__(self, "effect_type", data.get("effect_type", "damage"))
+        hit_range = data.get("hit_range")
+        object.__setattr__(self, "hit_range", tuple(hit_range) if hit_range else None)
+        object.__setattr__(self, "type_id", type_id(data["move_type"]))
+        # Full augmented mapping (read-only), for the less common effect keys.
+        object.__setattr__(self, "data", MappingProxyType(data))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ResolvedMove is immutable")
+
+    def __reduce__(self):
+        # MappingProxyType does not pickle; rebuild from the plain mapping.
+        return ResolvedMove, (dict(self.data),)
+
+    def __repr__(self):
+        return f"ResolvedMove({dict(self.data)!r})"
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _resolve(fields: tuple, effects_snapshot) -> ResolvedMove:
+    # effects_snapshot is part of the key so a reloaded move_effects.json
+    # never serves moves resolved against the old file.
+    return ResolvedMove(augment_move_data(dict(zip(MOVE_FIELDS, fields))))
+
+
+def resolve_move(move) -> ResolvedMove:
+    """ResolvedMove for a Move model (or anything with the Move fields)."""
+    if isinstance(move, ResolvedMove):
+        return move
+    fields = (move.move_id, move.name, move.power, move.accuracy, move.move_type, move.pp,
+              move.status_effect, move.effect_chance)
+    return _resolve(fields, datastore.store.move_effects_snapshot())
+
+
+def cache_info():
+    return _resolve.cache_info()
+
+
+def _cache_stats():
+    info = _resolve.cache_info()
+    return info.hits, info.misses, info.currsize
+
+
+metrics.registry.register_cache("resolved_moves", _cache_stats)
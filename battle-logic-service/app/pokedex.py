@@ -0,0 +1,327 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, select
+from sqlalchemy.pool import StaticPool
+
+from . import metrics
+from .log import get_logger
+from .models import Move, Pokemon
+
+# ID-based battle requests. Instead of full stat blocks, clients may send
+# {"trainer_pokemon_id": ...} for a Pokemon and {"move_id": ...} for a move;
+# they are resolved against the pokedex schema (pokedex_data.sql) through a
+# pooled SQLAlchemy engine.
+#
+# Lookups go through read-through LRU caches, and every id a request (or a
+# whole batch) references is fetched with one IN (...) query per table, so a
+# battle costs at most a handful of queries the first time and none after.
+# Moves are static pokedex data and never expire; trainer Pokemon rows are
+# updated by the backend (level-ups) and expire after POKEMON_TTL_SECONDS.
+# load_snapshot() fills the caches with both tables at startup.
+#
+#   BATTLE_DATABASE_URL      SQLAlchemy URL, e.g. mysql+pymysql://user:pw@host/pokedex
+#   DB_HOST, DB_PORT, DB_USER, DB_PASSWORD, DB_NAME
+#                            used instead when BATTLE_DATABASE_URL is unset and DB_HOST is set
+#                            (the variables the backend reads)
+#   BATTLE_POKEDEX_SNAPSHOT  1 to load the snapshot on first use
+
+MOVE_CACHE_SIZE = 4096
+POKEMON_CACHE_SIZE = 16384
+POKEMON_TTL_SECONDS = 30.0
+POOL_SIZE = 5
+MAX_OVERFLOW = 10
+POOL_RECYCLE_SECONDS = 3600
+
+log = get_logger("pokedex")
+
+metadata = MetaData()
+
+type_table = Table(
+    "Type", metadata,
+    Column("type_id", Integer, primary_key=True),
+    Column("name", String(50), nullable=False),
+)
+move_table = Table(
+    "Move", metadata,
+    Column("move_id", Integer, primary_key=True),
+    Column("name", String(50), nullable=False),
+    Column("type_id", Integer),
+    Column("power", Integer),
+    Column("accuracy", Integer),  # percent; NULL for moves that never miss
+    Column("pp", Integer),
+)
+species_table = Table(
+    "Pokemon", metadata,
+    Column("pokemon_id", Integer, primary_key=True),
+    Column("name", String(50), nullable=False),
+)
+species_type_table = Table(
+    "Pokemon_Type", metadata,
+    Column("pokemon_id", Integer, primary_key=True),
+    Column("type_id", Integer, primary_key=True),
+)
+trainer_pokemon_table = Table(
+    "trainer_pokemon", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("trainer_id", Integer),
+    Column("pokemon_id", Integer),
+    Column("nickname", String(50)),
+    Column("level", Integer),
+    Column("current_hp", Integer),
+    Column("max_hp", Integer),
+    Column("attack", Integer),
+    Column("defense", Integer),
+    Column("speed", Integer),
+    Column("special_atk", Integer),
+    Column("special_def", Integer),
+    Column("status", String(20)),
+    Column("position", Integer),
+)
+trainer_pokemon_moves_table = Table(
+    "trainer_pokemon_moves", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("trainer_pokemon_id", Integer),
+    Column("move_id", Integer),
+    Column("current_pp", Integer),
+)
+
+QUERIES = metrics.registry.counter(
+    "battle_pokedex_queries_total", "Queries sent to the pokedex database by table.", labelnames=("table",))
+
+
+class UnknownReference(KeyError):
+    """A referenced id has no row in the pokedex."""
+
+
+class LRUCache:
+    """Thread-safe LRU mapping with an optional per-entry time to live."""
+
+    def __init__(self, max_size=None, ttl_seconds=None, clock=time.monotonic):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_many(self, keys) -> dict:
+        """Cached values for keys; missing and expired keys are left out."""
+        found = {}
+        now = self.clock()
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and (entry[1] is None or entry[1] > now):
+                    self._entries.move_to_end(key)
+                    found[key] = entry[0]
+                    self.hits += 1
+                else:
+                    self.misses += 1
+        return found
+
+    def put_many(self, values: dict) -> None:
+        expires_at = self.clock() + self.ttl_seconds if self.ttl_seconds is not None else None
+        with self._lock:
+            for key, value in values.items():
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            if self.max_size is not None:
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+
+    def stats(self):
+        return self.hits, self.misses, len(self._entries)
+
+
+def database_url():
+    """The configured database URL, or None."""
+    url = os.environ.get("BATTLE_DATABASE_URL")
+    if url or not os.environ.get("DB_HOST"):
+        return url
+    return "mysql+pymysql://{user}:{password}@{host}:{port}/{name}".format(
+        user=os.environ.get("DB_USER", "myuser"), password=os.environ.get("DB_PASSWORD", "mypassword"),
+        host=os.environ["DB_HOST"], port=os.environ.get("DB_PORT", "3306"), name=os.environ.get("DB_NAME", "pokedex"),
+    )
+
+
+def connect(url: str):
+    """Pooled engine for url; in-memory SQLite shares one connection across threads."""
+    if url.startswith("sqlite"):
+        kwargs = {"connect_args": {"check_same_thread": False}}
+        if ":memory:" in url or url == "sqlite://":
+            kwargs["poolclass"] = StaticPool
+        return create_engine(url, **kwargs)
+    return create_engine(url, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_pre_ping=True,
+                         pool_recycle=POOL_RECYCLE_SECONDS)
+
+
+def _move_from_row(row) -> Move:
+    return Move(
+        move_id=row.move_id,
+        name=row.name,
+        power=row.power or 0,
+        accuracy=row.accuracy / 100 if row.accuracy is not None else 1.0,
+        move_type=row.move_type or "Normal",
+        pp=row.pp,
+    )
+
+
+class Pokedex:
+    def __init__(self, engine, clock=time.monotonic):
+        self.engine = engine
+        self.clock = clock
+        self._moves = LRUCache(MOVE_CACHE_SIZE, clock=clock)
+        self._pokemon = LRUCache(POKEMON_CACHE_SIZE, POKEMON_TTL_SECONDS, clock=clock)
+
+    def moves(self, ids) -> dict:
+        """move_id -> Move for every id; UnknownReference if any is missing."""
+        ids = set(ids)
+        found = self._moves.get_many(ids)
+        missing = ids - found.keys()
+        if missing:
+            with self.engine.connect() as conn:
+                fetched = self._fetch_moves(conn, missing)
+            self._moves.put_many(fetched)
+            found.update(fetched)
+        self._check(ids, found, "move_id")
+        return found
+
+    def pokemon(self, ids) -> dict:
+        """trainer_pokemon id -> Pokemon for every id; UnknownReference if any is missing."""
+        ids = set(ids)
+        found = self._pokemon.get_many(ids)
+        missing = ids - found.keys()
+        if missing:
+            with self.engine.connect() as conn:
+                fetched = self._fetch_pokemon(conn, missing)
+            self._pokemon.put_many(fetched)
+            found.update(fetched)
+        self._check(ids, found, "trainer_pokemon_id")
+        return found
+
+    def load_snapshot(self) -> None:
+        """Load every move and trainer Pokemon into caches that neither evict nor expire."""
+        with self.engine.connect() as conn:
+            moves = self._fetch_moves(conn)
+            pokemon = self._fetch_pokemon(conn, moves=moves)
+        self._moves = LRUCache(clock=self.clock)
+        self._moves.put_many(moves)
+        self._pokemon = LRUCache(clock=self.clock)
+        self._pokemon.put_many(pokemon)
+        log.info("pokedex snapshot loaded", extra={"fields": {"moves": len(moves), "pokemon": len(pokemon)}})
+
+    def cache_stats(self) -> dict:
+        return {"pokedex_moves": self._moves.stats(), "pokedex_pokemon": self._pokemon.stats()}
+
+    @staticmethod
+    def _check(ids, found, field):
+        missing = ids - found.keys()
+        if missing:
+            raise UnknownReference(f"Unknown {field}: {', '.join(map(str, sorted(missing)))}")
+
+    def _fetch_moves(self, conn, ids=None) -> dict:
+        query = (
+            select(move_table.c.move_id, move_table.c.name, move_table.c.power, move_table.c.accuracy,
+                   move_table.c.pp, type_table.c.name.label("move_type"))
+            .select_from(move_table.outerjoin(type_table, move_table.c.type_id == type_table.c.type_id))
+        )
+        if ids is not None:
+            query = query.where(move_table.c.move_id.in_(sorted(ids)))
+        QUERIES.inc("Move")
+        return {row.move_id: _move_from_row(row) for row in conn.execute(query)}
+
+    def _fetch_pokemon(self, conn, ids=None, moves=None) -> dict:
+        tp, tpm = trainer_pokemon_table, trainer_pokemon_moves_table
+        query = (
+            select(tp, species_table.c.name.label("species"))
+            .select_from(tp.outerjoin(species_table, tp.c.pokemon_id == species_table.c.pokemon_id))
+        )
+        move_query = select(tpm.c.trainer_pokemon_id, tpm.c.move_id).order_by(tpm.c.id)
+        if ids is not None:
+            query = query.where(tp.c.id.in_(sorted(ids)))
+            move_query = move_query.where(tpm.c.trainer_pokemon_id.in_(sorted(ids)))
+        QUERIES.inc("trainer_pokemon")
+        rows = conn.execute(query).all()
+        if not rows:
+            return {}
+
+        QUERIES.inc("trainer_pokemon_moves")
+        move_ids = {}
+        for row in conn.execute(move_query):
+            move_ids.setdefault(row.trainer_pokemon_id, []).append(row.move_id)
+        if moves is None:
+            # Moves not cached yet are fetched in the same transaction.
+            wanted = {move_id for known in move_ids.values() for move_id in known}
+            moves = self._moves.get_many(wanted)
+            if wanted - moves.keys():
+                fetched = self._fetch_moves(conn, wanted - moves.keys())
+                self._moves.put_many(fetched)
+                moves.update(fetched)
+
+        QUERIES.inc("Pokemon_Type")
+        species_ids = sorted({row.pokemon_id for row in rows if row.pokemon_id is not None})
+        types = {}
+        type_query = (
+            select(species_type_table.c.pokemon_id, type_table.c.name)
+            .select_from(species_type_table.join(type_table, species_type_table.c.type_id == type_table.c.type_id))
+            .where(species_type_table.c.pokemon_id.in_(species_ids))
+            .order_by(species_type_table.c.pokemon_id, species_type_table.c.type_id)
+        )
+        for row in conn.execute(type_query):
+            types.setdefault(row.pokemon_id, []).append(row.name)
+
+        return {
+            row.id: Pokemon(
+                pokemon_id=row.pokemon_id or 0,
+                nickname=row.nickname or (row.species or "").capitalize(),
+                level=row.level or 1,
+                max_hp=row.max_hp or 0,
+                current_hp=row.current_hp if row.current_hp is not None else row.max_hp or 0,
+                attack=row.attack or 0,
+                defense=row.defense or 0,
+                speed=row.speed or 0,
+                special_atk=row.special_atk or 0,
+                special_def=row.special_def or 0,
+                status=row.status or "Healthy",
+                types=types.get(row.pokemon_id) or ["Normal"],
+                moves=[moves[m] for m in move_ids.get(row.id, ()) if m in moves],
+            )
+            for row in rows
+        }
+
+
+db = None
+_db_lock = threading.Lock()
+
+
+def get() -> Pokedex:
+    """The service's Pokedex, created from the environment on first use."""
+    global db
+    if db is None:
+        with _db_lock:
+            if db is None:
+                url = database_url()
+                if not url:
+                    raise HTTPException(status_code=503, detail="No pokedex database is configured.")
+                pokedex = Pokedex(connect(url))
+                if os.environ.get("BATTLE_POKEDEX_SNAPSHOT") == "1":
+                    pokedex.load_snapshot()
+                db = pokedex
+    return db
+
+
+def _cache_stats(name):
+    # Reads the module attribute so a swapped-in Pokedex is reported.
+    return lambda: db.cache_stats()[name] if db is not None else (0, 0, 0)
+
+
+metrics.registry.register_cache("pokedex_moves", _cache_stats("pokedex_moves"))
+metrics.registry.register_cache("pokedex_pokemon", _cache_stats("pokedex_pokemon"))
@@ -0,0 +1,208 @@
+from .engine import CRIT_CHANCE, _attack_and_defense, type_multiplier_of
+
+# Move-selection policies for simulated battles and battle sessions.
+#
+# A policy is created per battle and asked for a move index every time its
+# Pokémon attacks. The smarter policies score moves with a per-battle
+# ExpectedDamageCache built from the type chart and the stat ratio, so a
+# battle recomputes a move's value only when HP, status or stats change.
+
+MEAN_RANDOM_FACTOR = (0.85 + 1.0) / 2
+CRIT_MULTIPLIER = 1.5
+DEFAULT_DEPTH = 2
+DISCOUNT = 0.95  # per exchange, so an earlier KO scores higher than a later one
+
+
+def move_outcomes(attacker, defender, move) -> tuple:
+    """
+    (probability, mean damage) pairs for one use of a resolved move: a miss,
+    a normal hit and a critical hit, with the variance factor at its mean.
+    """
+    accuracy = min(move.accuracy, 1.0)
+    power = move.power or 0
+    if move.effect_type in ("heal", "status") or not power:
+        return ((1.0, 0.0),)
+    stat, defense = _attack_and_defense(attacker, defender, move.category)
+    level_factor = (2 * attacker.level / 5) + 2
+    type_multiplier = type_multiplier_of(move, defender)
+    if move.effect_type == "multi_hit":
+        base = ((level_factor * power * (stat / (defense or 1))) / 50) + 2
+        per_hit = accuracy * base * type_multiplier * MEAN_RANDOM_FACTOR * (1 + CRIT_CHANCE * (CRIT_MULTIPLIER - 1))
+        low, high = move.hit_range if move.hit_range and len(move.hit_range) == 2 else (1, 1)
+        return ((1.0 - accuracy, 0.0), (accuracy, per_hit * (low + high) / 2))
+    stat_ratio = stat / defense if defense else 1
+    hit = (((level_factor * power * stat_ratio) / 50) + 2) * type_multiplier * MEAN_RANDOM_FACTOR
+    return (
+        (1.0 - accuracy, 0.0),
+        (accuracy * (1 - CRIT_CHANCE), hit),
+        (accuracy * CRIT_CHANCE, hit * CRIT_MULTIPLIER),
+    )
+
+
+def _signature(pokemon) -> tuple:
+    return (pokemon.level, pokemon.attack, pokemon.defense, pokemon.special_atk, pokemon.special_def,
+            pokemon.status, tuple(pokemon.types or ()))
+
+
+class ExpectedDamageCache:
+    """
+    Per-battle cache of move outcomes and HP-capped expected damage.
+
+    Outcomes are keyed by the move and the stats, status and types of both
+    Pokémon; the capped expectation also by the defender's HP. An entry is
+    recomputed only when one of those changes.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._outcomes = {}
+        self._expected = {}
+
+    def outcomes(self, attacker, defender, index: int) -> tuple:
+        move = attacker.moves[index]
+        key = (move, _signature(attacker), _signature(defender))
+        outcomes = self._outcomes.get(key)
+        if outcomes is None:
+            outcomes = self._outcomes[key] = move_outcomes(attacker, defender, move)
+        return outcomes
+
+    def expected(self, attacker, defender, index: int) -> float:
+        """Expected damage of attacker.moves[index], capped at the defender's HP."""
+        move = attacker.moves[index]
+        key = (move, _signature(attacker), _signature(defender), defender.current_hp)
+        value = self._expected.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        hp = max(defender.current_hp, 0.0)
+        value = self._expected[key] = sum(p * min(damage, hp) for p, damage in self.outcomes(attacker, defender, index))
+        return value
+
+
+class Policy:
+    """Chooses the move index an attacker uses against a defender."""
+
+    def choose(self, attacker, defender) -> int:
+        raise NotImplementedError
+
+
+class FirstMovePolicy(Policy):
+    """Always the first move (the simulator's original user behaviour)."""
+
+    def choose(self, attacker, defender) -> int:
+        return 0
+
+
+class RandomPolicy(Policy):
+    """Uniformly random move drawn from the battle's policy stream."""
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def choose(self, attacker, defender) -> int:
+        return int(self.rng.integers(len(attacker.moves)))
+
+
+class GreedyPolicy(Policy):
+    """Highest expected damage this turn; ties go to the lower index."""
+
+    def __init__(self, cache=None):
+        self.cache = cache or ExpectedDamageCache()
+
+    def choose(self, attacker, defender) -> int:
+        expected = self.cache.expected
+        best, best_value = 0, -1.0
+        for index in range(len(attacker.moves)):
+            value = expected(attacker, defender, index)
+            if value > best_value:
+                best, best_value = index, value
+        return best
+
+
+class ExpectimaxPolicy(Policy):
+    """
+    Depth-limited expectimax over the next `depth` attacks of each side.
+
+    The attacker maximizes; the defender is modelled as picking uniformly at
+    random, and every attack branches on its miss / hit / crit outcomes.
+    Leaves score the HP fraction difference; a KO scores +-1, discounted by
+    DISCOUNT per exchange. Node values are memoized on both HPs, which repeat
+    across branches and turns.
+    """
+
+    def __init__(self, depth: int = DEFAULT_DEPTH, cache=None):
+        self.depth = depth
+        self.cache = cache or ExpectedDamageCache()
+        self._values = {}
+        self._signature = None
+
+    def choose(self, attacker, defender) -> int:
+        signature = (_signature(attacker), _signature(defender))
+        if signature != self._signature:
+            # Outcomes changed: memoized node values no longer apply.
+            self._values.clear()
+            self._signature = signature
+        moves = [self.cache.outcomes(attacker, defender, i) for i in range(len(attacker.moves))]
+        # Moves with identical outcomes are one branch for the maximizer; the
+        # defender's uniformly random reply folds into a single chance node.
+        mine = list(dict.fromkeys(moves))
+        theirs = {}
+        for i in range(len(defender.moves)):
+            for p, damage in self.cache.outcomes(defender, attacker, i):
+                theirs[damage] = theirs.get(damage, 0.0) + p / len(defender.moves)
+        # A defender without moves cannot hit back: its reply is a sure 0 damage.
+        theirs = tuple(theirs.items()) or ((0.0, 1.0),)
+        scores = {
+            outcomes: self._after_attack(outcomes, attacker.current_hp, defender.current_hp, self.depth, mine,
+                                         theirs, attacker.max_hp, defender.max_hp)
+            for outcomes in mine
+        }
+        return max(range(len(moves)), key=lambda i: (scores[moves[i]], -i))
+
+    def _after_attack(self, outcomes, my_hp, their_hp, depth, mine, theirs, my_max, their_max):
+        value = 0.0
+        for p, damage in outcomes:
+            if p:
+                hp = their_hp - damage
+                value += p * (1.0 if hp <= 0 else self._reply(my_hp, hp, depth, mine, theirs, my_max, their_max))
+        return value
+
+    def _reply(self, my_hp, their_hp, depth, mine, theirs, my_max, their_max):
+        key = (my_hp, their_hp, depth)
+        cached = self._values.get(key)
+        if cached is not None:
+            return cached
+        value = 0.0
+        for damage, p in theirs:
+            if not p:
+                continue
+            hp = my_hp - damage
+            if hp <= 0:
+                value -= p
+            elif depth <= 1:
+                value += p * (hp / (my_max or 1) - their_hp / (their_max or 1))
+            else:
+                value += p * DISCOUNT * max(
+                    self._after_attack(o, hp, their_hp, depth - 1, mine, theirs, my_max, their_max)
+                    for o in mine
+                )
+        self._values[key] = value
+        return value
+
+
+POLICIES = ("first", "random", "greedy", "expectimax")
+
+
+def make_policy(name: str, rng=None, cache=None) -> Policy:
+    """Policy instance for one battle; rng is the battle's policy stream."""
+    if name == "first":
+        return FirstMovePolicy()
+    if name == "random":
+        return RandomPolicy(rng)
+    if name == "greedy":
+        return GreedyPolicy(cache)
+    if name == "expectimax":
+        return ExpectimaxPolicy(cache=cache)
+    raise ValueError(f"Unknown move policy {name!r}")
@@ -0,0 +1,74 @@
+import multiprocessing
+import os
+import signal
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+# The worker's process pool for request-time parallel simulation (Monte
+# Carlo runs, tournaments). One pool of MAX_PROCESSES processes is started on
+# first use and shared by every request, so concurrent requests queue for the
+# same CPUs instead of each forking its own pool; the app lifespan shuts it
+# down. Background jobs keep their own lower-priority pool (see jobs.py).
+#
+# Workers come from a forkserver, never a fork of the server itself: the
+# executor starts workers on demand while the threadpool, the battle log
+# writer and the job dispatcher run, and a fork taken while one of them holds
+# a lock (metrics, logging) leaves the child blocked on it forever.
+#
+#   BATTLE_POOL_PROCESSES  pool processes (default: CPU count; app.serve sets
+#                          its share of the CPUs per uvicorn worker)
+
+MAX_PROCESSES = int(os.environ.get("BATTLE_POOL_PROCESSES", 0)) or os.cpu_count() or 1
+
+_pool = None
+_lock = threading.Lock()
+
+
+def processes(requested=None) -> int:
+    """Processes a request may use: what it asked for, at most MAX_PROCESSES."""
+    return min(requested or MAX_PROCESSES, MAX_PROCESSES)
+
+
+def _init_worker():
+    # Workers must not keep handlers that would swallow SIGTERM; Ctrl-C is
+    # left to the parent, which shuts the pool down.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def get() -> ProcessPoolExecutor:
+    """The shared pool, started on first use."""
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                _pool = ProcessPoolExecutor(max_workers=MAX_PROCESSES, initializer=_init_worker,
+                                            mp_context=multiprocessing.get_context("forkserver"))
+    return _pool
+
+
+def imap(fn, args, in_flight):
+    """fn(*a) for each a in args on the shared pool, at most in_flight at once; results in order."""
+    pool = get()
+    pending = deque()
+    try:
+        for a in args:
+            pending.append(pool.submit(fn, *a))
+            if len(pending) >= in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        # Stops queued calls if the consumer goes away mid-stream.
+        for future in pending:
+            future.cancel()
+
+
+def shutdown() -> None:
+    """Stop the shared pool, if one was started."""
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True, cancel_futures=True)
+            _pool = None
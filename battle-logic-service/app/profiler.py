@@ -0,0 +1,128 @@
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from starlette.concurrency import run_in_threadpool
+
+from . import metrics
+from .log import get_logger
+
+# Opt-in sampling profiler for single requests.
+#
+# Disabled unless BATTLE_PROFILE_DIR is set. When it is, a request carrying
+# the header "X-Battle-Profile: 1" is profiled: a background thread samples
+# the Python stacks of every other thread every BATTLE_PROFILE_INTERVAL
+# seconds while the request runs, and the samples are written to
+# BATTLE_PROFILE_DIR as collapsed stacks ("frame;frame;frame count" per line),
+# the input format of flamegraph.pl, speedscope and inferno. The response
+# names the file (its base name within BATTLE_PROFILE_DIR, never the server
+# path) in an X-Battle-Profile-File header.
+#
+# Every thread is sampled (handlers may run on the event loop or in the
+# threadpool), so concurrent requests show up in the same profile; profile
+# on a quiet instance.
+#
+#   BATTLE_PROFILE_DIR       output directory; profiling is off when unset
+#   BATTLE_PROFILE_INTERVAL  seconds between samples (default 0.001)
+
+HEADER = "x-battle-profile"
+FILE_HEADER = b"x-battle-profile-file"
+
+log = get_logger("profiler")
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.001):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="battle-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.samples
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+
+def write_collapsed(samples: Counter, directory: str, label: str) -> str:
+    """Write samples as collapsed stacks to a new file in directory; returns its path."""
+    os.makedirs(directory, exist_ok=True)
+    safe_label = "".join(c if c.isalnum() else "_" for c in label).strip("_") or "root"
+    path = os.path.join(directory, f"{time.strftime('%Y%m%dT%H%M%S')}-{safe_label}-{uuid.uuid4().hex[:8]}.folded")
+    with open(path, "w") as f:
+        for stack, count in samples.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+class ProfilerMiddleware:
+    """ASGI middleware profiling requests that ask for it (see module comment)."""
+
+    def __init__(self, app, directory=None, interval=None):
+        self.app = app
+        self.directory = directory if directory is not None else os.environ.get("BATTLE_PROFILE_DIR")
+        self.interval = interval or float(os.environ.get("BATTLE_PROFILE_INTERVAL", "0.001"))
+
+    async def __call__(self, scope, receive, send):
+        if not self.directory or scope["type"] != "http" or not self._requested(scope):
+            return await self.app(scope, receive, send)
+
+        profiler = SamplingProfiler(self.interval).start()
+        label = f"{scope['method']} {scope['path']}"
+        finished = False
+
+        def finish() -> str:
+            # Joins the sampler and writes the file: run off the event loop.
+            path = write_collapsed(profiler.stop(), self.directory, label)
+            metrics.PROFILES.inc()
+            return path
+
+        async def send_wrapper(message):
+            nonlocal finished
+            if message["type"] == "http.response.start" and not finished:
+                # Headers go out before the body: stop sampling here so the
+                # file name can be returned with the response.
+                finished = True
+                path = await run_in_threadpool(finish)
+                log.info("request profiled", extra={"fields": {"path": path, "route": label}})
+                message["headers"] = list(message.get("headers", [])) + [
+                    (FILE_HEADER, os.path.basename(path).encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not finished:
+                finished = True
+                await run_in_threadpool(finish)
+
+    @staticmethod
+    def _requested(scope) -> bool:
+        for name, value in scope.get("headers", ()):
+            if name == HEADER.encode():
+                return value.strip() in (b"1", b"true", b"yes")
+        return False
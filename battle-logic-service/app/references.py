@@ -0,0 +1,50 @@
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from .models import MoveRef, PokemonRef
+
+# Request-side handling of pokedex references ({"trainer_pokemon_id": ...} and
+# {"move_id": ...}, see app/pokedex.py). Requests that send full models never
+# import the database layer.
+
+
+def has_references(requests, fields) -> bool:
+    return any(isinstance(getattr(r, f), (PokemonRef, MoveRef)) for r in requests for f in fields)
+
+
+def resolve(requests, fields) -> list:
+    """
+    Copies of the request models with every PokemonRef / MoveRef in fields
+    replaced by the full model; all ids are fetched in one prefetch.
+    """
+    refs = [getattr(r, f) for r in requests for f in fields]
+    pokemon_ids = {ref.trainer_pokemon_id for ref in refs if isinstance(ref, PokemonRef)}
+    move_ids = {ref.move_id for ref in refs if isinstance(ref, MoveRef)}
+    if not pokemon_ids and not move_ids:
+        return list(requests)
+    # Imported here: SQLAlchemy loads only once a request uses a reference.
+    from . import pokedex
+    db = pokedex.get()
+    try:
+        pokemon = db.pokemon(pokemon_ids) if pokemon_ids else {}
+        moves = db.moves(move_ids) if move_ids else {}
+    except pokedex.UnknownReference as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+
+    def full(ref):
+        if isinstance(ref, MoveRef):
+            return moves[ref.move_id]
+        if isinstance(ref, PokemonRef):
+            # A fresh copy per request: battles write current_hp back to it.
+            overrides = {k: v for k, v in (("current_hp", ref.current_hp), ("status", ref.status)) if v is not None}
+            return pokemon[ref.trainer_pokemon_id].model_copy(update=overrides)
+        return ref
+
+    return [r.model_copy(update={f: full(getattr(r, f)) for f in fields}) for r in requests]
+
+
+async def resolve_references(requests, fields) -> list:
+    """resolve() off the event loop; requests without references skip it."""
+    if not has_references(requests, fields):
+        return list(requests)
+    return await run_in_threadpool(resolve, requests, fields)
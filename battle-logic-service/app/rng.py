@@ -0,0 +1,36 @@
+import secrets
+
+import numpy as np
+
+# Per-request random streams. Every damage roll and simulated battle draws from
+# its own Philox generator, a counter-based bit generator whose spawned streams
+# are statistically independent, so parallel workers never share hidden state
+# and any seeded request can be replayed exactly.
+
+SEED_BITS = 53  # fits in a JavaScript number, so clients can echo seeds back
+
+
+def new_seed() -> int:
+    """Fresh random seed for requests that did not supply one."""
+    return secrets.randbits(SEED_BITS)
+
+
+def make_rng(seed=None) -> np.random.Generator:
+    """Generator for a single request; unseeded requests get fresh OS entropy."""
+    return np.random.Generator(np.random.Philox(seed))
+
+
+def spawn_rngs(seed, n: int) -> list:
+    """n independent generators derived from one seed (e.g. one per worker)."""
+    return [np.random.Generator(np.random.Philox(s)) for s in np.random.SeedSequence(seed).spawn(n)]
+
+
+def battle_streams(seed):
+    """
+    (policy_rng, damage_rng) for one battle.
+
+    Move selection and damage rolls use separate streams so a battle can be
+    replayed from its seed and recorded action list alone.
+    """
+    policy_rng, damage_rng = spawn_rngs(seed, 2)
+    return policy_rng, damage_rng
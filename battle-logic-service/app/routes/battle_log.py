@@ -0,0 +1,20 @@
+import json
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from typing import Literal, Optional
+from .. import battlelog
+
+router = APIRouter()
+
+EventType = Literal["battle_started", "turn", "battle_finished"]
+
+# Streams stored battle events as NDJSON, oldest first. Segments are read one
+# batch at a time in the threadpool, so an export of any size runs in flat
+# memory. Events still queued for the writer are not included yet.
+@router.get("/battle_log/export")
+async def export_battle_log(type: Optional[EventType] = None, battle_id: Optional[str] = None,
+                            since: Optional[float] = None, until: Optional[float] = None):
+    if not battlelog.enabled():
+        raise HTTPException(status_code=503, detail="Battle logging is disabled (set BATTLE_LOG_DIR).")
+    events = battlelog.scan(type, battle_id, since, until)
+    return StreamingResponse((json.dumps(event) + "\n" for event in events), media_type="application/x-ndjson")
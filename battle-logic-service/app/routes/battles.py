@@ -0,0 +1,60 @@
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+from typing import Optional
+from .. import battlelog
+from ..models import Pokemon, PolicyName
+from ..sessions import BattleSession, store
+
+router = APIRouter()
+
+# Model for creating a battle session (the only request carrying full Pokemon)
+class CreateBattleRequest(BaseModel):
+    user_pokemon: Pokemon
+    trainer_pokemon: Pokemon
+    seed: Optional[int] = None
+    trainer_policy: PolicyName = "random"
+
+# Model for a turn in an existing session
+class TurnRequest(BaseModel):
+    move_index: int
+
+def get_session(battle_id: str) -> BattleSession:
+    session = store.get(battle_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Battle not found or expired.")
+    return session
+
+@router.post("/battles")
+async def create_battle(request: CreateBattleRequest):
+    if not request.user_pokemon.moves or not request.trainer_pokemon.moves:
+        raise HTTPException(status_code=400, detail="Both Pokemon need at least one move.")
+    session = BattleSession(request.user_pokemon, request.trainer_pokemon, request.seed, request.trainer_policy)
+    store.set(session.battle_id, session)
+    if battlelog.enabled():
+        battlelog.record("battle_started", session.battle_id, "session", session.seed,
+                         battlelog.pokemon_record(request.user_pokemon), battlelog.pokemon_record(request.trainer_pokemon),
+                         "player", request.trainer_policy)
+    return session.state()
+
+@router.get("/battles/{battle_id}")
+async def get_battle(battle_id: str):
+    return get_session(battle_id).state()
+
+@router.post("/battles/{battle_id}/turn")
+async def play_turn(battle_id: str, request: TurnRequest):
+    session = get_session(battle_id)
+    with session.lock:
+        if session.finished:
+            raise HTTPException(status_code=409, detail="Battle is already over.")
+        played = len(session.actions)
+        try:
+            events = session.play_turn(request.move_index)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        store.set(battle_id, session)
+        if battlelog.enabled():
+            battlelog.record("turn", battle_id, session.turn, session.actions[played:],
+                             session.user.current_hp, session.trainer.current_hp)
+            if session.finished:
+                battlelog.record("battle_finished", battle_id, session.winner, list(session.actions))
+        return {"events": events, "state": session.state()}
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, HTTPException, Response
+from pydantic import Field
+from typing import Literal
+from .. import jobs, references
+from .level1 import SIM_FIELDS, SimulateBattleRequest
+
+router = APIRouter()
+
+# Model for a background simulation: one battle, or many with seeds seed..seed+battles-1
+class JobRequest(SimulateBattleRequest):
+    battles: int = Field(1, gt=0, le=100_000)
+    priority: Literal["high", "normal", "low"] = "normal"
+
+def get_job(job_id: str) -> jobs.Job:
+    job = jobs.get().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired.")
+    return job
+
+# Queues the simulation and answers at once with 202; poll the Location for
+# progress and the result. A full queue is shed with 429 and Retry-After.
+@router.post("/jobs/simulate", status_code=202)
+async def submit_simulation(request: JobRequest, response: Response):
+    [request] = await references.resolve_references([request], SIM_FIELDS)
+    if not request.user_pokemon.moves or not request.trainer_pokemon.moves:
+        raise HTTPException(status_code=400, detail="Both Pokemon need at least one move.")
+    try:
+        job, coalesced = jobs.get().submit(request)
+    except jobs.QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    response.headers["Location"] = f"/jobs/{job.job_id}"
+    return {**job.state(), "coalesced": coalesced}
+
+@router.get("/jobs/{job_id}")
+async def job_status(job_id: str):
+    return get_job(job_id).state()
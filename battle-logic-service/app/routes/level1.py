@@ -1,94 +1,105 @@
-import json
 import random
-import requests
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Request, Response
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 from typing import List, Optional
-from ..models import BattleRequest, XPUpdateRequest, Move, Stats, Pokemon
+from .. import battlelog, datastore, encoding, engine, references
+from ..montecarlo import run_monte_carlo
+from ..models import Pokemon, PokemonOrRef, PolicyName
 
 router = APIRouter()
 
 # Model for simulating battle between two Pokemon
 class BattleSimRequest(BaseModel):
+    user_pokemon: PokemonOrRef
+    trainer_pokemon: PokemonOrRef
+    seed: Optional[int] = None
+
+# Model for a single simulated battle, with a choice of move policies
+class SimulateBattleRequest(BattleSimRequest):
+    user_policy: PolicyName = "first"
+    trainer_policy: PolicyName = "random"
+
+# Model for rebuilding a simulated battle from its seed and action list
+class ReplayRequest(BaseModel):
     user_pokemon: Pokemon
     trainer_pokemon: Pokemon
+    seed: int
+    actions: List[int]
+
+# Model for a quick outcome against one of level 1's trainers (or its boss)
+class TrainerBattleRequest(BaseModel):
+    trainer_id: int
 
-# Helper function to load Level 1 data from JSON file
+# Model for running many independent simulations of the same matchup;
+# processes past the CPU count are clamped to it
+class MonteCarloRequest(BattleSimRequest):
+    n: int = Field(10000, gt=0, le=10_000_000)
+    seed: Optional[int] = None
+    processes: Optional[int] = Field(None, gt=0)
+
+SIM_FIELDS = ("user_pokemon", "trainer_pokemon")  # may be sent as pokedex references
+
+# Helper function to load Level 1 data (cached and hot-reloaded by the data store)
 def load_level1_data():
     try:
-        with open("../data/level1.json", "r") as f:
-            data = json.load(f)
-        return data
+        return datastore.store.level(1)
     except Exception as e:
         raise HTTPException(status_code=500, detail="Error reading level 1 data: " + str(e))
 
 @router.get("/level/1")
-def get_level1():
-    return load_level1_data()
+async def get_level1(request: Request):
+    level = load_level1_data()
+    headers = {"ETag": level.etag}
+    if request.headers.get("if-none-match") == level.etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=level.body, media_type="application/json", headers=headers)
 
 @router.post("/simulate_battle/")
-def simulate_battle(battle: BattleSimRequest):
-    battle_log = []
+async def simulate_battle(battle: SimulateBattleRequest, request: Request):
+    [battle] = await references.resolve_references([battle], SIM_FIELDS)
+    if not battle.user_pokemon.moves or not battle.trainer_pokemon.moves:
+        raise HTTPException(status_code=400, detail="Both Pokemon need at least one move.")
+    # Up to MAX_TURNS of damage resolution: run it off the event loop. The
+    # battle runs on copies (it writes the final HP back), so the request
+    # models still hold the starting stats for the battle log.
+    result = await run_in_threadpool(
+        engine.simulate_battle, battle.user_pokemon.model_copy(), battle.trainer_pokemon.model_copy(), battle.seed,
+        user_policy=battle.user_policy, trainer_policy=battle.trainer_policy,
+    )
+    if battlelog.enabled():
+        battle_id = battlelog.new_battle_id()
+        battlelog.record("battle_started", battle_id, "simulate", result["seed"],
+                         battlelog.pokemon_record(battle.user_pokemon), battlelog.pokemon_record(battle.trainer_pokemon),
+                         battle.user_policy, battle.trainer_policy)
+        battlelog.record("battle_finished", battle_id, result["winner"], result["actions"])
+        result["battle_id"] = battle_id
+    return encoding.respond(request, result, encoding.compact_simulation)
 
-    # Determine turn order
-    turn_data = {
-        "pokemon1": battle.user_pokemon.model_dump(),
-        "pokemon2": battle.trainer_pokemon.model_dump()
-    }
+@router.post("/replay")
+async def replay_battle(replay: ReplayRequest):
     try:
-        turn_order_response = requests.post("http://localhost:8000/turn_order/", json=turn_data)
-        if turn_order_response.status_code != 200:
-            raise HTTPException(status_code=500, detail="Turn order request failed")
-        turn_order_data = turn_order_response.json()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="Error determining turn order: " + str(e))
-
-    # Determine which Pokemon goes first
-    first_pokemon = battle.user_pokemon if turn_order_data["first"] == "pokemon1" else battle.trainer_pokemon
-    second_pokemon = battle.trainer_pokemon if first_pokemon == battle.user_pokemon else battle.user_pokemon
-
-    turn_counter = 0
-    while battle.user_pokemon.current_hp > 0 and battle.trainer_pokemon.current_hp > 0:
-        turn_counter += 1
-        if turn_counter > 100:
-            return {"battle_log": battle_log, "winner": "tie", "reason": "Turn limit reached"}
+        return await run_in_threadpool(
+            engine.replay_battle, replay.user_pokemon, replay.trainer_pokemon, replay.seed, replay.actions
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail="Invalid replay: " + str(e))
 
-        for attacker, defender in [(first_pokemon, second_pokemon), (second_pokemon, first_pokemon)]:
-            if attacker.current_hp <= 0:
-                continue  # Skip turn if fainted
-
-            move = attacker.moves[0] if attacker == battle.user_pokemon else random.choice(attacker.moves)
-
-            calc_payload = {
-                "attacker": attacker.model_dump(),
-                "defender": defender.model_dump(),
-                "move": move.model_dump()
-            }
-            try:
-                damage_response = requests.post("http://localhost:8000/calculate_damage/", json=calc_payload)
-                if damage_response.status_code != 200:
-                    raise HTTPException(status_code=500, detail="Damage calculation request failed")
-                damage_data = damage_response.json()
-            except Exception as e:
-                raise HTTPException(status_code=500, detail="Error calculating damage: " + str(e))
-            
-            damage = damage_data.get("damage", 0)
-            defender.current_hp -= damage
-            battle_log.append(f"{attacker.nickname} used {move.name}, dealing {damage} damage!")
-            if defender.current_hp <= 0:
-                battle_log.append(f"{defender.nickname} fainted!")
-                return {"battle_log": battle_log, "winner": attacker.nickname}
-    
-    return {"battle_log": battle_log, "winner": "tie"}
+@router.post("/simulate_battle/monte_carlo")
+async def simulate_battle_monte_carlo(request: MonteCarloRequest):
+    [request] = await references.resolve_references([request], SIM_FIELDS)
+    if not request.user_pokemon.moves or not request.trainer_pokemon.moves:
+        raise HTTPException(status_code=400, detail="Both Pokemon need at least one move.")
+    return await run_in_threadpool(
+        run_monte_carlo, request.user_pokemon, request.trainer_pokemon, request.n, request.seed, request.processes
+    )
 
 @router.post("/level/1/battle")
-def start_battle(battle: BattleRequest):
-    data = load_level1_data()
-    trainer_id = battle.trainer_id  # Ensure trainer_id is part of the request
+async def start_battle(battle: TrainerBattleRequest):
+    level = load_level1_data()
+    trainer_id = battle.trainer_id
 
-    trainer = next((t for t in data.get("trainers", []) if t["trainer_id"] == trainer_id), None)
-    if not trainer and trainer_id == data.get("boss", {}).get("trainer_id"):
-        trainer = data["boss"]
+    trainer = level.index.get(trainer_id)
 
     if not trainer:
         raise HTTPException(status_code=404, detail="Trainer battle not found for level 1.")
@@ -0,0 +1,173 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect, status
+from starlette.websockets import WebSocketState
+from pydantic import BaseModel, Field, ValidationError
+from typing import Literal, Optional
+from .. import battlelog, engine, metrics, references
+from .level1 import SIM_FIELDS, SimulateBattleRequest
+
+router = APIRouter()
+
+# Live battles over a WebSocket.
+#
+# The client opens /ws/simulate_battle and sends one LiveBattleRequest. The
+# server answers with the engine's events as JSON messages: "start" (seed,
+# who moves first, battle_id when the battle log is on), one "attack" per
+# resolved attack (attacker, move, damage, defender_hp, fainted, ...) and a
+# final "end" (winner, seed, actions), then closes the socket.
+#
+# Pacing is up to the client. delay_ms spaces out attack events; credits, when
+# set, is how many attack events may be sent before the client asks for more.
+# While the battle runs, the client may send LiveControl messages:
+#
+#   {"action": "next", "count": n}     allow n more attack events
+#   {"action": "pause"}                stop sending until "next" or "resume"
+#   {"action": "resume"}               send freely again (no credit limit)
+#   {"action": "pace", "delay_ms": n}  change the delay between attacks
+#   {"action": "cancel"}               stop; the server sends "cancelled" and closes
+#
+# Each attack is a few microseconds of engine work, so the battle runs on the
+# event loop and yields between attacks; a waiting battle holds only its
+# generator and Combatants, which is what lets one worker keep thousands of
+# sockets open.
+
+MAX_DELAY_MS = 10_000
+
+# Model for starting a live battle: a simulate_battle request plus pacing
+class LiveBattleRequest(SimulateBattleRequest):
+    delay_ms: int = Field(0, ge=0, le=MAX_DELAY_MS)
+    credits: Optional[int] = Field(None, ge=0)
+
+# Model for a control message sent while a live battle runs
+class LiveControl(BaseModel):
+    action: Literal["next", "pause", "resume", "pace", "cancel"]
+    count: int = Field(1, gt=0)
+    delay_ms: int = Field(0, ge=0, le=MAX_DELAY_MS)
+
+_connections = 0
+metrics.registry.register_gauge("live_battle_connections", "Open live battle WebSockets.", lambda: _connections)
+
+
+class Pacing:
+    """Client-controlled flow of one live battle: delay, event credits and cancellation."""
+
+    def __init__(self, delay_ms: int, credits: Optional[int]):
+        self.delay = delay_ms / 1000
+        self.credits = credits  # None: no limit
+        self.cancelled = False
+        self._changed = asyncio.Event()
+
+    def apply(self, control: LiveControl) -> None:
+        if control.action == "next":
+            if self.credits is not None:
+                self.credits += control.count
+        elif control.action == "pause":
+            self.credits = 0
+        elif control.action == "resume":
+            self.credits = None
+        elif control.action == "pace":
+            self.delay = control.delay_ms / 1000
+        else:
+            self.cancelled = True
+        self._changed.set()
+
+    def cancel(self) -> None:
+        self.cancelled = True
+        self._changed.set()
+
+    async def wait(self) -> bool:
+        """Wait until the next attack event may be sent; False once cancelled."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.delay
+        if not self.delay:
+            await asyncio.sleep(0)  # let other sockets run between attacks
+        while not self.cancelled:
+            remaining = deadline - loop.time()
+            if self.credits != 0 and remaining <= 0:
+                break
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), remaining if self.credits != 0 else None)
+            except asyncio.TimeoutError:
+                pass
+        if self.cancelled:
+            return False
+        if self.credits:
+            self.credits -= 1
+        return True
+
+
+async def stream_battle(battle: LiveBattleRequest, pacing: Pacing):
+    """engine.battle_events as an async generator, each attack released by pacing."""
+    events = engine.battle_events(battle.user_pokemon, battle.trainer_pokemon, battle.seed,
+                                  user_policy=battle.user_policy, trainer_policy=battle.trainer_policy)
+    try:
+        for event in events:
+            if event["type"] == "attack" and not await pacing.wait():
+                yield {"type": "cancelled", "turn": event["turn"]}
+                return
+            yield event
+    finally:
+        events.close()
+
+
+async def _receive_controls(websocket: WebSocket, pacing: Pacing):
+    try:
+        while True:
+            try:
+                control = LiveControl.model_validate_json(await websocket.receive_text())
+            except ValidationError as e:
+                await websocket.send_json({"type": "error", "detail": e.errors(include_url=False, include_context=False)})
+                continue
+            pacing.apply(control)
+            if control.action == "cancel":
+                return
+    except WebSocketDisconnect:
+        pacing.cancel()
+
+
+async def _reject(websocket: WebSocket, detail):
+    await websocket.send_json({"type": "error", "detail": detail})
+    await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+
+
+@router.websocket("/ws/simulate_battle")
+async def live_battle(websocket: WebSocket):
+    global _connections
+    await websocket.accept()
+    _connections += 1
+    try:
+        try:
+            battle = LiveBattleRequest.model_validate_json(await websocket.receive_text())
+            [battle] = await references.resolve_references([battle], SIM_FIELDS)
+        except ValidationError as e:
+            return await _reject(websocket, e.errors(include_url=False, include_context=False))
+        except HTTPException as e:
+            return await _reject(websocket, e.detail)
+        if not battle.user_pokemon.moves or not battle.trainer_pokemon.moves:
+            return await _reject(websocket, "Both Pokemon need at least one move.")
+
+        battle_id = None
+        if battlelog.enabled():
+            battle_id = battlelog.new_battle_id()
+            user, trainer = battlelog.pokemon_record(battle.user_pokemon), battlelog.pokemon_record(battle.trainer_pokemon)
+        pacing = Pacing(battle.delay_ms, battle.credits)
+        receiver = asyncio.create_task(_receive_controls(websocket, pacing))
+        try:
+            async for event in stream_battle(battle, pacing):
+                if battle_id is not None and event["type"] == "start":
+                    event["battle_id"] = battle_id
+                    battlelog.record("battle_started", battle_id, "live", event["seed"], user, trainer,
+                                     battle.user_policy, battle.trainer_policy)
+                elif battle_id is not None and event["type"] == "end":
+                    battlelog.record("battle_finished", battle_id, event["winner"], event["actions"])
+                if websocket.client_state is WebSocketState.DISCONNECTED:
+                    return  # the client went away; nothing left to send
+                await websocket.send_json(event)
+        finally:
+            receiver.cancel()
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        _connections -= 1
@@ -0,0 +1,48 @@
+import json
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from .. import datastore
+from ..models import Pokemon
+from ..tournament import run_tournament
+
+router = APIRouter()
+
+# Model for one player team in a tournament
+class Team(BaseModel):
+    name: str
+    pokemon: List[Pokemon] = Field(..., min_length=1)
+
+# Model for a round-robin tournament of player teams against a level's trainers;
+# processes past the CPU count are clamped to it
+class TournamentRequest(BaseModel):
+    teams: List[Team] = Field(..., min_length=1)
+    repetitions: int = Field(100, gt=0, le=10_000_000)  # battles per (team, trainer) pairing
+    include_boss: bool = True
+    seed: Optional[int] = None
+    processes: Optional[int] = Field(None, gt=0)
+
+def level_opponents(level: int, include_boss: bool) -> list:
+    try:
+        data = datastore.store.level(level).data
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Level {level} not found.")
+    trainers = list(data.get("trainers", []))
+    if include_boss and data.get("boss"):
+        trainers.append(data["boss"])
+    return [(t["name"], [Pokemon(**p) for p in t["pokemon"]]) for t in trainers if t.get("pokemon")]
+
+# Streams one NDJSON line per finished chunk of battles, then the summary.
+# The generator is iterated in the threadpool, and only aggregate counts are
+# kept, so memory does not grow with the number of battles.
+@router.post("/level/{level}/tournament")
+async def tournament(level: int, request: TournamentRequest):
+    opponents = level_opponents(level, request.include_boss)
+    if any(not p.moves for _, team in opponents for p in team) or any(not p.moves for t in request.teams for p in t.pokemon):
+        raise HTTPException(status_code=400, detail="Every Pokemon needs at least one move.")
+    events = run_tournament(
+        [(team.name, team.pokemon) for team in request.teams], opponents,
+        request.repetitions, request.seed, request.processes,
+    )
+    return StreamingResponse((json.dumps(event) + "\n" for event in events), media_type="application/x-ndjson")
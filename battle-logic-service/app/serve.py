@@ -0,0 +1,54 @@
+"""
+Multi-worker serving mode.
+
+Builds the shared tables file (app/tables.py) once, then starts uvicorn
+workers that map it read-only instead of each computing the tables.
+
+    python -m app.serve --workers 4 --host 0.0.0.0 --port 8000
+
+One worker is the default. Battle sessions (/battles) and simulation jobs
+(/jobs) live in the memory of the worker that created them, so with more
+than one worker every follow-up request for a battle_id or job_id must be
+routed to that same worker (sticky routing at the proxy); without it they
+404. The CPUs are split between the workers: each one's request-time pool
+(app/pool.py) and job pool (app/jobs.py) get cpu_count // workers
+processes unless BATTLE_POOL_PROCESSES / BATTLE_JOB_PROCESSES are set.
+"""
+import argparse
+import os
+import tempfile
+
+import uvicorn
+from . import log, tables
+
+
+def default_tables_file() -> str:
+    return os.path.join(tempfile.gettempdir(), f"battle-tables-v{tables.FORMAT_VERSION}.bin")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("BATTLE_WORKERS", 1)),
+                        help="uvicorn workers; more than one needs sticky routing (see above)")
+    parser.add_argument("--tables-file", default=os.environ.get("BATTLE_TABLES_FILE") or default_tables_file())
+    args = parser.parse_args(argv)
+    log.configure()
+    logger = log.get_logger("serve")
+
+    if tables.load(args.tables_file) is None:
+        tables.write(args.tables_file)
+    # Inherited by the worker processes, which map the file on first use.
+    os.environ["BATTLE_TABLES_FILE"] = args.tables_file
+    share = str(max(1, (os.cpu_count() or 1) // args.workers))
+    os.environ.setdefault("BATTLE_POOL_PROCESSES", share)
+    os.environ.setdefault("BATTLE_JOB_PROCESSES", share)
+    if args.workers > 1:
+        logger.warning("battle sessions and jobs are per worker: route /battles/{id} and /jobs/{id} "
+                       "requests stickily", extra={"fields": {"workers": args.workers}})
+    uvicorn.run("app.main:app", host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from . import engine, metrics
+from .policies import make_policy
+from .rng import new_seed, battle_streams
+from .state import Combatant
+
+# Server-side battle sessions. A session is created once from full Pokemon
+# models; every later turn only carries a move index, so the per-turn request
+# is tiny and skips Pydantic validation of the combatants.
+
+DEFAULT_TTL_SECONDS = 15 * 60
+DEFAULT_MAX_SESSIONS = 10_000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class BattleSession:
+    """State of one live battle between the user's Pokémon and a trainer's."""
+
+    def __init__(self, user_pokemon, trainer_pokemon, seed=None, trainer_policy="random"):
+        self.battle_id = uuid.uuid4().hex
+        self.user = Combatant.from_pokemon(user_pokemon)
+        self.trainer = Combatant.from_pokemon(trainer_pokemon)
+        self.seed = new_seed() if seed is None else seed
+        self.policy_rng, self.damage_rng = battle_streams(self.seed)
+        self.trainer_policy = make_policy(trainer_policy, self.policy_rng)
+        self.turn = 0
+        self.actions = []
+        self.winner = None
+        self.lock = threading.Lock()  # serializes concurrent turns on one battle
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.winner is not None
+
+    def play_turn(self, move_index: int) -> list:
+        """
+        Play one turn: the user uses moves[move_index], the trainer the move its
+        policy picks, in speed order. Returns one compact event per attack.
+        """
+        if not 0 <= move_index < len(self.user.moves):
+            raise ValueError(f"Invalid move index {move_index} for {self.user.nickname}")
+        self.turn += 1
+        if self.turn > engine.MAX_TURNS:
+            self.winner = "tie"
+            return []
+
+        if engine.turn_order(self.user.speed, self.trainer.speed) == "pokemon1":
+            order = ((self.user, self.trainer), (self.trainer, self.user))
+        else:
+            order = ((self.trainer, self.user), (self.user, self.trainer))
+
+        events = []
+        for attacker, defender in order:
+            if attacker.current_hp <= 0:
+                continue
+            if attacker is self.user:
+                index = move_index
+            else:
+                index = self.trainer_policy.choose(attacker, defender)
+            self.actions.append(index)
+            move = attacker.moves[index]
+            result = engine.calculate_damage(attacker, defender, move, rng=self.damage_rng, detail=engine.DETAIL_NONE)
+            damage = result.get("damage", 0)
+            defender.current_hp -= damage
+            fainted = defender.current_hp <= 0
+            events.append({
+                "attacker": attacker.nickname,
+                "move": move.name,
+                "result": result["result"],
+                "damage": damage,
+                "defender_hp": defender.current_hp,
+                "fainted": fainted,
+            })
+            if fainted:
+                self.winner = attacker.nickname
+                break
+        return events
+
+    def state(self) -> dict:
+        """Compact state returned by GET /battles/{id}."""
+        return {
+            "battle_id": self.battle_id,
+            "turn": self.turn,
+            "seed": self.seed,
+            "finished": self.finished,
+            "winner": self.winner,
+            "user": _pokemon_state(self.user),
+            "trainer": _pokemon_state(self.trainer),
+        }
+
+
+def _pokemon_state(pokemon) -> dict:
+    return {
+        "nickname": pokemon.nickname,
+        "current_hp": pokemon.current_hp,
+        "max_hp": pokemon.max_hp,
+        "status": pokemon.status,
+    }
+
+
+class SessionBackend:
+    """
+    Storage interface for battle sessions.
+
+    Mirrors the get / set-with-TTL / delete subset of a key-value store so a
+    Redis-compatible backend can be dropped in without touching the routes.
+    """
+
+    def get(self, battle_id: str):
+        raise NotImplementedError
+
+    def set(self, battle_id: str, session: BattleSession) -> None:
+        raise NotImplementedError
+
+    def delete(self, battle_id: str) -> None:
+        raise NotImplementedError
+
+
+class InMemorySessionStore(SessionBackend):
+    """
+    Process-local session store with TTL, LRU eviction and a memory cap.
+
+    Sizes are estimated from the pickled session, the same bytes a networked
+    backend would store.
+    """
+
+    def __init__(self, ttl_seconds=DEFAULT_TTL_SECONDS, max_sessions=DEFAULT_MAX_SESSIONS,
+                 max_bytes=DEFAULT_MAX_BYTES, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.total_bytes = 0
+        self._entries = OrderedDict()  # battle_id -> (session, expires_at, size)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, battle_id: str):
+        with self._lock:
+            entry = self._entries.get(battle_id)
+            if entry is None:
+                return None
+            session, expires_at, size = entry
+            now = self.clock()
+            if expires_at <= now:
+                self._remove(battle_id)
+                return None
+            # Sliding TTL: every access refreshes the expiry and the LRU
+            # position, so the dict stays ordered by expiry as well.
+            self._entries[battle_id] = (session, now + self.ttl_seconds, size)
+            self._entries.move_to_end(battle_id)
+            return session
+
+    def set(self, battle_id: str, session: BattleSession) -> None:
+        # Re-measured on every set: a session grows with each turn (its action
+        # list, policy memos), so a size taken at creation would let long
+        # battles slip past max_bytes. Pickled outside the lock.
+        size = len(pickle.dumps(session, protocol=pickle.HIGHEST_PROTOCOL))
+        with self._lock:
+            if battle_id in self._entries:
+                self._remove(battle_id)
+            self._entries[battle_id] = (session, self.clock() + self.ttl_seconds, size)
+            self.total_bytes += size
+            self._evict()
+
+    def delete(self, battle_id: str) -> None:
+        with self._lock:
+            if battle_id in self._entries:
+                self._remove(battle_id)
+
+    def _remove(self, battle_id):
+        _, _, size = self._entries.pop(battle_id)
+        self.total_bytes -= size
+
+    def _evict(self):
+        now = self.clock()
+        # Oldest entries are at the front: drop expired ones, then least
+        # recently used ones until the store is back within its limits.
+        while self._entries:
+            battle_id, (_, expires_at, _) = next(iter(self._entries.items()))
+            over_limit = len(self._entries) > self.max_sessions or self.total_bytes > self.max_bytes
+            if expires_at > now and not over_limit:
+                break
+            self._remove(battle_id)
+
+
+store = InMemorySessionStore()
+metrics.registry.register_gauge("battle_sessions_active", "Live battle sessions held in memory.", lambda: len(store))
+metrics.registry.register_gauge("battle_sessions_bytes", "Estimated bytes held by battle sessions.",
+                                lambda: store.total_bytes)
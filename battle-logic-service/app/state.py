@@ -0,0 +1,46 @@
+from .moves import resolve_move
+from .utils import defender_type_ids
+
+# Compact battle state for the simulation loop and battle sessions.
+# Request models are converted once when a battle starts; the loop then reads
+# plain slot attributes (resolved moves, integer type ids, float stats)
+# instead of Pydantic models. Combatant has the attributes
+# engine.calculate_damage reads from a Pokemon, so both can be passed to it.
+
+
+class Combatant:
+    """One Pokémon's state inside a battle."""
+
+    __slots__ = ("nickname", "level", "max_hp", "current_hp", "attack", "defense", "speed",
+                 "special_atk", "special_def", "status", "types", "type_ids", "moves")
+
+    def __init__(self, nickname, level, max_hp, current_hp, attack, defense, speed,
+                 special_atk, special_def, status, types, moves):
+        self.nickname = nickname
+        self.level = level
+        self.max_hp = float(max_hp)
+        self.current_hp = float(current_hp)
+        self.attack = float(attack)
+        self.defense = float(defense)
+        self.speed = float(speed)
+        self.special_atk = float(special_atk)
+        self.special_def = float(special_def)
+        self.status = status
+        self.types = tuple(types)
+        # (type1, type2) ids for engine.type_multiplier; None for the rare
+        # Pokémon with more than two types, which keep the by-name lookup.
+        self.type_ids = defender_type_ids(self.types or ("normal",)) if len(self.types) <= 2 else None
+        self.moves = tuple(resolve_move(move) for move in moves)
+
+    @classmethod
+    def from_pokemon(cls, pokemon) -> "Combatant":
+        return cls(pokemon.nickname, pokemon.level, pokemon.max_hp, pokemon.current_hp, pokemon.attack,
+                   pokemon.defense, pokemon.speed, pokemon.special_atk, pokemon.special_def, pokemon.status,
+                   pokemon.types, pokemon.moves)
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
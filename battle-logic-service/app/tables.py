@@ -0,0 +1,129 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+
+import numpy as np
+from .log import get_logger
+
+# Precomputed numeric tables shared by every worker.
+#
+# The type matrices and the cumulative XP table are pure functions of
+# utils.type_chart and MAX_XP_LEVEL. `python -m app.serve` builds them once
+# into a versioned binary file before starting its workers; each worker maps
+# that file read-only, so the pages are shared through the page cache instead
+# of being rebuilt and held privately per process. Without a valid file the
+# tables are computed in-process on first use.
+#
+# File layout: MAGIC, a little-endian uint32 header length, a JSON header
+# ({"format", "key", "arrays": {name: {"dtype", "shape", "offset"}}}), then the
+# raw C-ordered arrays, each aligned to ALIGNMENT bytes. "key" hashes the
+# inputs, so a file built from another type chart or format is ignored.
+#
+#   BATTLE_TABLES_FILE  path of the table file to map (set by app.serve)
+
+MAGIC = b"BATTLETB"
+FORMAT_VERSION = 1
+ALIGNMENT = 64
+MAX_XP_LEVEL = 65_536  # cumulative XP at this level (~4.6e18) still fits in int64
+
+log = get_logger("tables")
+
+_tables = None
+_lock = threading.Lock()
+
+
+def source_key() -> str:
+    """Hash of everything the tables are computed from."""
+    from .utils import type_chart
+    source = json.dumps({"format": FORMAT_VERSION, "type_chart": type_chart, "max_xp_level": MAX_XP_LEVEL},
+                        sort_keys=True)
+    return hashlib.sha256(source.encode()).hexdigest()
+
+
+def compute() -> dict:
+    """name -> array for every table, computed in-process."""
+    from .utils import type_chart
+    types = list(type_chart)
+    neutral = len(types)
+    type_matrix = np.array([[float(type_chart[a].get(d, 1.0)) for d in types] for a in types])
+    # Padded with the neutral row/column, then expanded to every dual-type pair.
+    # Each entry is computed as 1.0 * m1 * m2, the same float the per-type loop gives.
+    padded = np.ones((neutral + 1, neutral + 1))
+    padded[:neutral, :neutral] = type_matrix
+    dual_type_table = 1.0 * padded[:, :, None] * padded[:, None, :]
+    # cumulative_xp[i] = sum of utils.xp_needed_for_level(l) for l in 1..i
+    cumulative_xp = np.concatenate(([0], np.cumsum(np.arange(1, MAX_XP_LEVEL + 1, dtype=np.int64) ** 3)))
+    return {"type_matrix": type_matrix, "dual_type_table": dual_type_table, "cumulative_xp": cumulative_xp}
+
+
+def write(path: str) -> str:
+    """Build the table file at path (atomically replacing any old one)."""
+    arrays = compute()
+    entries, offset = {}, 0
+    for name, array in arrays.items():
+        entries[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({"format": FORMAT_VERSION, "key": source_key(), "arrays": entries}).encode()
+    prefix = len(MAGIC) + 4 + len(header)
+    data_start = -(-prefix // ALIGNMENT) * ALIGNMENT
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(data_start + entries[name]["offset"])
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+def load(path: str):
+    """name -> read-only array mapped from path, or None if the file is missing or stale."""
+    try:
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        if mapped[:len(MAGIC)] != MAGIC:
+            return None
+        (length,) = struct.unpack_from("<I", mapped, len(MAGIC))
+        header = json.loads(mapped[len(MAGIC) + 4:len(MAGIC) + 4 + length])
+    except (struct.error, ValueError):
+        return None
+    if header.get("format") != FORMAT_VERSION or header.get("key") != source_key():
+        return None
+    data_start = -(-(len(MAGIC) + 4 + length) // ALIGNMENT) * ALIGNMENT
+    tables = {}
+    try:
+        for name, entry in header["arrays"].items():
+            dtype = np.dtype(entry["dtype"])
+            count = int(np.prod(entry["shape"], dtype=np.int64))
+            offset = data_start + entry["offset"]
+            if offset + count * dtype.itemsize > len(mapped):
+                return None  # truncated or still being written
+            # frombuffer on an ACCESS_READ mmap gives a read-only view of the file.
+            tables[name] = np.frombuffer(mapped, dtype=dtype, count=count, offset=offset).reshape(entry["shape"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    return tables
+
+
+def get() -> dict:
+    """The shared tables: mapped from BATTLE_TABLES_FILE when valid, else computed."""
+    global _tables
+    if _tables is None:
+        with _lock:
+            if _tables is None:
+                path = os.environ.get("BATTLE_TABLES_FILE")
+                tables = load(path) if path else None
+                if tables is None:
+                    if path:
+                        log.warning("table file missing or stale; computing tables", extra={"fields": {"path": path}})
+                    tables = compute()
+                    for array in tables.values():
+                        array.setflags(write=False)
+                _tables = tables
+    return _tables
@@ -0,0 +1,128 @@
+import numpy as np
+from . import engine, pool
+from .montecarlo import TIE, USER, TRAINER, build_move_table, simulate_chunk
+from .rng import new_seed
+from .state import Combatant
+
+# Round-robin tournaments: every player team against every trainer of a
+# level, N times each. Pairings are cut into chunks of battles that run on
+# the shared process pool with a bounded number of chunks in flight; run_tournament
+# yields one event per finished chunk and a final summary, so memory stays
+# flat however many battles the job has.
+#
+# Teams fight in order: the front Pokémon of each side battle until one
+# faints, and the survivor carries its HP into the next battle. Battles run
+# on the vectorized Monte Carlo kernel (user Pokémon use their first move,
+# trainers a random one, as in engine.simulate_battle).
+
+CHUNK_SIZE = 2000
+IN_FLIGHT_PER_PROCESS = 2
+
+
+def simulate_team_chunk(team, opponents, n, seed_seq):
+    """
+    Run n team battles on state arrays; returns the winner array (USER,
+    TRAINER or TIE per battle).
+
+    Each round, every battle still running plays one 1v1 between its current
+    front Pokémon, grouped by matchup so each group is a single
+    montecarlo.simulate_chunk call. A battle advances at least one front
+    Pokémon per round, so there are at most len(team) + len(opponents) rounds.
+    """
+    seeds = iter(seed_seq.spawn(len(team) * len(opponents) * (len(team) + len(opponents))))
+    tables = {}
+    ours = np.zeros(n, dtype=np.int64)
+    theirs = np.zeros(n, dtype=np.int64)
+    our_hp = np.full(n, float(team[0].current_hp))
+    their_hp = np.full(n, float(opponents[0].current_hp))
+    start_hp = {USER: [p.current_hp for p in team], TRAINER: [p.current_hp for p in opponents]}
+    active = np.arange(n)
+    while active.size:
+        for i, j in set(zip(ours[active].tolist(), theirs[active].tolist())):
+            rows = active[(ours[active] == i) & (theirs[active] == j)]
+            user, trainer = team[i], opponents[j]
+            if (i, j) not in tables:
+                tables[i, j] = (build_move_table(user, trainer), build_move_table(trainer, user),
+                                engine.turn_order(user.speed, trainer.speed) == "pokemon1")
+            user_table, trainer_table, user_first = tables[i, j]
+            _, _, our_hp[rows], their_hp[rows] = simulate_chunk(
+                user_table, trainer_table, our_hp[rows], their_hp[rows], user_first, rows.size, next(seeds))
+        # Fainted Pokémon are replaced by the next team member at its starting
+        # HP; after a turn-limit tie both sides send in their next Pokémon.
+        tie = (our_hp[active] > 0) & (their_hp[active] > 0)
+        for side, index, hp_array in ((USER, ours, our_hp), (TRAINER, theirs, their_hp)):
+            advance = active[(hp_array[active] <= 0) | tie]
+            index[advance] += 1
+            members = start_hp[side]
+            in_range = advance[index[advance] < len(members)]
+            hp_array[in_range] = np.take(members, index[in_range])
+        active = active[(ours[active] < len(team)) & (theirs[active] < len(opponents))]
+
+    user_out, trainer_out = ours >= len(team), theirs >= len(opponents)
+    return np.where(trainer_out & ~user_out, USER, np.where(user_out & ~trainer_out, TRAINER, TIE))
+
+
+def run_chunk(team_index, opponent_index, team, opponents, n, seed_seq):
+    """Play n battles of one pairing; returns (team_index, opponent_index, wins, losses, ties)."""
+    winner = simulate_team_chunk(team, opponents, n, seed_seq)
+    return (team_index, opponent_index, int((winner == USER).sum()), int((winner == TRAINER).sum()),
+            int((winner == TIE).sum()))
+
+
+def _chunks(teams, opponents, repetitions, seed):
+    root = np.random.SeedSequence(seed)
+    index = 0
+    for t, (_, team) in enumerate(teams):
+        for o, (_, opponent) in enumerate(opponents):
+            for start in range(0, repetitions, CHUNK_SIZE):
+                # Seeds depend only on the chunk's position, not on scheduling.
+                seed_seq = np.random.SeedSequence(root.entropy, spawn_key=(index,))
+                index += 1
+                yield t, o, team, opponent, min(CHUNK_SIZE, repetitions - start), seed_seq
+
+
+def run_tournament(teams, opponents, repetitions: int, seed=None, processes=None):
+    """
+    Play every team against every opponent `repetitions` times.
+
+    teams, opponents: lists of (name, list of Pokemon) pairs.
+    Yields {"type": "result", ...} once per finished chunk of battles, then a
+    {"type": "summary", ...} event with the win-rate matrix (teams x opponents).
+    """
+    teams = [(name, tuple(Combatant.from_pokemon(p) for p in team)) for name, team in teams]
+    opponents = [(name, tuple(Combatant.from_pokemon(p) for p in team)) for name, team in opponents]
+    if seed is None:
+        seed = new_seed()
+    total_chunks = len(teams) * len(opponents) * -(-repetitions // CHUNK_SIZE)
+    processes = min(pool.processes(processes), total_chunks) or 1
+    counts = np.zeros((len(teams), len(opponents), 3), dtype=np.int64)
+
+    chunks = _chunks(teams, opponents, repetitions, seed)
+    if processes <= 1:
+        results = (run_chunk(*args) for args in chunks)
+    else:
+        results = pool.imap(run_chunk, chunks, processes * IN_FLIGHT_PER_PROCESS)
+    for t, o, wins, losses, ties in results:
+        counts[t, o] += (wins, losses, ties)
+        yield {
+            "type": "result",
+            "team": teams[t][0],
+            "opponent": opponents[o][0],
+            "battles": wins + losses + ties,
+            "wins": wins,
+            "losses": losses,
+            "ties": ties,
+        }
+
+    battles = counts.sum(axis=2)
+    yield {
+        "type": "summary",
+        "seed": seed,
+        "battles": int(battles.sum()),
+        "processes": processes,
+        "teams": [name for name, _ in teams],
+        "opponents": [name for name, _ in opponents],
+        "win_rate": (counts[:, :, 0] / np.maximum(battles, 1)).tolist(),
+        "loss_rate": (counts[:, :, 1] / np.maximum(battles, 1)).tolist(),
+        "tie_rate": (counts[:, :, 2] / np.maximum(battles, 1)).tolist(),
+    }
@@ -1,13 +1,9 @@
-import random
-import json
+import logging
 
-# Load extra move effects from move_effects.json if it exists.
-try:
-    with open('../data/move_effects.json', 'r') as file:
-        move_effects = json.load(file)
-except FileNotFoundError:
-    print("move_effects.json not found; proceeding with empty move effects.")
-    move_effects = {}
+from . import datastore, tables
+from .log import get_logger
+
+log = get_logger("utils")
 
 def get_move_category(move_type: str) -> str:
     type_categories = {
@@ -33,7 +29,8 @@ def get_move_category(move_type: str) -> str:
     return type_categories.get(move_type.lower(), 'physical')
 
 def augment_move_data(move_data: dict) -> dict:
-    extra = move_effects.get(move_data.get("name"))
+    # Extra move effects come from data/move_effects.json via the data store.
+    extra = datastore.store.move_effects().get(move_data.get("name"))
     if extra:
         for key, value in extra.items():
             move_data.setdefault(key, value)
@@ -64,15 +61,97 @@ type_chart = {
     "fairy": {"fighting": 2, "dragon": 2, "dark": 2, "fire": 0.5, "poison": 0.5, "steel": 0.5}
 }
 
+# --- Compiled type chart ---
+# type_chart is compiled into integer type ids, a dense 18x18 matrix and a
+# (attacking, type1, type2) table so that a dual-type lookup is a single index
+# operation. NEUTRAL_TYPE is the id of "no second type" and of any unknown type
+# name; it is neutral (1.0) in every position. The matrices live in the shared
+# tables (app/tables.py) and are loaded on first use, not at import;
+# TYPE_MATRIX and DUAL_TYPE_TABLE remain readable as module attributes.
+TYPES = list(type_chart)
+NEUTRAL_TYPE = len(TYPES)
+
+
+class _TypeIds(dict):
+    # Exact-match dict of type name -> id. Other casings resolve on first use
+    # and are remembered; unknown names map to NEUTRAL_TYPE without being stored.
+    def __missing__(self, type_name):
+        tid = self.get(type_name.lower())
+        if tid is None:
+            return NEUTRAL_TYPE
+        self[type_name] = tid
+        return tid
+
+
+TYPE_IDS = _TypeIds()
+for _id, _name in enumerate(TYPES):
+    TYPE_IDS[_name] = _id
+    TYPE_IDS[_name.capitalize()] = _id
+
+_DUAL_TYPE_ROWS = None
+
+
+def _dual_type_rows() -> list:
+    # Scalar lookups index nested lists, which is faster than indexing the array.
+    global _DUAL_TYPE_ROWS
+    _DUAL_TYPE_ROWS = tables.get()["dual_type_table"].tolist()
+    return _DUAL_TYPE_ROWS
+
+
+def __getattr__(name):
+    if name in ("TYPE_MATRIX", "DUAL_TYPE_TABLE"):
+        return tables.get()[name.lower()]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def type_id(type_name: str) -> int:
+    """Integer id of a type name (any casing); NEUTRAL_TYPE if unknown."""
+    return TYPE_IDS[type_name]
+
+
+def defender_type_ids(defender_types: list) -> tuple:
+    """(type1, type2) ids for a defender; missing slots are NEUTRAL_TYPE."""
+    if not defender_types:
+        return NEUTRAL_TYPE, NEUTRAL_TYPE
+    if len(defender_types) == 1:
+        return TYPE_IDS[defender_types[0]], NEUTRAL_TYPE
+    return TYPE_IDS[defender_types[0]], TYPE_IDS[defender_types[1]]
+
+
 def get_type_effectiveness(attacking_type: str, defender_types: list) -> float:
+    row = (_DUAL_TYPE_ROWS or _dual_type_rows())[TYPE_IDS[attacking_type]]
+    count = len(defender_types)
+    if count == 2:
+        return row[TYPE_IDS[defender_types[0]]][TYPE_IDS[defender_types[1]]]
+    if count == 1:
+        return row[TYPE_IDS[defender_types[0]]][NEUTRAL_TYPE]
     multiplier = 1.0
     for d_type in defender_types:
-        type_multiplier = type_chart.get(attacking_type.lower(), {}).get(d_type.lower(), 1.0)
-        multiplier *= type_multiplier
+        multiplier *= row[TYPE_IDS[d_type]][NEUTRAL_TYPE]
     return multiplier
 
+
+def type_effectiveness_by_id(attacking_id: int, type1: int, type2: int) -> float:
+    """Scalar lookup by ids, as get_type_effectiveness for one or two defender types."""
+    return (_DUAL_TYPE_ROWS or _dual_type_rows())[attacking_id][type1][type2]
+
+
+def type_effectiveness_ids(attacking_ids, type1_ids, type2_ids):
+    """Vectorized lookup: arrays of type ids in, array of multipliers out."""
+    return tables.get()["dual_type_table"][attacking_ids, type1_ids, type2_ids]
+
 # --- XP and Level-Up System Functions ---
 
+# Stat increments per level-up used by the XP endpoints.
+LEVEL_UP_INCREMENTS = {
+    "attack": 2,
+    "defense": 2,
+    "hp": 5,
+    "speed": 1,
+    "special_atk": 2,
+    "special_def": 2
+}
+
 def xp_needed_for_level(level: int) -> int:
     """Simple cubic formula for XP needed to reach a given level."""
     return level ** 3
@@ -97,5 +176,6 @@ def add_experience(stats: dict, xp_gained: int, increments: dict) -> dict:
         stats["special_atk"] += increments.get("special_atk", 2)
         stats["special_def"] += increments.get("special_def", 2)
         stats["xp_to_next"] = xp_needed_for_level(stats["level"])
-        print(f"Leveled up! Now level {stats['level']} (next level requires {stats['xp_to_next']} XP)")
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("level up", extra={"fields": {"level": stats["level"], "xp_to_next": stats["xp_to_next"]}})
     return stats
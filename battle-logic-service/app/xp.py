@@ -0,0 +1,89 @@
+import numpy as np
+from . import tables
+from .utils import LEVEL_UP_INCREMENTS, add_experience
+
+# Closed-form level-up for /add_experience/batch.
+# utils.add_experience levels up one step at a time; here the final level is
+# found directly. After the first level-up (which costs the stored
+# xp_to_next), reaching level L + m from level L costs
+# CUMULATIVE_XP[L + m - 1] - CUMULATIVE_XP[L], so the final level of a whole
+# batch is one searchsorted on the prefix sums of the cubic thresholds
+# (CUMULATIVE_XP below is the shared "cumulative_xp" table, app/tables.py).
+# Rows the table cannot represent exactly go through the iterative version,
+# so every result is bit-for-bit what add_experience returns.
+
+MAX_TABLE_LEVEL = tables.MAX_XP_LEVEL
+STAT_KEYS = ("attack", "defense", "hp", "speed", "special_atk", "special_def")
+EXACT_FLOAT_LIMIT = 2.0 ** 53
+_INT64_LIMIT = 2 ** 60  # headroom so remaining + CUMULATIVE_XP[level] cannot overflow
+
+
+def _fits(*values) -> bool:
+    return all(-_INT64_LIMIT < v < _INT64_LIMIT for v in values)
+
+
+def add_experience_batch(stats_list: list, xp_gained: list, increments: dict = LEVEL_UP_INCREMENTS) -> list:
+    """
+    Vectorized add_experience over many Pokémon.
+
+    stats_list: stats dicts as taken by add_experience (updated in place).
+    xp_gained: XP earned by each Pokémon.
+    Returns stats_list.
+    """
+    rows, fallback = [], []
+    for i, (stats, gained) in enumerate(zip(stats_list, xp_gained)):
+        level, xp_to_next = stats["level"], stats["xp_to_next"]
+        if 0 <= level < MAX_TABLE_LEVEL and _fits(stats["xp"] + gained, xp_to_next, stats["xp"] + gained - xp_to_next):
+            rows.append(i)
+        else:
+            # Negative levels (zero-cost thresholds) or out-of-table values.
+            fallback.append(i)
+    for i in fallback:
+        add_experience(stats_list[i], xp_gained[i], increments)
+    if not rows:
+        return stats_list
+
+    cumulative_xp = tables.get()["cumulative_xp"]
+    stats = [stats_list[i] for i in rows]
+    level = np.array([s["level"] for s in stats], dtype=np.int64)
+    xp = np.array([s["xp"] for s in stats], dtype=np.int64) + np.array([xp_gained[i] for i in rows], dtype=np.int64)
+    xp_to_next = np.array([s["xp_to_next"] for s in stats], dtype=np.int64)
+
+    levels_up = xp >= xp_to_next
+    remaining = np.where(levels_up, xp - xp_to_next, 0)
+    # Final level after the first level-up: the highest L with
+    # CUMULATIVE_XP[L] <= remaining + CUMULATIVE_XP[level].
+    target = remaining + cumulative_xp[level]
+    in_table = target < cumulative_xp[-1]
+    last = np.searchsorted(cumulative_xp, np.where(in_table, target, 0), side="right") - 1
+    final_level = np.where(levels_up, last + 1, level)
+    gained_levels = final_level - level
+    new_xp = np.where(levels_up, remaining - (cumulative_xp[last] - cumulative_xp[level]), xp)
+    new_xp_to_next = np.where(levels_up, final_level ** 3, xp_to_next)
+
+    stat_values = {}
+    for key in STAT_KEYS:
+        step = increments.get(key, LEVEL_UP_INCREMENTS[key])
+        values = np.array([s[key] for s in stats], dtype=np.float64)
+        # v + k * step equals k repeated additions only while every partial
+        # sum is an exactly representable integer.
+        updated = values + gained_levels * step
+        exact = (values == np.floor(values)) & (np.abs(values) < EXACT_FLOAT_LIMIT) & (np.abs(updated) < EXACT_FLOAT_LIMIT)
+        inexact = ~exact if float(step).is_integer() else np.ones(len(values), dtype=bool)
+        if inexact.any():
+            idx = np.flatnonzero(inexact)
+            partial = values[idx]
+            for k in range(int(gained_levels[idx].max())):
+                partial = np.where(k < gained_levels[idx], partial + step, partial)
+            updated[idx] = partial
+        stat_values[key] = updated.tolist()
+
+    level_l, xp_l, xp_to_next_l = final_level.tolist(), new_xp.tolist(), new_xp_to_next.tolist()
+    for j, (s, in_range) in enumerate(zip(stats, in_table.tolist())):
+        if not in_range:
+            add_experience(s, xp_gained[rows[j]], increments)
+            continue
+        s["level"], s["xp"], s["xp_to_next"] = level_l[j], xp_l[j], xp_to_next_l[j]
+        for key in STAT_KEYS:
+            s[key] = stat_values[key][j]
+    return stats_list
@@ -0,0 +1,52 @@
+"""
+Cost of battle logging on the request path, writer throughput and the
+stored size per battle.
+
+The request-path cost is what /simulate_battle/ adds per battle: two stat
+snapshots and two non-blocking queue puts. Throughput is measured by
+queueing simulated battles' events and timing until the writer has stored
+them all.
+
+Run from battle-logic-service/:
+    python -m benchmarks.bench_battle_log --battles 20000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from app import battlelog, engine
+from app.models import Pokemon
+from .fixtures import GEODUDE, PIKACHU
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--battles", type=int, default=20_000)
+    args = parser.parse_args()
+
+    user, trainer = Pokemon(**PIKACHU), Pokemon(**GEODUDE)
+    results = [engine.simulate_battle(user.model_copy(), trainer.model_copy(), seed=n) for n in range(args.battles)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        writer = battlelog.configure(directory, max_queue=2 * args.battles + 1)
+        start = time.perf_counter()
+        for result in results:
+            battle_id = battlelog.new_battle_id()
+            battlelog.record("battle_started", battle_id, "simulate", result["seed"], battlelog.pokemon_record(user),
+                             battlelog.pokemon_record(trainer), "first", "random")
+            battlelog.record("battle_finished", battle_id, result["winner"], result["actions"])
+        queued = time.perf_counter()
+        writer.flush()
+        stored = time.perf_counter()
+        size = sum(os.path.getsize(path) for path in writer.sink.segments())
+        battlelog.configure()
+
+    print(f"request path   {(queued - start) / args.battles * 1e6:8.2f} us/battle")
+    print(f"writer         {2 * args.battles / (stored - start):8.0f} events/s")
+    print(f"stored         {size / args.battles:8.1f} bytes/battle "
+          f"({size} bytes for {args.battles} battles)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Memory per battle and turns per second with 10k battles in flight.
+
+"models" holds each battle as deep copies of the request Pokemon models,
+which is what simulate_battle and battle sessions mutated before; "slotted"
+holds the same battles as app.state.Combatant pairs. Turns per second
+interleaves one turn of every live session at a time until all are over,
+then runs simulate_battle on fresh copies of the same matchups.
+
+Run from battle-logic-service/:
+    python -m benchmarks.bench_battle_state --battles 10000
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+from app import engine
+from app.models import Pokemon
+from app.sessions import BattleSession
+from app.state import Combatant
+from .fixtures import GEODUDE, PIKACHU
+
+
+def measure_bytes(build, n):
+    gc.collect()
+    tracemalloc.start()
+    held = [build() for _ in range(n)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return size / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--battles", type=int, default=10_000)
+    args = parser.parse_args()
+    n = args.battles
+    user, trainer = Pokemon(**PIKACHU), Pokemon(**GEODUDE)
+
+    models = measure_bytes(lambda: (user.model_copy(deep=True), trainer.model_copy(deep=True)), n)
+    slotted = measure_bytes(lambda: (Combatant.from_pokemon(user), Combatant.from_pokemon(trainer)), n)
+    # Every session is created from its own request models, as over HTTP.
+    fresh = lambda: (user.model_copy(deep=True), trainer.model_copy(deep=True))
+    sessions = measure_bytes(lambda: BattleSession(*fresh(), seed=0), n)
+    print(f"battle state, models   {models:10.0f} bytes/battle")
+    print(f"battle state, slotted  {slotted:10.0f} bytes/battle")
+    print(f"whole BattleSession    {sessions:10.0f} bytes/battle (includes RNG streams, request models freed)")
+
+    live = [BattleSession(*fresh(), seed=i) for i in range(n)]
+    turns = 0
+    start = time.perf_counter()
+    while live:
+        for session in live:
+            session.play_turn(0)
+            turns += 1
+        live = [session for session in live if not session.finished]
+    elapsed = time.perf_counter() - start
+    print(f"sessions, interleaved  {turns / elapsed:10.0f} turns/s ({turns} turns)")
+
+    battles = [fresh() for _ in range(n)]
+    turns = 0
+    start = time.perf_counter()
+    for i, (u, t) in enumerate(battles):
+        result = engine.simulate_battle(u, t, seed=i)
+        turns += len(result["actions"])
+    elapsed = time.perf_counter() - start
+    print(f"simulate_battle        {turns / elapsed:10.0f} attacks/s ({n / elapsed:.0f} battles/s)")
+
+
+if __name__ == "__main__":
+    main()
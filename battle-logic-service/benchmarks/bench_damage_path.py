@@ -0,0 +1,74 @@
+"""
+Per-request latency and peak allocation of the damage path, before and after
+move resolution caching and the removal of print() logging.
+
+"before" replays the work the old handler did on every request: dump the
+Move model to a dict, print it, augment it with move_effects.json, print it
+again, then resolve damage from that fresh dict. stdout goes to /dev/null,
+so the numbers understate what a real terminal or log pipe costs.
+
+Run from battle-logic-service/:
+    python -m benchmarks.bench_damage_path --calls 20000
+"""
+import argparse
+import contextlib
+import os
+import time
+import tracemalloc
+
+from app import engine
+from app.models import Move, Pokemon
+from app.moves import ResolvedMove
+from app.rng import make_rng
+from app.utils import augment_move_data
+from .fixtures import GEODUDE, PIKACHU
+
+
+def before(attacker, defender, move, rng):
+    move_dict = move.model_dump()
+    print("Original move data:", move_dict)
+    move_dict = augment_move_data(move_dict)
+    print("Augmented move data:", move_dict)
+    return engine.calculate_damage(attacker, defender, ResolvedMove(move_dict), rng=rng)
+
+
+def after(attacker, defender, move, rng):
+    return engine.calculate_damage(attacker, defender, move, rng=rng)
+
+
+def measure(fn, calls, args):
+    fn(*args)  # warm caches
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(*args)
+    latency = (time.perf_counter() - start) / calls
+
+    tracemalloc.start()
+    peaks = 0
+    for _ in range(min(calls, 2000)):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        fn(*args)
+        peaks += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return latency, peaks / min(calls, 2000)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20_000)
+    args = parser.parse_args()
+
+    attacker, defender = Pokemon(**PIKACHU), Pokemon(**GEODUDE)
+    move = Move(**PIKACHU["moves"][0])
+    call_args = (attacker, defender, move, make_rng(0))
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        results = {name: measure(fn, args.calls, call_args) for name, fn in (("before", before), ("after", after))}
+
+    for name, (latency, peak) in results.items():
+        print(f"{name:<7} {latency * 1e6:8.2f} us/request  {peak:8.0f} peak bytes allocated/request")
+    print(f"speedup {results['before'][0] / results['after'][0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Payload size and serialization time of damage, batch and simulation
+responses, per detail level and encoding.
+
+"json" is what FastAPI returns by default (keyed dicts through json.dumps);
+"compact-json" and "msgpack" are the fixed-array bodies served when the
+client sends Accept: application/x-compact+json or application/msgpack.
+
+Run from battle-logic-service/:
+    python -m benchmarks.bench_encoding --batch 1000
+"""
+import argparse
+import json
+import time
+
+from app import encoding, engine
+from app.batch import batch_roll_width, calculate_damage_batch, resolve_moves
+from app.models import BattleRequest, Move, Pokemon
+from app.rng import make_rng
+from .fixtures import GEODUDE, PIKACHU
+
+DOUBLE_SLAP = {"move_id": 3, "name": "Double-slap", "power": 15, "accuracy": 0.85,
+               "move_type": "Normal", "status_effect": None, "effect_chance": None}
+
+
+def encoders():
+    yield "json", lambda body, compact: json.dumps(body).encode()
+    yield "compact-json", lambda body, compact: encoding.dumps(compact(body), encoding.COMPACT_JSON)
+    if encoding.msgpack is not None:
+        yield "msgpack", lambda body, compact: encoding.dumps(compact(body), encoding.MSGPACK)
+
+
+def measure(encode, body, compact, repeat):
+    size = len(encode(body, compact))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode(body, compact)
+    return size, (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    attacker, defender = Pokemon(**PIKACHU), Pokemon(**GEODUDE)
+    move = Move(**DOUBLE_SLAP)
+    attacks = [BattleRequest(attacker=attacker, defender=defender, move=move)] * args.batch
+    moves = resolve_moves(attacks)
+    rolls = make_rng(0).random((len(attacks), batch_roll_width(moves)))
+
+    cases = []
+    for detail in (engine.DETAIL_FULL, engine.DETAIL_SUMMARY, engine.DETAIL_NONE):
+        single = engine.calculate_damage(attacker, defender, move, rng=make_rng(0), detail=detail)
+        cases.append((f"damage/{detail}", single, encoding.compact_damage))
+        batch = {"results": calculate_damage_batch(attacks, moves, rolls, detail)}
+        cases.append((f"batch[{args.batch}]/{detail}", batch, encoding.compact_batch))
+    battle = engine.simulate_battle(Pokemon(**PIKACHU), Pokemon(**GEODUDE), seed=0)
+    cases.append(("simulate_battle", battle, encoding.compact_simulation))
+
+    print(f"{'payload':<22} {'encoding':<13} {'bytes':>10} {'us/encode':>11}")
+    for name, body, compact in cases:
+        # The compact encodings have no detail level: only measure them once per shape.
+        for label, encode in encoders():
+            if label != "json" and name.endswith(("/summary", "/none")):
+                continue
+            size, seconds = measure(encode, body, compact, args.repeat)
+            print(f"{name:<22} {label:<13} {size:>10} {seconds * 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Battles per second (total and per core) for the Monte Carlo simulator.
+
+Run from battle-logic-service/:
+    python -m benchmarks.bench_monte_carlo --battles 200000 --processes 1 2 4
+"""
+import argparse
+import os
+import time
+
+from app.montecarlo import run_monte_carlo
+from app.routes.level1 import BattleSimRequest
+from .fixtures import battle_payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--battles", type=int, default=200_000)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    battle = BattleSimRequest(**battle_payload())
+    for processes in args.processes:
+        start = time.perf_counter()
+        result = run_monte_carlo(battle.user_pokemon, battle.trainer_pokemon, args.battles, args.seed, processes)
+        elapsed = time.perf_counter() - start
+        rate = args.battles / elapsed
+        print(f"processes={result['processes']:<3} {rate:12.0f} battles/s  "
+              f"{rate / result['processes']:12.0f} battles/s/core  win_rate={result['win_rate']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Decisions per second for each move-selection policy, and how the policies
+fare in simulate_battle against a random trainer.
+
+Decisions are timed the way a bulk simulation makes them: one policy per
+battle, asked again as HP drops, so the per-battle expected-damage cache is
+exercised across a battle's turns.
+
+Run from battle-logic-service/:
+    python -m benchmarks.bench_policies --battles 500
+"""
+import argparse
+import copy
+import time
+
+from app import engine
+from app.models import Pokemon
+from app.policies import POLICIES, make_policy
+from app.rng import make_rng
+from app.state import Combatant
+from .fixtures import GEODUDE, PIKACHU
+
+EXTRA_MOVES = [
+    {"move_id": 3, "name": "Double-slap", "power": 15, "accuracy": 0.85,
+     "move_type": "Normal", "status_effect": None, "effect_chance": None},
+    {"move_id": 86, "name": "Thunder Wave", "power": 0, "accuracy": 0.9,
+     "move_type": "Electric", "status_effect": "paralyze", "effect_chance": 1.0},
+]
+
+
+def four_moves(pokemon):
+    pokemon = copy.deepcopy(pokemon)
+    pokemon["moves"] = pokemon["moves"] + EXTRA_MOVES
+    return pokemon
+
+
+def decisions_per_second(name, battles, steps=10):
+    user, trainer = Pokemon(**four_moves(PIKACHU)), Pokemon(**four_moves(GEODUDE))
+    decisions = 0
+    elapsed = 0.0
+    for i in range(battles):
+        me, them = Combatant.from_pokemon(user), Combatant.from_pokemon(trainer)
+        policy = make_policy(name, make_rng(i))
+        start = time.perf_counter()
+        for step in range(steps):
+            them.current_hp = trainer.max_hp * (1 - step / steps)
+            policy.choose(me, them)
+        elapsed += time.perf_counter() - start
+        decisions += steps
+    return decisions / elapsed
+
+
+def win_rate(name, battles):
+    wins = 0
+    start = time.perf_counter()
+    for i in range(battles):
+        user, trainer = Pokemon(**four_moves(PIKACHU)), Pokemon(**four_moves(GEODUDE))
+        result = engine.simulate_battle(user, trainer, seed=i, user_policy=name)
+        wins += result["winner"] == "Pikachu"
+    return wins / battles, battles / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--battles", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'policy':<11} {'decisions/s':>12} {'win rate':>9} {'battles/s':>10}")
+    for name in POLICIES:
+        rate = decisions_per_second(name, args.battles)
+        wins, battles = win_rate(name, args.battles)
+        print(f"{name:<11} {rate:12.0f} {wins:9.1%} {battles:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Battles per second for simulate_battle: legacy HTTP loop vs in-process engine.
+
+The "before" numbers replay the old implementation, which POSTed to
+/turn_order/ and /calculate_damage/ on its own server for every attack.
+The "after" numbers call app.engine.simulate_battle directly.
+
+Run from battle-logic-service/:
+    python -m benchmarks.bench_simulate_battle --battles 2000 --http-battles 50
+"""
+import argparse
+import contextlib
+import json
+import socket
+import threading
+import time
+import urllib.request
+
+import uvicorn
+
+from app import engine
+from app.main import app
+from app.routes.level1 import BattleSimRequest
+from .fixtures import battle_payload
+
+
+def _post(base_url, path, body):
+    req = urllib.request.Request(
+        base_url + path,
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(req) as resp:
+        return json.loads(resp.read())
+
+
+def legacy_simulate_battle(base_url, payload):
+    # Mirrors the pre-engine implementation of routes/level1.py:simulate_battle.
+    battle = BattleSimRequest(**payload)
+    turn_data = {"pokemon1": battle.user_pokemon.model_dump(), "pokemon2": battle.trainer_pokemon.model_dump()}
+    first = _post(base_url, "/turn_order/", turn_data)["first"]
+    first_pokemon = battle.user_pokemon if first == "pokemon1" else battle.trainer_pokemon
+    second_pokemon = battle.trainer_pokemon if first_pokemon is battle.user_pokemon else battle.user_pokemon
+    turn_counter = 0
+    while battle.user_pokemon.current_hp > 0 and battle.trainer_pokemon.current_hp > 0:
+        turn_counter += 1
+        if turn_counter > engine.MAX_TURNS:
+            return "tie"
+        for attacker, defender in ((first_pokemon, second_pokemon), (second_pokemon, first_pokemon)):
+            if attacker.current_hp <= 0:
+                continue
+            move = attacker.moves[0]
+            damage = _post(base_url, "/calculate_damage/", {
+                "attacker": attacker.model_dump(),
+                "defender": defender.model_dump(),
+                "move": move.model_dump(),
+            }).get("damage", 0)
+            defender.current_hp -= damage
+            if defender.current_hp <= 0:
+                return attacker.nickname
+    return "tie"
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def _server():
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="error"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    try:
+        yield f"http://127.0.0.1:{port}"
+    finally:
+        server.should_exit = True
+        thread.join()
+
+
+def bench_in_process(n):
+    start = time.perf_counter()
+    for _ in range(n):
+        battle = BattleSimRequest(**battle_payload())
+        engine.simulate_battle(battle.user_pokemon, battle.trainer_pokemon)
+    return n / (time.perf_counter() - start)
+
+
+def bench_http(n):
+    with _server() as base_url:
+        start = time.perf_counter()
+        for _ in range(n):
+            legacy_simulate_battle(base_url, battle_payload())
+        return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--battles", type=int, default=2000)
+    parser.add_argument("--http-battles", type=int, default=50)
+    args = parser.parse_args()
+
+    before = bench_http(args.http_battles)
+    after = bench_in_process(args.battles)
+
+    print(f"before (HTTP self-calls): {before:10.1f} battles/s")
+    print(f"after  (in-process):      {after:10.1f} battles/s")
+    print(f"speedup:                  {after / before:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Worker cold start: time to import the app and serve its first requests, and
+the worker's memory afterwards, with the shared tables computed in-process
+versus mapped from a table file (as app.serve workers do).
+
+Each sample is a fresh interpreter, like a newly spawned worker. PSS splits
+shared pages between the processes mapping them.
+
+Run from battle-logic-service/:
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from app import tables
+
+WORKER = r"""
+import json, time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+from benchmarks.fixtures import GEODUDE, PIKACHU, battle_payload
+client = TestClient(app.main.app)
+client.post("/calculate_damage/", json={"attacker": PIKACHU, "defender": GEODUDE, "move": PIKACHU["moves"][0]})
+client.post("/simulate_battle/", json=battle_payload())
+client.post("/add_experience/batch", json={"updates": [{"attacker": {
+    "attack": 50, "defense": 40, "hp": 45, "speed": 90, "special_atk": 50, "special_def": 50}, "xp_gained": 10 ** 9}]})
+served = time.perf_counter()
+memory = {}
+for name in ("/proc/self/status", "/proc/self/smaps_rollup"):
+    try:
+        for line in open(name):
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile", "Pss"):
+                memory[key] = int(value.split()[0])
+    except OSError:
+        pass
+print(json.dumps({"import": imported - start, "first_requests": served - imported, **memory}))
+"""
+
+
+def sample(env):
+    out = subprocess.run([sys.executable, "-W", "ignore", "-c", WORKER], env=env, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    env = {**os.environ, "PYTHONPATH": os.getcwd()}
+    env.pop("BATTLE_TABLES_FILE", None)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = tables.write(os.path.join(tmp, "tables.bin"))
+        for mode, mode_env in (("computed", env), ("mapped", {**env, "BATTLE_TABLES_FILE": path})):
+            runs = [sample(mode_env) for _ in range(args.runs)]
+            median = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+            memory = "  ".join(f"{key}={median[key] / 1024:.1f}MiB" for key in ("VmRSS", "RssAnon", "Pss") if key in median)
+            print(f"{mode:<9} import={median['import'] * 1000:6.1f}ms  "
+                  f"first_requests={median['first_requests'] * 1000:6.1f}ms  {memory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Battles per second and peak memory for a round-robin tournament against the
+level 1 trainers, consuming the event stream the way the endpoint does.
+
+Run from battle-logic-service/:
+    python -m benchmarks.bench_tournament --battles 1000000 --processes 1 2 4
+"""
+import argparse
+import os
+import resource
+import time
+
+from app.models import Pokemon
+from app.routes.tournament import level_opponents
+from app.tournament import run_tournament
+from .fixtures import GEODUDE, PIKACHU
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--battles", type=int, default=1_000_000, help="total battles across all pairings")
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    teams = [("solo", [Pokemon(**PIKACHU)]), ("pair", [Pokemon(**PIKACHU), Pokemon(**GEODUDE)])]
+    opponents = level_opponents(args.level, include_boss=True)
+    repetitions = -(-args.battles // (len(teams) * len(opponents)))
+    for processes in args.processes:
+        start = time.perf_counter()
+        events = 0
+        for event in run_tournament(teams, opponents, repetitions, args.seed, processes):
+            events += 1
+        elapsed = time.perf_counter() - start
+        rate = event["battles"] / elapsed
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"processes={event['processes']:<3} {event['battles']} battles in {elapsed:6.2f}s  "
+              f"{rate:12.0f} battles/s  events={events}  peak_rss={peak:.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
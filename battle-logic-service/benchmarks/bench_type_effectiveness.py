@@ -0,0 +1,54 @@
+"""
+Micro-benchmark: dict-based get_type_effectiveness vs the compiled type table.
+
+Run from battle-logic-service/:
+    python -m benchmarks.bench_type_effectiveness --lookups 1000000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app import utils
+
+
+def legacy_type_effectiveness(attacking_type, defender_types):
+    multiplier = 1.0
+    for d_type in defender_types:
+        multiplier *= utils.type_chart.get(attacking_type.lower(), {}).get(d_type.lower(), 1.0)
+    return multiplier
+
+
+def _time(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rnd = random.Random(0)
+    names = [t.capitalize() for t in utils.TYPES]
+    lookups = [(rnd.choice(names), rnd.sample(names, rnd.choice((1, 2)))) for _ in range(args.lookups)]
+
+    def run(fn):
+        for attacking, defenders in lookups:
+            fn(attacking, defenders)
+
+    legacy = _time(run, legacy_type_effectiveness)
+    compiled = _time(run, utils.get_type_effectiveness)
+
+    attack_ids = np.array([utils.type_id(a) for a, _ in lookups])
+    defender_ids = np.array([utils.defender_type_ids(d) for _, d in lookups])
+    vectorized = _time(utils.type_effectiveness_ids, attack_ids, defender_ids[:, 0], defender_ids[:, 1])
+
+    for label, elapsed in (("legacy dict lookups", legacy), ("compiled table", compiled), ("vectorized ids", vectorized)):
+        print(f"{label:<20} {elapsed / args.lookups * 1e9:8.1f} ns/lookup  {legacy / elapsed:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
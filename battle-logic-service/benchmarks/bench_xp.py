@@ -0,0 +1,53 @@
+"""
+Iterative add_experience vs the closed-form add_experience_batch when
+awarding XP to a whole roster at once.
+
+Run from battle-logic-service/:
+    python -m benchmarks.bench_xp --pokemon 5000 --xp 1000000
+"""
+import argparse
+import copy
+import random
+import time
+
+from app.utils import LEVEL_UP_INCREMENTS, add_experience
+from app.xp import add_experience_batch
+
+
+def roster(n, seed=0):
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(n):
+        level = rng.randint(1, 50)
+        rows.append({"level": level, "xp": 0, "xp_to_next": level ** 3, "attack": 55.0, "defense": 40.0,
+                     "hp": 35.0, "speed": 90.0, "special_atk": 50.0, "special_def": 50.0, "types": None})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pokemon", type=int, default=5000)
+    parser.add_argument("--xp", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    rows = roster(args.pokemon)
+    gains = [args.xp] * len(rows)
+
+    iterative_rows = copy.deepcopy(rows)
+    start = time.perf_counter()
+    iterative = [add_experience(row, gain, LEVEL_UP_INCREMENTS) for row, gain in zip(iterative_rows, gains)]
+    iterative_seconds = time.perf_counter() - start
+
+    batch_rows = copy.deepcopy(rows)
+    start = time.perf_counter()
+    batch = add_experience_batch(batch_rows, gains)
+    batch_seconds = time.perf_counter() - start
+
+    assert batch == iterative
+    print(f"iterative {iterative_seconds * 1e3:9.2f} ms")
+    print(f"batch     {batch_seconds * 1e3:9.2f} ms")
+    print(f"speedup   {iterative_seconds / batch_seconds:9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# Realistic payload fixtures shared by the benchmark scripts.
+import copy
+
+PIKACHU = {
+    "pokemon_id": 25,
+    "nickname": "Pikachu",
+    "level": 8,
+    "max_hp": 45,
+    "current_hp": 45,
+    "attack": 55,
+    "defense": 40,
+    "speed": 90,
+    "special_atk": 50,
+    "special_def": 50,
+    "status": "Healthy",
+    "types": ["Electric"],
+    "moves": [
+        {"move_id": 84, "name": "Thunder Shock", "power": 40, "accuracy": 1.0,
+         "move_type": "Electric", "status_effect": "paralyze", "effect_chance": 0.1},
+        {"move_id": 98, "name": "Quick Attack", "power": 40, "accuracy": 1.0,
+         "move_type": "Normal", "status_effect": None, "effect_chance": None},
+    ],
+}
+
+GEODUDE = {
+    "pokemon_id": 74,
+    "nickname": "Geodude",
+    "level": 10,
+    "max_hp": 40,
+    "current_hp": 40,
+    "attack": 80,
+    "defense": 100,
+    "speed": 20,
+    "special_atk": 30,
+    "special_def": 30,
+    "status": "Healthy",
+    "types": ["Rock"],
+    "moves": [
+        {"move_id": 7, "name": "Tackle", "power": 40, "accuracy": 1.0,
+         "move_type": "Normal", "status_effect": None, "effect_chance": None},
+        {"move_id": 8, "name": "Rock Throw", "power": 50, "accuracy": 0.9,
+         "move_type": "Rock", "status_effect": None, "effect_chance": None},
+    ],
+}
+
+
+def battle_payload():
+    return {"user_pokemon": copy.deepcopy(PIKACHU), "trainer_pokemon": copy.deepcopy(GEODUDE)}
@@ -0,0 +1,89 @@
+"""
+/calculate_damage/ latency while simulations saturate the service.
+
+Three phases of --duration seconds, each with --players clients looping on
+POST /calculate_damage/ (the damage scenario of benchmarks.loadtest):
+
+    idle     nothing else running
+    direct   --flooders clients loop on POST /simulate_battle/, which runs on
+             the request-serving worker's own threadpool
+    jobs     the same flooders keep POST /jobs/simulate saturated with bulk
+             low-priority jobs instead, waiting out Retry-After on every 429
+
+Starts a local single-worker uvicorn with a small job queue unless --url is
+given. Requires httpx (pip install -r benchmarks/requirements.txt). Run from
+battle-logic-service/:
+    python -m benchmarks.jobs_loadtest --players 10 --flooders 16 --duration 10
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import os
+import re
+import time
+
+import httpx
+
+from .fixtures import battle_payload
+from .loadtest import local_server, run
+
+JOB_BATTLES = 500
+_seeds = itertools.count(1)
+
+
+async def job_flooder(client, deadline, stats):
+    while time.perf_counter() < deadline:
+        response = await client.post("/jobs/simulate", json={
+            **battle_payload(), "seed": next(_seeds), "battles": JOB_BATTLES, "priority": "low"})
+        if response.status_code == 429:
+            stats["shed"] += 1
+            retry_after = float(response.headers["retry-after"])
+            await asyncio.sleep(min(retry_after, max(0.0, deadline - time.perf_counter())))
+        else:
+            response.raise_for_status()
+            stats["accepted"] += 1
+
+
+async def direct_flooder(client, deadline, stats):
+    while time.perf_counter() < deadline:
+        response = await client.post("/simulate_battle/", json=battle_payload())
+        response.raise_for_status()
+        stats["accepted"] += 1
+
+
+FLOODERS = {"idle": None, "direct": direct_flooder, "jobs": job_flooder}
+
+
+async def phase(url, name, players, flooders, duration):
+    stats = {"accepted": 0, "shed": 0}
+    deadline = time.perf_counter() + duration
+    async with httpx.AsyncClient(base_url=url, timeout=60) as client:
+        flood = [FLOODERS[name](client, deadline, stats) for _ in range(flooders)] if FLOODERS[name] else []
+        damage, *_ = await asyncio.gather(run(url, "damage", players, duration), *flood)
+        metrics = (await client.get("/metrics")).text
+    queued = re.search(r"^battle_jobs_unfinished (\S+)$", metrics, re.MULTILINE)
+    return damage, stats, queued.group(1) if queued else "-"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target an already running service instead of starting one")
+    parser.add_argument("--players", type=int, default=10)
+    parser.add_argument("--flooders", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--job-queue", type=int, default=32, help="BATTLE_JOB_QUEUE for the local server")
+    args = parser.parse_args()
+
+    os.environ.setdefault("BATTLE_JOB_QUEUE", str(args.job_queue))
+    server = contextlib.nullcontext(args.url) if args.url else local_server(1)
+    with server as url:
+        for name in FLOODERS:
+            damage, stats, queued = asyncio.run(phase(url, name, args.players, args.flooders, args.duration))
+            print(f"{name:<7} damage rps={damage['rps']:8.1f}  p50={damage['p50_ms']:7.1f}ms  "
+                  f"p99={damage['p99_ms']:7.1f}ms  errors={damage['errors']:<4} sims accepted={stats['accepted']:<6} "
+                  f"shed={stats['shed']:<6} jobs unfinished={queued}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Async load test: N concurrent simulated players against the battle service.
+
+Each player loops over one scenario for --duration seconds on a shared,
+keep-alive httpx.AsyncClient and the script reports p50/p99 latency and RPS.
+
+Scenarios:
+    damage   POST /calculate_damage/ with a full attacker/defender/move body
+    session  POST /battles once, then POST /battles/{id}/turn until it ends
+    simulate POST /simulate_battle/
+
+Starts a local uvicorn unless --url is given. Requires httpx
+(pip install -r benchmarks/requirements.txt). Run from battle-logic-service/:
+    python -m benchmarks.loadtest --players 100 1000 --duration 10
+"""
+import argparse
+import asyncio
+import contextlib
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+
+from .fixtures import GEODUDE, PIKACHU, battle_payload
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@contextlib.contextmanager
+def local_server(workers=1):
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        stdout=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(200):
+            try:
+                if httpx.get(url + "/health").status_code == 200:
+                    break
+            except httpx.TransportError:
+                time.sleep(0.05)
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+async def damage_player(client, deadline, latencies, errors):
+    payload = {"attacker": PIKACHU, "defender": GEODUDE, "move": PIKACHU["moves"][0]}
+    while time.perf_counter() < deadline:
+        await _timed(client.post("/calculate_damage/", json=payload), latencies, errors)
+
+
+async def session_player(client, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        response = await _timed(client.post("/battles", json=battle_payload()), latencies, errors)
+        if response is None:
+            continue
+        battle_id = response.json()["battle_id"]
+        finished = False
+        while not finished and time.perf_counter() < deadline:
+            turn = await _timed(client.post(f"/battles/{battle_id}/turn", json={"move_index": 0}), latencies, errors)
+            finished = turn is None or turn.json()["state"]["finished"]
+
+
+async def simulate_player(client, deadline, latencies, errors):
+    while time.perf_counter() < deadline:
+        await _timed(client.post("/simulate_battle/", json=battle_payload()), latencies, errors)
+
+
+SCENARIOS = {"damage": damage_player, "session": session_player, "simulate": simulate_player}
+
+
+async def _timed(request, latencies, errors):
+    start = time.perf_counter()
+    try:
+        response = await request
+    except httpx.HTTPError:
+        errors.append(1)
+        return None
+    latencies.append(time.perf_counter() - start)
+    if response.status_code >= 400:
+        errors.append(response.status_code)
+        return None
+    return response
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def run(url, scenario, players, duration):
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=players, max_keepalive_connections=players)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(SCENARIOS[scenario](client, deadline, latencies, errors) for _ in range(players)))
+        elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "players": players,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "rps": len(latencies) / elapsed,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target an already running service instead of starting one")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="damage")
+    parser.add_argument("--players", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the local server")
+    args = parser.parse_args()
+
+    server = contextlib.nullcontext(args.url) if args.url else local_server(args.workers)
+    with server as url:
+        for players in args.players:
+            r = asyncio.run(run(url, args.scenario, players, args.duration))
+            print(f"{args.scenario:<8} players={r['players']:<5} requests={r['requests']:<7} errors={r['errors']:<5} "
+                  f"rps={r['rps']:8.1f}  p50={r['p50_ms']:7.1f}ms  p99={r['p99_ms']:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+"""
+Performance regression suite for the battle service.
+
+Every benchmark is a named case with fixed seeds and the shared payload
+fixtures; `run` times each one and `compare` fails when a case is slower than
+the recorded baseline by more than --threshold (a fraction of its median).
+
+    python -m benchmarks.suite run [-k damage] [--output results.json]
+    python -m benchmarks.suite record [-k ...]     # rewrite benchmarks/baseline.json
+    python -m benchmarks.suite compare [--results results.json] [--threshold 0.25]
+
+compare runs the suite itself unless --results names a file written by run.
+Baselines only mean something on the machine they were recorded on; compare
+warns when the machine fingerprint differs. Run from battle-logic-service/.
+"""
+import argparse
+import asyncio
+import datetime
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+from app import datastore, engine
+from app.models import Move, Pokemon
+from app.rng import make_rng
+from app.utils import LEVEL_UP_INCREMENTS, add_experience, get_type_effectiveness
+from app.xp import add_experience_batch
+from .fixtures import GEODUDE, PIKACHU, battle_payload
+
+FORMAT_VERSION = 1
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+SEED = 20240613
+DEFAULT_REPEAT = 7
+DEFAULT_MIN_TIME = 0.05  # seconds per repeat; the call count is calibrated to reach it
+DEFAULT_THRESHOLD = 0.25
+HTTP_CONCURRENCY = 32
+
+CASES = {}  # name -> setup() returning (fn, ops per fn call)
+
+
+def case(name):
+    def register(setup):
+        CASES[name] = setup
+        return setup
+    return register
+
+
+# --- calculate_damage, one case per effect_type in move_effects.json ---------
+
+def _damage_case(move_name):
+    def setup():
+        attacker, defender = Pokemon(**PIKACHU), Pokemon(**GEODUDE)
+        move = Move(move_id=1, name=move_name, power=60, accuracy=1.0, move_type="Normal",
+                    status_effect=None, effect_chance=None)
+        rng = make_rng(SEED)
+        return (lambda: engine.calculate_damage(attacker, defender, move, rng=rng)), 1
+    return setup
+
+
+def _register_damage_cases():
+    first_move = {}
+    for name, effect in datastore.store.move_effects().items():
+        first_move.setdefault(effect.get("effect_type", "damage"), name)
+    for effect_type, move_name in sorted(first_move.items()):
+        case(f"damage[{effect_type}]")(_damage_case(move_name))
+
+
+_register_damage_cases()
+
+
+# --- type effectiveness -------------------------------------------------------
+
+@case("type_effectiveness[single]")
+def _type_single():
+    return (lambda: get_type_effectiveness("Electric", ["Water"])), 1
+
+
+@case("type_effectiveness[dual]")
+def _type_dual():
+    return (lambda: get_type_effectiveness("Electric", ["Water", "Flying"])), 1
+
+
+# --- experience -----------------------------------------------------------------
+
+def _xp_case(xp_gained):
+    def setup():
+        stats = {"level": 5, "xp": 0, "xp_to_next": 100, "attack": 55, "defense": 40, "hp": 35,
+                 "speed": 90, "special_atk": 50, "special_def": 50}
+        return (lambda: add_experience(dict(stats), xp_gained, LEVEL_UP_INCREMENTS)), 1
+    return setup
+
+
+for _xp in (1_000, 1_000_000, 1_000_000_000):
+    case(f"add_experience[{_xp:.0e}]")(_xp_case(_xp))
+
+
+@case("add_experience_batch[1000]")
+def _xp_batch():
+    stats = [{"level": 5 + i % 50, "xp": 0, "xp_to_next": 100, "attack": 55, "defense": 40, "hp": 35,
+              "speed": 90, "special_atk": 50, "special_def": 50} for i in range(1000)]
+    xp_gained = make_rng(SEED).integers(0, 10_000_000, len(stats)).tolist()
+    return (lambda: add_experience_batch(stats, xp_gained, LEVEL_UP_INCREMENTS)), len(stats)
+
+
+# --- simulate_battle end to end ---------------------------------------------------
+
+def _battle_case(user_policy, trainer_policy):
+    def setup():
+        def battle():
+            payload = battle_payload()
+            user, trainer = Pokemon(**payload["user_pokemon"]), Pokemon(**payload["trainer_pokemon"])
+            return engine.simulate_battle(user, trainer, seed=SEED, user_policy=user_policy,
+                                          trainer_policy=trainer_policy)
+        return battle, 1
+    return setup
+
+
+case("simulate_battle[first-random]")(_battle_case("first", "random"))
+case("simulate_battle[expectimax-greedy]")(_battle_case("expectimax", "greedy"))
+
+
+# --- HTTP through the ASGI app (no sockets) -----------------------------------------
+
+def _http_case(path, payload):
+    def setup():
+        import httpx
+        from app.main import app
+
+        loop = asyncio.new_event_loop()
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+        body = json.dumps(payload).encode()
+        headers = {"content-type": "application/json"}
+
+        async def burst():
+            responses = await asyncio.gather(*(client.post(path, content=body, headers=headers)
+                                               for _ in range(HTTP_CONCURRENCY)))
+            for response in responses:
+                response.raise_for_status()
+
+        return (lambda: loop.run_until_complete(burst())), HTTP_CONCURRENCY
+    return setup
+
+
+case("http[calculate_damage]")(_http_case("/calculate_damage/", {
+    "attacker": PIKACHU, "defender": GEODUDE, "move": PIKACHU["moves"][0], "seed": SEED}))
+case("http[simulate_battle]")(_http_case("/simulate_battle/", {**battle_payload(), "seed": SEED}))
+case("http[add_experience]")(_http_case("/add_experience/", {
+    "attacker": {"level": 5, "attack": 55, "defense": 40, "hp": 35, "speed": 90, "special_atk": 50,
+                 "special_def": 50}, "xp_gained": 1_000_000}))
+
+
+# --- runner -------------------------------------------------------------------------
+
+def measure(fn, ops, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME) -> dict:
+    """Seconds per op: calls per repeat are doubled until a repeat takes min_time."""
+    fn()  # warm caches and lazy tables
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        if time.perf_counter() - start >= min_time:
+            break
+        number *= 2
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / (number * ops))
+    median = statistics.median(samples)
+    return {"median_s": median, "min_s": min(samples), "ops_per_s": 1 / median, "calls": number, "repeat": repeat}
+
+
+def selected(patterns) -> list:
+    if not patterns:
+        return list(CASES)
+    return [name for name in CASES if any(fnmatch.fnmatchcase(name, f"*{p}*") for p in patterns)]
+
+
+def run(names, repeat=DEFAULT_REPEAT, min_time=DEFAULT_MIN_TIME, out=sys.stderr) -> dict:
+    results = {}
+    for name in names:
+        fn, ops = CASES[name]()
+        results[name] = measure(fn, ops, repeat, min_time)
+        print(f"{name:<40} {results[name]['median_s'] * 1e6:12.2f} us/op  {results[name]['ops_per_s']:12.1f} ops/s",
+              file=out)
+    return results
+
+
+def machine() -> dict:
+    return {"python": platform.python_version(), "implementation": platform.python_implementation(),
+            "system": platform.system(), "machine": platform.machine(), "processor": platform.processor(),
+            "cpus": os.cpu_count()}
+
+
+def report(results: dict) -> dict:
+    return {"format": FORMAT_VERSION, "machine": machine(),
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "benchmarks": results}
+
+
+def load_report(path: str) -> dict:
+    with open(path) as f:
+        data = json.load(f)
+    if data.get("format") != FORMAT_VERSION:
+        raise SystemExit(f"{path}: unsupported benchmark file format {data.get('format')!r}")
+    return data
+
+
+def compare(baseline: dict, current: dict, threshold=DEFAULT_THRESHOLD) -> list:
+    """
+    (name, baseline median, current median, ratio, status) per benchmark in
+    either report; status is "regressed", "improved", "ok", "new" or "missing".
+    """
+    rows = []
+    for name in dict.fromkeys([*baseline, *current]):
+        if name not in current:
+            rows.append((name, baseline[name]["median_s"], None, None, "missing"))
+        elif name not in baseline:
+            rows.append((name, None, current[name]["median_s"], None, "new"))
+        else:
+            ratio = current[name]["median_s"] / baseline[name]["median_s"]
+            status = "regressed" if ratio > 1 + threshold else "improved" if ratio < 1 - threshold else "ok"
+            rows.append((name, baseline[name]["median_s"], current[name]["median_s"], ratio, status))
+    return rows
+
+
+def _us(seconds):
+    return "-" if seconds is None else f"{seconds * 1e6:.2f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=("run", "record", "compare", "list"))
+    parser.add_argument("-k", dest="patterns", action="append", help="only cases whose name contains this (repeatable)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME)
+    parser.add_argument("--output", help="run: also write the results here")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--results", help="compare: read results from this file instead of running the suite")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="compare: allowed slowdown as a fraction of the baseline median")
+    args = parser.parse_args(argv)
+
+    names = selected(args.patterns)
+    if args.command == "list":
+        print("\n".join(names))
+        return 0
+    if args.command in ("run", "record"):
+        data = report(run(names, args.repeat, args.min_time))
+        path = args.baseline if args.command == "record" else args.output
+        if args.command == "record" and args.patterns and os.path.exists(path):
+            # Re-recording a subset keeps the other baselines.
+            old = load_report(path)["benchmarks"]
+            data["benchmarks"] = {**old, **data["benchmarks"]}
+        if path:
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+                f.write("\n")
+            print(f"wrote {path}", file=sys.stderr)
+        return 0
+
+    baseline = load_report(args.baseline)
+    current = load_report(args.results) if args.results else report(run(names, args.repeat, args.min_time))
+    if baseline["machine"] != current["machine"]:
+        print(f"warning: baseline was recorded on {baseline['machine']}, not this machine", file=sys.stderr)
+    base = baseline["benchmarks"]
+    if args.patterns:
+        base = {name: value for name, value in base.items() if name in names}
+    rows = compare(base, current["benchmarks"], args.threshold)
+    print(f"{'benchmark':<40} {'baseline us':>12} {'current us':>12} {'ratio':>7}  status")
+    for name, old, new, ratio, status in rows:
+        print(f"{name:<40} {_us(old):>12} {_us(new):>12} {'-' if ratio is None else f'{ratio:.2f}':>7}  {status}")
+    regressed = [row[0] for row in rows if row[4] == "regressed"]
+    if regressed:
+        print(f"{len(regressed)} benchmark(s) regressed by more than {args.threshold:.0%}: {', '.join(regressed)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
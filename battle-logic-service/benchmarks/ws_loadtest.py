@@ -0,0 +1,110 @@
+"""
+WebSocket load test for live battles (/ws/simulate_battle).
+
+For each --connections count it runs two phases against one worker:
+
+    memory   open every socket, start a battle paused at credits=0 and read
+             the worker's process_resident_memory_bytes from /metrics before
+             and after: the difference per connection is what a waiting live
+             battle costs the server.
+    stream   every socket plays battles back to back with no delay for
+             --duration seconds; reports events/s and battles/s received.
+
+Starts a local single-worker uvicorn unless --url is given. Requires httpx
+and websockets (pip install -r benchmarks/requirements.txt). Run from
+battle-logic-service/:
+    python -m benchmarks.ws_loadtest --connections 100 1000 5000 --duration 10
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import re
+import time
+
+import httpx
+from websockets.asyncio.client import connect
+
+from .fixtures import battle_payload
+from .loadtest import local_server
+
+CONNECT_CONCURRENCY = 200  # opening handshakes in flight, under uvicorn's listen backlog
+
+
+def _gauge(metrics_text, name):
+    match = re.search(rf"^{name} (\S+)$", metrics_text, re.MULTILINE)
+    return float(match.group(1)) if match else float("nan")
+
+
+def scrape(url):
+    text = httpx.get(url + "/metrics").text
+    return _gauge(text, "process_resident_memory_bytes"), _gauge(text, "live_battle_connections")
+
+
+async def _open(ws_url, gate):
+    async with gate:
+        return await connect(ws_url + "/ws/simulate_battle", max_queue=None)
+
+
+async def measure_memory(url, connections):
+    ws_url = "ws" + url[len("http"):]
+    rss_before, _ = scrape(url)
+    gate = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    sockets = await asyncio.gather(*(_open(ws_url, gate) for _ in range(connections)))
+    try:
+        for ws in sockets:
+            await ws.send(json.dumps({**battle_payload(), "credits": 0}))
+        for ws in sockets:
+            assert json.loads(await ws.recv())["type"] == "start"
+        rss_after, open_now = await asyncio.to_thread(scrape, url)
+    finally:
+        await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+    return {"open": int(open_now), "rss_mib": rss_after / 2**20,
+            "per_connection_kib": (rss_after - rss_before) / connections / 1024}
+
+
+async def _player(ws, deadline, counts):
+    while time.perf_counter() < deadline:
+        await ws.send(json.dumps(battle_payload()))
+        while True:
+            event = json.loads(await ws.recv())
+            counts["events"] += 1
+            if event["type"] == "end":
+                break
+        counts["battles"] += 1
+        # One battle per socket: the server closes after "end".
+        await ws.wait_closed()
+        ws = await connect(ws.request_url, max_queue=None)
+    await ws.close()
+
+
+async def measure_stream(url, connections, duration):
+    ws_url = "ws" + url[len("http"):]
+    gate = asyncio.Semaphore(CONNECT_CONCURRENCY)
+    sockets = await asyncio.gather(*(_open(ws_url, gate) for _ in range(connections)))
+    counts = {"events": 0, "battles": 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(_player(ws, start + duration, counts) for ws in sockets), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    return {"events_per_s": counts["events"] / elapsed, "battles_per_s": counts["battles"] / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target an already running single-worker service instead of starting one")
+    parser.add_argument("--connections", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    server = contextlib.nullcontext(args.url) if args.url else local_server(1)
+    with server as url:
+        for connections in args.connections:
+            memory = asyncio.run(measure_memory(url, connections))
+            stream = asyncio.run(measure_stream(url, connections, args.duration))
+            print(f"connections={connections:<5} open={memory['open']:<5} rss={memory['rss_mib']:7.1f}MiB  "
+                  f"per_conn={memory['per_connection_kib']:6.1f}KiB  events/s={stream['events_per_s']:9.1f}  "
+                  f"battles/s={stream['battles_per_s']:7.1f}")
+
+
+if __name__ == "__main__":
+    main()
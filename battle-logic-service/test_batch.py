@@ -0,0 +1,130 @@
+import json
+import os
+import shutil
+
+import msgpack
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import datastore, encoding, engine
+from app.batch import resolve_moves, batch_roll_width, calculate_damage_batch
+from app.main import app
+from app.models import BattleRequest
+
+client = TestClient(app)
+
+extra_effects = {
+    "Double-slap": {"effect_type": "multi_hit", "hit_range": [2, 5]},
+    "Double-kick": {"effect_type": "multi_hit", "hit_range": [2, 2]},
+    "Recover": {"effect_type": "heal"},
+    "Sing": {"effect_type": "status", "status_effect": "sleep", "effect_chance": 1},
+    "Body-slam": {"effect_type": "status", "status_effect": "paralyze", "effect_chance": 0.3},
+}
+
+
+@pytest.fixture(autouse=True)
+def move_effects(monkeypatch, tmp_path):
+    shutil.copy(os.path.join(datastore.DATA_DIR, "level1.json"), tmp_path)
+    (tmp_path / "move_effects.json").write_text(json.dumps({**datastore.store.move_effects(), **extra_effects}))
+    monkeypatch.setattr(datastore, "store", datastore.DataStore(str(tmp_path)))
+
+
+def pokemon(nickname, types, level=10, attack=55.0, defense=40.0, special_atk=50.0, special_def=50.0):
+    return {
+        "pokemon_id": 1, "nickname": nickname, "level": level, "max_hp": 60, "current_hp": 60,
+        "attack": attack, "defense": defense, "speed": 50, "special_atk": special_atk,
+        "special_def": special_def, "status": "Healthy", "types": types, "moves": [],
+    }
+
+
+def move(name, move_type, power=40, accuracy=0.9, status_effect=None, effect_chance=None):
+    return {"move_id": 1, "name": name, "power": power, "accuracy": accuracy, "move_type": move_type,
+            "status_effect": status_effect, "effect_chance": effect_chance}
+
+
+moves = {
+    "damage": [move("Tackle", "Normal"), move("Ember", "Fire", status_effect="burn", effect_chance=0.1),
+               move("Splash", "Normal", power=0), move("Thunderbolt", "Electric", power=90, accuracy=1.0)],
+    "multi_hit": [move("Double-slap", "Normal", power=15, accuracy=0.85), move("Double-kick", "Fighting", power=30)],
+    "heal": [move("Recover", "Normal", power=30, accuracy=1.0)],
+    "status": [move("Sing", "Normal", power=0, accuracy=0.55, status_effect="sleep", effect_chance=1),
+               move("Body-slam", "Normal", power=85, accuracy=1.0, status_effect="paralyze", effect_chance=0.3)],
+}
+
+defenders = [
+    pokemon("Geodude", ["Rock", "Ground"], defense=100.0, special_def=30.0),
+    pokemon("Charmander", ["Fire"]),
+    pokemon("Gastly", ["Ghost", "Poison"], defense=0.0),
+    pokemon("Missingno", []),
+]
+
+
+def attacks_for(effect_type, n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    attacks = []
+    for _ in range(n):
+        m = moves[effect_type][rng.integers(len(moves[effect_type]))]
+        attacker = pokemon("Pikachu", ["Electric"], level=int(rng.integers(1, 60)))
+        defender = defenders[rng.integers(len(defenders))]
+        attacks.append(BattleRequest(attacker=attacker, defender=defender, move=m))
+    return attacks
+
+
+@pytest.mark.parametrize("detail", [engine.DETAIL_FULL, engine.DETAIL_SUMMARY, engine.DETAIL_NONE])
+@pytest.mark.parametrize("effect_type", ["damage", "multi_hit", "heal", "status"])
+def test_batch_matches_scalar(effect_type, detail):
+    attacks = attacks_for(effect_type)
+    resolved = resolve_moves(attacks)
+    assert {m.effect_type for m in resolved} == {effect_type}
+    rolls = np.random.default_rng(42).random((len(attacks), batch_roll_width(resolved)))
+    results = calculate_damage_batch(attacks, resolved, rolls, detail)
+    for battle, row, result in zip(attacks, rolls, results):
+        expected = engine.calculate_damage(battle.attacker, battle.defender, battle.move, rolls=row.tolist(),
+                                           detail=detail)
+        assert result == expected
+        if detail == engine.DETAIL_NONE:
+            assert "details" not in result
+
+
+def test_batch_endpoint_is_seeded():
+    payload = {
+        "attacks": [{"attacker": pokemon("Pikachu", ["Electric"]), "defender": d, "move": m}
+                    for d in defenders for group in moves.values() for m in group],
+        "seed": 1234,
+    }
+    first = client.post("/calculate_damage/batch", json=payload)
+    second = client.post("/calculate_damage/batch", json=payload)
+    assert first.status_code == 200
+    assert first.json() == second.json()
+    assert len(first.json()["results"]) == len(payload["attacks"])
+
+
+def test_compact_encodings():
+    payload = {"attacker": pokemon("Pikachu", ["Electric"]), "defender": defenders[1],
+               "move": moves["multi_hit"][0], "seed": 7}
+    full = client.post("/calculate_damage/", json=payload).json()
+    compact = client.post("/calculate_damage/", json=payload,
+                          headers={"Accept": encoding.COMPACT_JSON})
+    assert compact.headers["content-type"] == encoding.COMPACT_JSON
+    assert compact.json() == encoding.compact_damage(full)
+
+    packed = client.post("/calculate_damage/batch?detail=none", json={"attacks": [payload], "seed": 7},
+                         headers={"Accept": encoding.MSGPACK})
+    assert packed.headers["content-type"] == encoding.MSGPACK
+    assert msgpack.unpackb(packed.content) == [encoding.compact_damage(full)]
+
+    battle = {"user_pokemon": {**pokemon("Pikachu", ["Electric"]), "moves": moves["damage"]},
+              "trainer_pokemon": {**defenders[0], "moves": moves["damage"]}, "seed": 7}
+    simulated = client.post("/simulate_battle/", json=battle).json()
+    row = client.post("/simulate_battle/", json=battle, headers={"Accept": encoding.COMPACT_JSON}).json()
+    assert row == [simulated.get(field) for field in encoding.SIMULATION_FIELDS]
+
+
+def test_detail_query_parameter():
+    payload = {"attacker": pokemon("Pikachu", ["Electric"]), "defender": defenders[0],
+               "move": moves["damage"][0], "seed": 3}
+    full = client.post("/calculate_damage/", json=payload).json()
+    summary = client.post("/calculate_damage/?detail=summary", json=payload).json()
+    assert summary["details"] == {k: v for k, v in full["details"].items() if k in engine.SUMMARY_KEYS}
+    assert client.post("/calculate_damage/?detail=verbose", json=payload).status_code == 422
@@ -0,0 +1,107 @@
+import copy
+import json
+import os
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import battlelog
+from app.battlelog import BattleLogSink, BattleLogWriter, SegmentFileSink
+from app.main import app
+from test_engine import geodude, pikachu
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def logged(tmp_path, monkeypatch):
+    monkeypatch.delenv("BATTLE_LOG_DIR", raising=False)
+    writer = battlelog.configure(str(tmp_path), flush_interval=0.01)
+    yield writer
+    battlelog.configure()
+
+
+def export(**params):
+    battlelog.writer.flush()
+    response = client.get("/battle_log/export", params=params)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_simulated_battles_are_logged_and_replayable(logged):
+    trainer = {**geodude, "moves": geodude["moves"] + [
+        {"move_id": 8, "name": "Rock Throw", "power": 50, "accuracy": 0.9,
+         "move_type": "Rock", "status_effect": None, "effect_chance": None},
+    ]}
+    battle = client.post("/simulate_battle/", json={
+        "user_pokemon": copy.deepcopy(pikachu), "trainer_pokemon": trainer}).json()
+    started, finished = export(battle_id=battle["battle_id"])
+    assert (started["type"], finished["type"]) == ("battle_started", "battle_finished")
+    assert (started["seed"], finished["winner"], finished["actions"]) == (battle["seed"], battle["winner"], battle["actions"])
+
+    replay = client.post("/replay", json={"user_pokemon": started["user"], "trainer_pokemon": started["trainer"],
+                                          "seed": started["seed"], "actions": finished["actions"]}).json()
+    assert replay["battle_log"] == battle["battle_log"]
+    assert [e["type"] for e in export(type="battle_finished")] == ["battle_finished"]
+
+
+def test_session_turns_are_logged(logged):
+    battle_id = client.post("/battles", json={"user_pokemon": pikachu, "trainer_pokemon": geodude, "seed": 4}).json()["battle_id"]
+    while not client.post(f"/battles/{battle_id}/turn", json={"move_index": 0}).json()["state"]["finished"]:
+        pass
+    events = export(battle_id=battle_id)
+    turns = [e for e in events if e["type"] == "turn"]
+    assert events[0]["type"] == "battle_started" and events[0]["source"] == "session"
+    assert [e["turn"] for e in turns] == list(range(1, len(turns) + 1))
+    assert events[-1]["type"] == "battle_finished"
+    assert events[-1]["actions"] == [a for turn in turns for a in turn["actions"]]
+
+
+def test_full_queue_drops_instead_of_blocking():
+    class StuckSink(BattleLogSink):
+        def __init__(self):
+            self.release = threading.Event()
+            self.lines = []
+
+        def write(self, lines):
+            self.release.wait()
+            self.lines.extend(lines)
+
+    sink = StuckSink()
+    writer = BattleLogWriter(sink, max_queue=2, flush_interval=0.01)
+    dropped = battlelog.DROPPED.value("turn")
+    results = [writer.submit("turn", "b", 0.0, n, [0], 1, 1) for n in range(10)]
+    assert not all(results)
+    assert battlelog.DROPPED.value("turn") - dropped == results.count(False)
+    sink.release.set()
+    writer.close()
+    assert len(sink.lines) == results.count(True)
+
+
+def test_segments_rotate_and_survive_a_truncated_batch(tmp_path):
+    sink = SegmentFileSink(str(tmp_path), segment_bytes=1)
+    for n in range(3):
+        sink.write([json.dumps(["turn", "b", 0.0, n, [0], 1, 1]).encode() + b"\n"])
+    sink.close()
+    segments = sink.segments()
+    assert len(segments) == 3
+    with open(segments[-1], "ab") as f:
+        f.write(b"\x1f\x8b\x08\x00partial")
+    assert [json.loads(line)[3] for line in SegmentFileSink(str(tmp_path)).scan()] == [0, 1, 2]
+
+
+def test_processes_sharing_a_directory_write_their_own_segments(tmp_path):
+    sinks = [SegmentFileSink(str(tmp_path), writer_id=pid) for pid in (101, 202)]
+    for n, sink in enumerate(sinks * 2):
+        sink.write([json.dumps(["turn", "b", 0.0, n, [0], 1, 1]).encode() + b"\n"])
+    for sink in sinks:
+        sink.close()
+    assert [os.path.basename(p) for p in sinks[0].segments()] == [
+        "battles-00000000-101.jsonl.gz", "battles-00000000-202.jsonl.gz"]
+    assert [json.loads(line)[3] for line in SegmentFileSink(str(tmp_path)).scan()] == [0, 2, 1, 3]
+
+
+def test_export_requires_logging(monkeypatch):
+    monkeypatch.setattr(battlelog, "writer", None)
+    assert client.get("/battle_log/export").status_code == 503
@@ -0,0 +1,38 @@
+import json
+
+from benchmarks import suite
+
+
+def result(median):
+    return {"median_s": median, "min_s": median, "ops_per_s": 1 / median, "calls": 1, "repeat": 1}
+
+
+def test_every_case_runs():
+    for name in suite.CASES:
+        fn, ops = suite.CASES[name]()
+        fn()
+        assert ops >= 1, name
+    assert {f"damage[{t}]" for t in ("damage", "multi_hit", "status")} <= set(suite.CASES)
+
+
+def test_compare_flags_regressions_past_the_threshold():
+    baseline = {"a": result(1.0), "b": result(1.0), "c": result(1.0), "gone": result(1.0)}
+    current = {"a": result(1.2), "b": result(1.3), "c": result(0.5), "added": result(1.0)}
+    statuses = {row[0]: row[4] for row in suite.compare(baseline, current, threshold=0.25)}
+    assert statuses == {"a": "ok", "b": "regressed", "c": "improved", "gone": "missing", "added": "new"}
+
+
+def test_compare_command_exit_status(tmp_path):
+    baseline, current = tmp_path / "baseline.json", tmp_path / "current.json"
+    baseline.write_text(json.dumps(suite.report({"x": result(1.0)})))
+    current.write_text(json.dumps(suite.report({"x": result(1.5)})))
+    args = ["compare", "--baseline", str(baseline), "--results", str(current)]
+    assert suite.main(args) == 1
+    assert suite.main(args + ["--threshold", "0.6"]) == 0
+
+
+def test_baseline_covers_the_suite():
+    with open(suite.BASELINE_FILE) as f:
+        baseline = json.load(f)
+    assert baseline["format"] == suite.FORMAT_VERSION
+    assert set(baseline["benchmarks"]) == set(suite.CASES)
@@ -0,0 +1,77 @@
+import json
+import os
+
+from fastapi.testclient import TestClient
+
+from app import datastore
+from app.main import app
+
+client = TestClient(app)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def write_level(path, names, mtime):
+    path.write_text(json.dumps({
+        "trainers": [{"trainer_id": i + 1, "name": name, "pokemon": []} for i, name in enumerate(names)],
+        "boss": {"trainer_id": 99, "name": "Boss", "pokemon": []},
+    }))
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_level_endpoint_supports_etag():
+    response = client.get("/level/1")
+    assert response.status_code == 200
+    assert response.json()["boss"]["name"] == "Boss Brock"
+    etag = response.headers["etag"]
+    cached = client.get("/level/1", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+
+def test_trainers_are_indexed_by_id():
+    assert datastore.store.trainer(1, 2)["name"] == "Lass Annie"
+    assert datastore.store.trainer(1, 99)["name"] == "Boss Brock"
+    assert datastore.store.trainer(1, 1234) is None
+
+
+def test_level_file_is_reloaded_when_mtime_changes(tmp_path):
+    clock = FakeClock()
+    store = datastore.DataStore(str(tmp_path), check_interval=1.0, clock=clock)
+    level_file = tmp_path / "level1.json"
+    write_level(level_file, ["Joey"], 1_000_000_000)
+    first = store.level(1)
+    assert store.trainer(1, 1)["name"] == "Joey"
+
+    write_level(level_file, ["Annie", "Tim"], 2_000_000_000)
+    assert store.level(1) is first  # not re-checked until check_interval passes
+    clock.now = 2.0
+    second = store.level(1)
+    assert second is not first and second.etag != first.etag
+    assert store.trainer(1, 2)["name"] == "Tim"
+
+    # A half-written file keeps the last good snapshot.
+    level_file.write_text("{")
+    os.utime(level_file, ns=(3_000_000_000, 3_000_000_000))
+    clock.now = 4.0
+    assert store.level(1) is second
+
+
+def test_missing_move_effects_default_to_empty(tmp_path):
+    store = datastore.DataStore(str(tmp_path))
+    assert store.move_effects() == {}
+
+
+def test_level1_battle_looks_up_the_trainer():
+    response = client.post("/level/1/battle", json={"trainer_id": 99})
+    assert response.status_code == 200
+    assert response.json()["opponent"] == "Boss Brock"
+    assert response.json()["outcome"] in ("win", "lose")
+    assert client.post("/level/1/battle", json={"trainer_id": 12345}).status_code == 404
+    assert client.post("/level/1/battle", json={}).status_code == 422
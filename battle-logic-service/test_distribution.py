@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app import distribution
+from app.batch import resolve_moves, batch_roll_width, calculate_damage_batch
+from app.main import app
+from app.models import BattleRequest, Pokemon, Move
+from test_batch import pokemon, move
+
+client = TestClient(app)
+
+SAMPLES = 200_000
+
+cases = {
+    "standard": move("Tackle", "Normal", power=40, accuracy=0.9),
+    "super_effective": move("Ember", "Fire", power=40, accuracy=1.0),
+    "multi_hit": move("Double-slap", "Normal", power=15, accuracy=0.85),
+    "status": move("Sing", "Normal", power=0, accuracy=0.55),
+}
+
+
+def sample_damage(attacker, defender, m, n=SAMPLES, seed=0):
+    attacks = [BattleRequest(attacker=attacker, defender=defender, move=m)] * n
+    resolved = resolve_moves(attacks)
+    rolls = np.random.default_rng(seed).random((n, batch_roll_width(resolved)))
+    results = calculate_damage_batch(attacks, resolved, rolls, "none")
+    return np.array([r.get("damage", 0) for r in results])
+
+
+@pytest.mark.parametrize("name", cases)
+def test_exact_distribution_matches_sampling(name):
+    attacker = Pokemon(**pokemon("Pikachu", ["Electric"], level=20))
+    defender = Pokemon(**pokemon("Bulbasaur", ["Grass"]))
+    m = Move(**cases[name])
+    exact = distribution._single_use(distribution.distribution_key(attacker, defender, m))
+    assert exact.sum() == pytest.approx(1.0)
+
+    sampled = np.rint(sample_damage(attacker, defender, m) * 100).astype(int)
+    assert exact[sampled].min() > 0  # every sampled outcome is in the support
+    empirical = np.bincount(sampled, minlength=len(exact)) / SAMPLES
+    assert np.abs(np.cumsum(empirical) - np.cumsum(exact)).max() < 0.01  # Kolmogorov-Smirnov distance
+    assert sampled.mean() / 100 == pytest.approx(np.dot(np.arange(len(exact)), exact) / 100, rel=0.01)
+
+
+def test_ko_chances_match_sampling():
+    attacker = Pokemon(**pokemon("Pikachu", ["Electric"], level=20))
+    defender = Pokemon(**pokemon("Bulbasaur", ["Grass"]))
+    m = Move(**cases["multi_hit"])
+    body = distribution.damage_distribution(attacker, defender, m, uses=4)
+    totals = sample_damage(attacker, defender, m, n=4 * 50_000).reshape(50_000, 4).cumsum(axis=1)
+    for n, chance in enumerate(body["ko_chance"]):
+        assert chance["probability"] == pytest.approx((totals[:, n] >= defender.current_hp).mean(), abs=0.01)
+    assert [c["probability"] for c in body["ko_chance"]] == sorted(c["probability"] for c in body["ko_chance"])
+
+
+def test_damage_distribution_endpoint_is_memoized():
+    payload = {"attacker": pokemon("Pikachu", ["Electric"]), "defender": pokemon("Geodude", ["Rock", "Ground"]),
+               "move": cases["standard"], "uses": 3}
+    before = distribution._single_use.cache_info()
+    first = client.post("/damage_distribution", json=payload)
+    second = client.post("/damage_distribution", json={**payload, "bins": 10})
+    assert first.status_code == second.status_code == 200
+    after = distribution._single_use.cache_info()
+    assert after.hits - before.hits >= 1 and after.misses - before.misses <= 1
+    body = first.json()
+    assert sum(d["probability"] for d in body["distribution"]) == pytest.approx(1.0)
+    assert sum(b["probability"] for b in second.json()["histogram"]) == pytest.approx(1.0)
+    assert len(body["ko_chance"]) == 3
+
+
+def test_damage_distribution_is_bounded():
+    huge = {**pokemon("Pikachu", ["Electric"]), "attack": 1e6, "current_hp": 1e6}
+    payload = {"attacker": huge, "defender": huge, "move": cases["standard"], "uses": 20}
+    assert client.post("/damage_distribution", json=payload).status_code == 422
+
+    strong = pokemon("Pikachu", ["Electric"], level=100, attack=10_000)
+    payload = {"attacker": strong, "defender": pokemon("Geodude", ["Rock", "Ground"], defense=1),
+               "move": cases["standard"]}
+    response = client.post("/damage_distribution", json=payload)
+    assert response.status_code == 422 and "damage" in response.json()["detail"]
+
+    payload["defender"] = pokemon("Geodude", ["Normal"], defense=500)
+    body = client.post("/damage_distribution", json=payload).json()
+    assert "distribution" not in body and len(body["histogram"]) == distribution.FORCED_BINS
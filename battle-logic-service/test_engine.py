@@ -0,0 +1,186 @@
+import copy
+import io
+import json
+import os
+import pytest
+
+from fastapi.testclient import TestClient
+
+from app import engine, log, pool
+from app.main import app
+from app.models import Pokemon, Move
+from app.moves import resolve_move
+from app.rng import make_rng
+from app.state import Combatant
+
+client = TestClient(app)
+
+pikachu = {
+    "pokemon_id": 25,
+    "nickname": "Pikachu",
+    "level": 8,
+    "max_hp": 45,
+    "current_hp": 45,
+    "attack": 55,
+    "defense": 40,
+    "speed": 90,
+    "special_atk": 50,
+    "special_def": 50,
+    "status": "Healthy",
+    "types": ["Electric"],
+    "moves": [
+        {"move_id": 84, "name": "Thunder Shock", "power": 40, "accuracy": 1.0,
+         "move_type": "Electric", "status_effect": "paralyze", "effect_chance": 0.1},
+    ],
+}
+
+geodude = {
+    "pokemon_id": 74,
+    "nickname": "Geodude",
+    "level": 10,
+    "max_hp": 40,
+    "current_hp": 40,
+    "attack": 80,
+    "defense": 100,
+    "speed": 20,
+    "special_atk": 30,
+    "special_def": 30,
+    "status": "Healthy",
+    "types": ["Rock"],
+    "moves": [
+        {"move_id": 7, "name": "Tackle", "power": 40, "accuracy": 1.0,
+         "move_type": "Normal", "status_effect": None, "effect_chance": None},
+    ],
+}
+
+
+def test_turn_order():
+    assert engine.turn_order(90, 20) == "pokemon1"
+    assert engine.turn_order(20, 90) == "pokemon2"
+    assert engine.turn_order(50, 50) == "tie"
+    response = client.post("/turn_order/", json={"pokemon1": pikachu, "pokemon2": geodude})
+    assert response.json() == {"first": "pokemon1"}
+
+
+def test_calculate_damage_endpoint_matches_engine():
+    payload = {"attacker": pikachu, "defender": geodude, "move": pikachu["moves"][0], "seed": 7}
+    expected = engine.calculate_damage(Pokemon(**pikachu), Pokemon(**geodude), Move(**pikachu["moves"][0]),
+                                       rng=make_rng(7))
+    response = client.post("/calculate_damage/", json=payload)
+    assert response.status_code == 200
+    assert response.json() == expected
+
+
+def test_simulate_battle_runs_in_process():
+    response = client.post("/simulate_battle/", json={
+        "user_pokemon": copy.deepcopy(pikachu),
+        "trainer_pokemon": copy.deepcopy(geodude),
+        "seed": 1,
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["winner"] in ("Pikachu", "Geodude", "tie")
+    assert body["battle_log"][0].startswith("Pikachu used Thunder Shock")
+
+
+def test_simulate_battle_writes_back_hp():
+    user, trainer = Pokemon(**pikachu), Pokemon(**geodude)
+    result = engine.simulate_battle(user, trainer, seed=5)
+    loser = trainer if result["winner"] == "Pikachu" else user
+    assert loser.current_hp <= 0 < (user if loser is trainer else trainer).current_hp
+
+
+def test_monte_carlo_processes_are_clamped_to_the_cpu_count():
+    payload = {"user_pokemon": pikachu, "trainer_pokemon": geodude, "n": 50000, "seed": 3, "processes": 10**6}
+    response = client.post("/simulate_battle/monte_carlo", json=payload)
+    assert response.status_code == 200
+    assert response.json()["processes"] <= (os.cpu_count() or 1)
+
+
+def test_monte_carlo_is_reproducible_across_process_counts(monkeypatch):
+    monkeypatch.setattr(pool, "MAX_PROCESSES", 2)
+    payload = {"user_pokemon": pikachu, "trainer_pokemon": geodude, "n": 50000, "seed": 3}
+    single = client.post("/simulate_battle/monte_carlo", json={**payload, "processes": 1}).json()
+    pooled = client.post("/simulate_battle/monte_carlo", json={**payload, "processes": 2}).json()
+    assert single["battles"] == 50000
+    assert single["win_rate"] == pooled["win_rate"]
+    assert single["turns"] == pooled["turns"]
+    ci = single["confidence_interval"]
+    assert ci["low"] <= single["win_rate"] <= ci["high"]
+    assert single["win_rate"] + single["loss_rate"] + single["tie_rate"] == pytest.approx(1.0)
+
+
+def test_monte_carlo_matches_scalar_simulation():
+    wins = 0
+    for seed in range(2000):
+        user, trainer = Pokemon(**pikachu), Pokemon(**geodude)
+        wins += engine.simulate_battle(user, trainer, seed=seed)["winner"] == "Pikachu"
+    result = client.post("/simulate_battle/monte_carlo", json={
+        "user_pokemon": pikachu, "trainer_pokemon": geodude, "n": 50000, "seed": 5, "processes": 1,
+    }).json()
+    assert abs(result["win_rate"] - wins / 2000) < 0.05
+
+
+def test_seeded_damage_is_reproducible_and_matches_batch():
+    payload = {"attacker": pikachu, "defender": geodude, "move": pikachu["moves"][0], "seed": 99}
+    single = client.post("/calculate_damage/", json=payload).json()
+    assert client.post("/calculate_damage/", json=payload).json() == single
+    batch = client.post("/calculate_damage/batch", json={"attacks": [payload], "seed": 99}).json()
+    assert batch["results"] == [single]
+
+
+def test_replay_rebuilds_simulated_battle():
+    trainer = {**geodude, "moves": geodude["moves"] + [
+        {"move_id": 8, "name": "Rock Throw", "power": 50, "accuracy": 0.9,
+         "move_type": "Rock", "status_effect": None, "effect_chance": None},
+    ]}
+    battle = client.post("/simulate_battle/", json={
+        "user_pokemon": pikachu, "trainer_pokemon": trainer,
+    }).json()
+    assert isinstance(battle["seed"], int)
+    assert len(battle["actions"]) == len([line for line in battle["battle_log"] if " used " in line])
+
+    replay = client.post("/replay", json={
+        "user_pokemon": pikachu, "trainer_pokemon": trainer,
+        "seed": battle["seed"], "actions": battle["actions"],
+    }).json()
+    assert replay["battle_log"] == battle["battle_log"]
+    assert replay["winner"] == battle["winner"]
+    assert len(replay["turns"]) == len(battle["actions"])
+    assert all("details" in turn for turn in replay["turns"])
+
+
+def test_replay_rejects_truncated_actions():
+    response = client.post("/replay", json={
+        "user_pokemon": pikachu, "trainer_pokemon": geodude, "seed": 1, "actions": [],
+    })
+    assert response.status_code == 400
+
+
+def test_resolved_moves_are_cached_and_immutable():
+    first = resolve_move(Move(**geodude["moves"][0]))
+    assert resolve_move(Move(**geodude["moves"][0])) is first
+    assert first.effect_type == "damage" and first.category == "physical"
+    with pytest.raises(AttributeError):
+        first.power = 999
+
+
+def test_hot_path_logging_is_sampled():
+    stream = io.StringIO()
+    log.configure(level="DEBUG", sample_rate=0.0, stream=stream)
+    try:
+        log.get_logger("test").debug("dropped")
+        log.get_logger("test").warning("kept", extra={"fields": {"move": "Tackle"}})
+    finally:
+        log.configure()
+    lines = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert [(e["event"], e["level"], e["move"]) for e in lines] == [("kept", "warning", "Tackle")]
+
+
+@pytest.mark.parametrize("types", [[], ["Rock"], ["rock", "Ground"], ["Water", "unknown"], ["fire", "flying", "rock"]])
+def test_combatant_type_ids_match_the_by_name_lookup(types):
+    defender = Pokemon(**{**geodude, "types": types})
+    for move_type in ("Water", "electric", "Ghost", "Normal"):
+        move = resolve_move(Move(**{**pikachu["moves"][0], "move_type": move_type}))
+        assert engine.type_multiplier_of(move, Combatant.from_pokemon(defender)) == \
+            engine.type_multiplier_of(move, defender)
@@ -0,0 +1,93 @@
+import copy
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import engine, jobs
+from app.main import app
+from app.models import Pokemon
+from test_engine import geodude, pikachu
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    job_queue = jobs.JobQueue(processes=1, max_queue=2)
+    monkeypatch.setattr(jobs, "jobs", job_queue)
+    yield job_queue
+    job_queue.close()
+
+
+def submit(**fields):
+    return client.post("/jobs/simulate", json={
+        "user_pokemon": copy.deepcopy(pikachu), "trainer_pokemon": copy.deepcopy(geodude), **fields})
+
+
+def wait_done(job_id, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        state = client.get(f"/jobs/{job_id}").json()
+        if state["status"] in ("done", "failed"):
+            return state
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_single_battle_job_matches_simulate_battle(queue):
+    response = submit(seed=11)
+    assert response.status_code == 202
+    assert response.headers["location"] == f"/jobs/{response.json()['job_id']}"
+    state = wait_done(response.json()["job_id"])
+    expected = engine.simulate_battle(Pokemon(**copy.deepcopy(pikachu)), Pokemon(**copy.deepcopy(geodude)), 11)
+    assert (state["status"], state["progress"]) == ("done", 1.0)
+    assert {k: state["result"][k] for k in ("winner", "seed", "actions")} == {
+        k: expected[k] for k in ("winner", "seed", "actions")}
+
+
+def test_bulk_job_counts_every_battle(queue):
+    state = wait_done(submit(seed=3, battles=120).json()["job_id"])
+    result = state["result"]
+    assert state["completed"] == 120
+    assert result["wins"] + result["losses"] + result["ties"] == 120
+    assert wait_done(submit(seed=3, battles=120).json()["job_id"])["result"] == result
+
+
+def test_mirror_match_counts_wins_by_side():
+    wins, losses, ties = jobs.run_chunk(Pokemon(**copy.deepcopy(pikachu)), Pokemon(**copy.deepcopy(pikachu)),
+                                        7, 0, 200, "random", "random")
+    assert wins + losses + ties == 200
+    assert wins > 0 and losses > 0
+
+
+def test_identical_unfinished_requests_are_coalesced(queue):
+    first = submit(seed=5, battles=2000, priority="low").json()
+    second = submit(seed=5, battles=2000, priority="high").json()
+    assert (second["job_id"], second["coalesced"]) == (first["job_id"], True)
+
+
+def test_unseeded_requests_are_separate_jobs(queue):
+    first, second = submit().json(), submit().json()
+    assert first["job_id"] != second["job_id"] and first["seed"] != second["seed"]
+    assert not first["coalesced"] and not second["coalesced"]
+
+
+def test_full_queue_is_shed_with_retry_after(queue):
+    assert submit(seed=1, battles=5000).status_code == 202
+    assert submit(seed=2, battles=5000).status_code == 202
+    response = submit(seed=3)
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) >= 1
+    assert submit(seed=1, battles=5000).json()["coalesced"] is True
+
+
+def test_high_priority_overtakes_queued_bulk_work(queue):
+    low = submit(seed=1, battles=5000, priority="low").json()["job_id"]
+    high = submit(seed=2, priority="high").json()["job_id"]
+    assert wait_done(high)["status"] == "done"
+    assert client.get(f"/jobs/{low}").json()["completed"] < 5000
+
+
+def test_unknown_job_is_404(queue):
+    assert client.get("/jobs/nope").status_code == 404
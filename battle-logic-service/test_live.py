@@ -0,0 +1,67 @@
+import copy
+
+from fastapi.testclient import TestClient
+
+from app import engine
+from app.main import app
+from app.models import Pokemon
+from test_engine import geodude, pikachu
+
+client = TestClient(app)
+
+
+def start(ws, **fields):
+    ws.send_json({"user_pokemon": copy.deepcopy(pikachu), "trainer_pokemon": copy.deepcopy(geodude), **fields})
+
+
+def receive_all(ws):
+    events = []
+    while not events or events[-1]["type"] not in ("end", "cancelled", "error"):
+        events.append(ws.receive_json())
+    return events
+
+
+def test_live_battle_streams_the_simulated_battle():
+    with client.websocket_connect("/ws/simulate_battle") as ws:
+        start(ws, seed=7)
+        events = receive_all(ws)
+    result = engine.simulate_battle(Pokemon(**copy.deepcopy(pikachu)), Pokemon(**copy.deepcopy(geodude)), seed=7)
+    assert events[0]["type"] == "start" and events[0]["seed"] == 7
+    attacks = events[1:-1]
+    assert [e["move_index"] for e in attacks] == result["actions"]
+    assert [e["fainted"] for e in attacks] == [False] * (len(attacks) - 1) + [result["winner"] != "tie"]
+    assert {k: events[-1][k] for k in ("winner", "seed", "actions")} == {
+        k: result[k] for k in ("winner", "seed", "actions")}
+
+
+def test_events_wait_for_credits():
+    with client.websocket_connect("/ws/simulate_battle") as ws:
+        start(ws, seed=7, credits=1)
+        assert ws.receive_json()["type"] == "start"
+        first = ws.receive_json()
+        assert (first["type"], first["turn"]) == ("attack", 1)
+        ws.send_json({"action": "next", "count": 1})
+        assert ws.receive_json()["type"] == "attack"
+        ws.send_json({"action": "resume"})
+        assert receive_all(ws)[-1]["type"] == "end"
+
+
+def test_cancel_stops_a_paused_battle():
+    with client.websocket_connect("/ws/simulate_battle") as ws:
+        start(ws, credits=0)
+        assert ws.receive_json()["type"] == "start"
+        ws.send_json({"action": "cancel"})
+        assert ws.receive_json() == {"type": "cancelled", "turn": 1}
+
+
+def test_invalid_messages_are_reported():
+    with client.websocket_connect("/ws/simulate_battle") as ws:
+        start(ws, credits=0)
+        ws.receive_json()
+        ws.send_json({"action": "rewind"})
+        assert ws.receive_json()["type"] == "error"
+        ws.send_json({"action": "cancel"})
+        assert ws.receive_json()["type"] == "cancelled"
+    with client.websocket_connect("/ws/simulate_battle") as ws:
+        ws.send_json({"user_pokemon": pikachu})
+        assert ws.receive_json()["type"] == "error"
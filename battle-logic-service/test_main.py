@@ -3,45 +3,56 @@ from app.main import app
 
 client = TestClient(app)
 
-# Example battle payload:
+# Example battle payload, shaped like the Pokemon and Move models:
 battle_payload = {
     "attacker": {
+        "pokemon_id": 25,
+        "nickname": "Pikachu",
         "level": 5,
-        "xp": 0,
-        "xp_to_next": 100,
+        "max_hp": 35,
+        "current_hp": 35,
         "attack": 55,
         "defense": 40,
-        "hp": 35,
         "speed": 90,
         "special_atk": 50,
         "special_def": 50,
-        "types": ["Electric"]
+        "status": "Healthy",
+        "types": ["Electric"],
+        "moves": [],
     },
     "defender": {
+        "pokemon_id": 4,
+        "nickname": "Charmander",
         "level": 5,
-        "xp": 0,
-        "xp_to_next": 100,
+        "max_hp": 39,
+        "current_hp": 39,
         "attack": 52,
         "defense": 43,
-        "hp": 39,
         "speed": 65,
         "special_atk": 60,
         "special_def": 50,
-        "types": ["Fire"]
+        "status": "Healthy",
+        "types": ["Fire"],
+        "moves": [],
     },
     "move": {
+        "move_id": 85,
         "name": "Thunderbolt",
         "power": 90,
         "accuracy": 1.0,         # Accuracy as a value between 0 and 1
         "move_type": "Electric",
         "status_effect": "paralyze",
         "effect_chance": 0.1,      # 10% chance
-        "category": "special"      # Ensure this matches your model's field name
-    }
+    },
+    "seed": 1,
 }
 
-# Send a POST request to the battle endpoint.
-response = client.post("/calculate_damage/", json=battle_payload)
 
-# Print the JSON response (battle results)
-print(response.json())
+def test_calculate_damage():
+    response = client.post("/calculate_damage/", json=battle_payload)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["result"] == "hit"
+    assert body["damage"] > 0
+    assert body["details"]["hit"] is True
+    assert client.post("/calculate_damage/", json=battle_payload).json() == body
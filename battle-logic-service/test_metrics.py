@@ -0,0 +1,58 @@
+import os
+
+from fastapi.testclient import TestClient
+
+from app import metrics
+from app.main import app
+from app.profiler import ProfilerMiddleware
+from benchmarks.fixtures import battle_payload
+
+client = TestClient(app)
+
+
+def sample(text, name):
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+def test_metrics_endpoint_reports_routes_effects_and_turns():
+    before = client.get("/metrics").text
+    response = client.post("/simulate_battle/", json=battle_payload())
+    assert response.status_code == 200
+    after = client.get("/metrics")
+    assert after.headers["content-type"] == metrics.CONTENT_TYPE
+
+    route = 'battle_http_request_duration_seconds_count{method="POST",route="/simulate_battle/",status="200"}'
+    assert sample(after.text, route) == sample(before, route) + 1
+    assert sample(after.text, "battle_simulated_turns_count") == sample(before, "battle_simulated_turns_count") + 1
+    assert 'battle_damage_duration_seconds_count{effect_type="damage"}' in after.text
+    assert 'battle_cache_hit_ratio{cache="resolved_moves"}' in after.text
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_seconds", "Test.", buckets=(0.1, 1.0), labelnames=("kind",))
+    for value in (0.05, 0.5, 5.0):
+        histogram.observe(value, "a")
+    lines = histogram.render()
+    assert 'test_seconds_bucket{kind="a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{kind="a",le="1.0"} 2' in lines
+    assert 'test_seconds_bucket{kind="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{kind="a"} 3' in lines
+
+
+def test_profiler_writes_collapsed_stacks_on_request(tmp_path):
+    profiled = TestClient(ProfilerMiddleware(app, directory=str(tmp_path), interval=0.0005))
+    plain = profiled.post("/simulate_battle/", json=battle_payload())
+    assert "x-battle-profile-file" not in plain.headers
+    assert os.listdir(tmp_path) == []
+
+    response = profiled.post("/simulate_battle/", json=battle_payload(), headers={"X-Battle-Profile": "1"})
+    assert response.status_code == 200
+    name = response.headers["x-battle-profile-file"]
+    assert os.listdir(tmp_path) == [name]
+    path = os.path.join(tmp_path, name)
+    for line in open(path).read().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert int(count) > 0 and stack
@@ -0,0 +1,143 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import pokedex
+from app.main import app
+from app.pokedex import Pokedex, connect
+
+client = TestClient(app)
+
+TYPES = [(2, "Fire"), (1, "Normal"), (5, "Electric"), (13, "Rock"), (9, "Ground")]
+MOVES = [(10, "Scratch", 1, 40, 100, 35), (45, "Growl", 1, None, 100, 40), (52, "Ember", 2, 40, 100, 25),
+         (84, "Thunder-shock", 5, 40, 100, 30), (3, "Double-slap", 1, 15, 85, 10)]
+SPECIES = [(4, "charmander"), (25, "pikachu"), (74, "geodude")]
+SPECIES_TYPES = [(4, 2), (25, 5), (74, 13), (74, 9)]
+TRAINER_POKEMON = [
+    # id, trainer_id, pokemon_id, nickname, level, current_hp, max_hp, atk, def, spd, sp_atk, sp_def, status, position
+    (26, 33, 4, "Charmander", 5, 39, 39, 52, 43, 65, 60, 50, "Healthy", 1),
+    (27, 34, 25, None, 8, None, 45, 55, 40, 90, 50, 50, None, 1),
+    (28, 34, 74, "Geodude", 10, 40, 40, 80, 100, 20, 30, 30, "Healthy", 2),
+]
+TRAINER_POKEMON_MOVES = [(34, 26, 10), (35, 26, 45), (36, 26, 52), (37, 27, 84), (38, 27, 3), (39, 28, 10)]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def db(monkeypatch, clock):
+    engine = connect("sqlite://")
+    pokedex.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(pokedex.type_table.insert(), [dict(zip(("type_id", "name"), t)) for t in TYPES])
+        conn.execute(pokedex.move_table.insert(), [
+            dict(zip(("move_id", "name", "type_id", "power", "accuracy", "pp"), m)) for m in MOVES])
+        conn.execute(pokedex.species_table.insert(), [dict(zip(("pokemon_id", "name"), s)) for s in SPECIES])
+        conn.execute(pokedex.species_type_table.insert(), [
+            dict(zip(("pokemon_id", "type_id"), t)) for t in SPECIES_TYPES])
+        conn.execute(pokedex.trainer_pokemon_table.insert(), [
+            dict(zip(("id", "trainer_id", "pokemon_id", "nickname", "level", "current_hp", "max_hp", "attack",
+                      "defense", "speed", "special_atk", "special_def", "status", "position"), p))
+            for p in TRAINER_POKEMON])
+        conn.execute(pokedex.trainer_pokemon_moves_table.insert(), [
+            dict(zip(("id", "trainer_pokemon_id", "move_id"), m)) for m in TRAINER_POKEMON_MOVES])
+    db = Pokedex(engine, clock=clock)
+    monkeypatch.setattr(pokedex, "db", db)
+    return db
+
+
+def queries():
+    return sum(pokedex.QUERIES.value(table) for table in
+               ("Move", "trainer_pokemon", "trainer_pokemon_moves", "Pokemon_Type"))
+
+
+def test_rows_resolve_to_battle_models(db):
+    pikachu = db.pokemon([27])[27]
+    assert (pikachu.nickname, pikachu.current_hp, pikachu.status, pikachu.types) == ("Pikachu", 45, "Healthy", ["Electric"])
+    assert [m.name for m in pikachu.moves] == ["Thunder-shock", "Double-slap"]
+    assert pikachu.moves[1].accuracy == 0.85
+    assert db.pokemon([28])[28].types == ["Ground", "Rock"]  # by type_id
+    assert db.moves([45])[45].power == 0
+
+
+def test_damage_by_reference_matches_full_request(db):
+    full = {
+        "attacker": db.pokemon([27])[27].model_dump(),
+        "defender": db.pokemon([28])[28].model_dump(),
+        "move": db.moves([84])[84].model_dump(),
+        "seed": 11,
+    }
+    by_reference = {"attacker": {"trainer_pokemon_id": 27}, "defender": {"trainer_pokemon_id": 28},
+                    "move": {"move_id": 84}, "seed": 11}
+    assert client.post("/calculate_damage/", json=by_reference).json() == client.post(
+        "/calculate_damage/", json=full).json()
+
+
+def test_batch_prefetches_once_then_serves_from_cache(db):
+    attacks = [{"attacker": {"trainer_pokemon_id": a}, "defender": {"trainer_pokemon_id": d}, "move": {"move_id": m}}
+               for a, d, m in [(26, 28, 52), (27, 28, 84), (28, 26, 10), (27, 26, 3)] * 25]
+    before = queries()
+    response = client.post("/calculate_damage/batch", json={"attacks": attacks, "seed": 1})
+    assert response.status_code == 200 and len(response.json()["results"]) == 100
+    # trainer_pokemon, its moves, their types, then the one move not yet cached.
+    assert queries() - before <= 4
+    before = queries()
+    client.post("/calculate_damage/batch", json={"attacks": attacks, "seed": 1})
+    assert queries() == before
+
+
+def test_pokemon_rows_expire_and_snapshot_serves_without_queries(db, clock):
+    db.pokemon([26])
+    before = queries()
+    db.pokemon([26])
+    assert queries() == before
+    clock.now += pokedex.POKEMON_TTL_SECONDS + 1
+    db.pokemon([26])
+    assert queries() > before
+
+    db.load_snapshot()
+    before = queries()
+    clock.now += 10 * pokedex.POKEMON_TTL_SECONDS
+    assert set(db.pokemon([26, 27, 28])) == {26, 27, 28}
+    assert set(db.moves([3, 10, 45, 52, 84])) == {3, 10, 45, 52, 84}
+    assert queries() == before
+
+
+def test_simulation_by_reference_does_not_mutate_cached_rows(db):
+    payload = {"user_pokemon": {"trainer_pokemon_id": 27, "current_hp": 20},
+               "trainer_pokemon": {"trainer_pokemon_id": 28}, "seed": 3}
+    first = client.post("/simulate_battle/", json=payload).json()
+    assert client.post("/simulate_battle/", json=payload).json() == first
+    assert db.pokemon([27])[27].current_hp == 45
+
+
+def test_unknown_references_and_missing_database(db, monkeypatch):
+    response = client.post("/damage_distribution", json={
+        "attacker": {"trainer_pokemon_id": 27}, "defender": {"trainer_pokemon_id": 99}, "move": {"move_id": 84}})
+    assert response.status_code == 404
+    assert "99" in response.json()["detail"]
+
+    monkeypatch.setattr(pokedex, "db", None)
+    monkeypatch.delenv("BATTLE_DATABASE_URL", raising=False)
+    monkeypatch.delenv("DB_HOST", raising=False)
+    response = client.post("/simulate_battle/monte_carlo", json={
+        "user_pokemon": {"trainer_pokemon_id": 27}, "trainer_pokemon": {"trainer_pokemon_id": 28}})
+    assert response.status_code == 503
+
+
+def test_malformed_full_move_is_rejected_not_read_as_reference(db):
+    move = db.moves([84])[84].model_dump()
+    del move["accuracy"]
+    response = client.post("/calculate_damage/", json={
+        "attacker": {"trainer_pokemon_id": 27}, "defender": {"trainer_pokemon_id": 28}, "move": move})
+    assert response.status_code == 422
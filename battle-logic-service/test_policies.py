@@ -0,0 +1,83 @@
+import copy
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import engine
+from app.main import app
+from app.models import Pokemon
+from app.policies import ExpectedDamageCache, ExpectimaxPolicy, GreedyPolicy
+from app.state import Combatant
+from test_engine import pikachu, geodude
+
+client = TestClient(app)
+
+SPLASH = {"move_id": 150, "name": "Splash", "power": 0, "accuracy": 1.0, "move_type": "Normal"}
+WATER_GUN = {"move_id": 55, "name": "Water Gun", "power": 40, "accuracy": 1.0, "move_type": "Water"}
+HYDRO_PUMP = {"move_id": 56, "name": "Hydro Pump", "power": 110, "accuracy": 0.6, "move_type": "Water"}
+
+
+def combatants(user_moves, **trainer_fields):
+    user = copy.deepcopy(pikachu)
+    user["moves"] = user_moves
+    return Combatant.from_pokemon(Pokemon(**user)), Combatant.from_pokemon(Pokemon(**{**geodude, **trainer_fields}))
+
+
+def test_greedy_prefers_super_effective_damage():
+    me, them = combatants([SPLASH, pikachu["moves"][0], WATER_GUN])
+    assert GreedyPolicy().choose(me, them) == 2
+
+
+def test_expected_damage_cache_tracks_hp_and_stats():
+    me, them = combatants([WATER_GUN])
+    cache = ExpectedDamageCache()
+    full = cache.expected(me, them, 0)
+    assert cache.expected(me, them, 0) == full and cache.hits == 1
+    them.current_hp = 1.0
+    assert cache.expected(me, them, 0) == pytest.approx(1.0)
+    them.current_hp = 40.0
+    them.special_def *= 2
+    assert cache.expected(me, them, 0) < full
+    assert cache.misses == 3
+
+
+def test_expectimax_against_a_defender_without_moves():
+    me, them = combatants([SPLASH, WATER_GUN], moves=[])
+    assert ExpectimaxPolicy().choose(me, them) == 1
+    response = client.post("/simulate_battle/", json={
+        "user_pokemon": pikachu, "trainer_pokemon": {**geodude, "moves": []}, "user_policy": "expectimax"})
+    assert response.status_code == 400
+
+
+def test_policies_take_the_sure_ko():
+    # Hydro Pump has the higher expected damage at full HP, but once the
+    # defender is low Water Gun finishes it off every time.
+    me, them = combatants([HYDRO_PUMP, WATER_GUN])
+    assert GreedyPolicy().choose(me, them) == 0
+    assert ExpectimaxPolicy(depth=2).choose(me, them) == 0
+    them.current_hp = 5
+    assert GreedyPolicy().choose(me, them) == 1
+    assert ExpectimaxPolicy(depth=2).choose(me, them) == 1
+
+
+def test_default_policies_keep_seeded_battles_unchanged():
+    user, trainer = Pokemon(**pikachu), Pokemon(**geodude)
+    explicit = engine.simulate_battle(user, trainer, seed=9, user_policy="first", trainer_policy="random")
+    default = engine.simulate_battle(Pokemon(**pikachu), Pokemon(**geodude), seed=9)
+    assert explicit == default
+
+
+def test_policies_over_http():
+    user = copy.deepcopy(pikachu)
+    user["moves"] = [SPLASH, WATER_GUN]
+    body = client.post("/simulate_battle/", json={
+        "user_pokemon": user, "trainer_pokemon": geodude, "seed": 3,
+        "user_policy": "greedy", "trainer_policy": "expectimax",
+    }).json()
+    assert set(body["actions"][::2]) == {1}  # Pikachu is faster and never splashes
+
+    created = client.post("/battles", json={"user_pokemon": pikachu, "trainer_pokemon": geodude,
+                                            "trainer_policy": "greedy"})
+    assert created.status_code == 200
+    assert client.post("/simulate_battle/", json={"user_pokemon": pikachu, "trainer_pokemon": geodude,
+                                                 "user_policy": "psychic"}).status_code == 422
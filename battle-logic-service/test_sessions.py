@@ -0,0 +1,124 @@
+import pickle
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import Pokemon
+from app.sessions import BattleSession, InMemorySessionStore
+from test_engine import pikachu, geodude
+
+client = TestClient(app)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def new_session():
+    return BattleSession(Pokemon(**pikachu), Pokemon(**geodude), seed=1)
+
+
+def test_battle_session_lifecycle():
+    created = client.post("/battles", json={"user_pokemon": pikachu, "trainer_pokemon": geodude, "seed": 11})
+    assert created.status_code == 200
+    state = created.json()
+    battle_id = state["battle_id"]
+    assert state["turn"] == 0 and not state["finished"]
+
+    actions_played = 0
+    while not state["finished"]:
+        turn = client.post(f"/battles/{battle_id}/turn", json={"move_index": 0})
+        assert turn.status_code == 200
+        state = turn.json()["state"]
+        actions_played += len(turn.json()["events"])
+    assert state["winner"] in ("Pikachu", "Geodude", "tie")
+    assert client.get(f"/battles/{battle_id}").json() == state
+    assert client.post(f"/battles/{battle_id}/turn", json={"move_index": 0}).status_code == 409
+
+    # The session used the same streams as /simulate_battle/, so it replays.
+    replay = client.post("/replay", json={
+        "user_pokemon": pikachu, "trainer_pokemon": geodude, "seed": 11, "actions": [0] * actions_played,
+    }).json()
+    assert replay["winner"] == state["winner"]
+
+
+def test_battle_session_errors():
+    assert client.get("/battles/missing").status_code == 404
+    battle_id = client.post("/battles", json={"user_pokemon": pikachu, "trainer_pokemon": geodude}).json()["battle_id"]
+    assert client.post(f"/battles/{battle_id}/turn", json={"move_index": 5}).status_code == 400
+
+
+def test_store_expires_sessions_after_ttl():
+    clock = FakeClock()
+    store = InMemorySessionStore(ttl_seconds=10, clock=clock)
+    session = new_session()
+    store.set(session.battle_id, session)
+    clock.now = 9
+    assert store.get(session.battle_id) is session
+    clock.now = 18  # the get above refreshed the TTL
+    assert store.get(session.battle_id) is session
+    clock.now = 30
+    assert store.get(session.battle_id) is None
+    assert len(store) == 0 and store.total_bytes == 0
+
+
+def test_store_evicts_least_recently_used():
+    store = InMemorySessionStore(max_sessions=2)
+    first, second, third = new_session(), new_session(), new_session()
+    store.set(first.battle_id, first)
+    store.set(second.battle_id, second)
+    store.get(first.battle_id)
+    store.set(third.battle_id, third)
+    assert store.get(second.battle_id) is None
+    assert store.get(first.battle_id) is first
+    assert store.get(third.battle_id) is third
+
+
+def test_store_respects_memory_cap():
+    probe = InMemorySessionStore()
+    session = new_session()
+    probe.set(session.battle_id, session)
+    store = InMemorySessionStore(max_bytes=probe.total_bytes * 3)
+    sessions = [new_session() for _ in range(5)]
+    for s in sessions:
+        store.set(s.battle_id, s)
+    assert len(store) == 3
+    assert store.total_bytes <= store.max_bytes
+
+
+def test_store_tracks_sessions_growing_turn_by_turn():
+    store = InMemorySessionStore()
+    session = new_session()
+    store.set(session.battle_id, session)
+    created = store.total_bytes
+    session.actions.extend([0] * 500)
+    store.set(session.battle_id, session)
+    assert store.total_bytes == len(pickle.dumps(session, protocol=pickle.HIGHEST_PROTOCOL)) > created
+
+
+def test_concurrent_sets_of_one_session_count_its_size_once():
+    store = InMemorySessionStore()
+    session = new_session()
+    store.set(session.battle_id, session)
+    size = store.total_bytes
+    threads = [threading.Thread(target=lambda: [store.set(session.battle_id, session) for _ in range(200)])
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert (len(store), store.total_bytes) == (1, size)
+
+
+def test_session_state_is_slotted_and_pickles():
+    session = new_session()
+    session.play_turn(0)
+    assert not hasattr(session.user, "__dict__")
+    restored = pickle.loads(pickle.dumps(session))
+    assert restored.state() == session.state()
+    assert restored.play_turn(0) == session.play_turn(0)
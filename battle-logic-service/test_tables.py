@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from app import tables, utils, xp
+from app.utils import LEVEL_UP_INCREMENTS, add_experience
+
+
+@pytest.fixture
+def mapped(tmp_path, monkeypatch):
+    path = tables.write(str(tmp_path / "tables.bin"))
+    monkeypatch.setenv("BATTLE_TABLES_FILE", path)
+    monkeypatch.setattr(tables, "_tables", None)
+    monkeypatch.setattr(utils, "_DUAL_TYPE_ROWS", None)
+    return path
+
+
+def test_table_file_round_trips_read_only(mapped):
+    loaded = tables.load(mapped)
+    for name, array in tables.compute().items():
+        assert loaded[name].dtype == array.dtype
+        assert np.array_equal(loaded[name], array)
+        assert not loaded[name].flags.writeable
+    assert tables.get()["cumulative_xp"].base is not None  # a view of the mapping, not a copy
+
+
+def test_stale_or_corrupt_files_are_ignored(mapped, tmp_path, monkeypatch):
+    monkeypatch.setattr(tables, "FORMAT_VERSION", tables.FORMAT_VERSION + 1)
+    assert tables.load(mapped) is None
+    garbage = tmp_path / "garbage.bin"
+    garbage.write_bytes(b"not a table file")
+    assert tables.load(str(garbage)) is None
+    assert tables.load(str(tmp_path / "missing.bin")) is None
+
+    with open(mapped, "rb") as f:
+        truncated = f.read()[:-4096]
+    (tmp_path / "truncated.bin").write_bytes(truncated)
+    assert tables.load(str(tmp_path / "truncated.bin")) is None
+
+
+def test_lookups_use_mapped_tables(mapped):
+    assert utils.get_type_effectiveness("Water", ["Rock", "Ground"]) == 4.0
+    assert utils.type_effectiveness_ids(np.array([utils.type_id("Electric")]), np.array([utils.type_id("Ground")]),
+                                        np.array([utils.NEUTRAL_TYPE]))[0] == 0.0
+    stats = {"level": 5, "xp": 0, "xp_to_next": 100, "attack": 50.0, "defense": 40.0, "hp": 45.0, "speed": 90.0,
+             "special_atk": 50.0, "special_def": 50.0}
+    expected = add_experience(dict(stats), 10 ** 7, LEVEL_UP_INCREMENTS)
+    assert xp.add_experience_batch([dict(stats)], [10 ** 7]) == [expected]
@@ -0,0 +1,71 @@
+import copy
+import json
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from app import engine, pool
+from app.main import app
+from app.models import Pokemon
+from app.montecarlo import TRAINER, USER
+from app.state import Combatant
+from app.tournament import simulate_team_chunk
+from test_engine import geodude, pikachu
+
+client = TestClient(app)
+
+
+def stream(level, payload):
+    with client.stream("POST", f"/level/{level}/tournament", json=payload) as response:
+        assert response.status_code == 200
+        return [json.loads(line) for line in response.iter_lines() if line]
+
+
+def scalar_team_battle(team, opponents, seed):
+    """Reference: sequential engine.simulate_battle calls with HP carried over."""
+    team, opponents = [Pokemon(**copy.deepcopy(p)) for p in team], [Pokemon(**copy.deepcopy(p)) for p in opponents]
+    i = j = 0
+    while i < len(team) and j < len(opponents):
+        engine.simulate_battle(team[i], opponents[j], seed=seed * 100 + i * 10 + j)
+        tie = team[i].current_hp > 0 and opponents[j].current_hp > 0
+        i += team[i].current_hp <= 0 or tie
+        j += opponents[j].current_hp <= 0 or tie
+    return "win" if j == len(opponents) and i < len(team) else "loss" if i == len(team) and j < len(opponents) else "tie"
+
+
+def test_tournament_streams_results_and_summary(monkeypatch):
+    monkeypatch.setattr(pool, "MAX_PROCESSES", 2)
+    payload = {"teams": [{"name": "solo", "pokemon": [pikachu]},
+                         {"name": "pair", "pokemon": [pikachu, geodude]}],
+               "repetitions": 2500, "seed": 4, "processes": 1}
+    events = stream(1, payload)
+    summary = events[-1]
+    assert summary["type"] == "summary"
+    assert all(event["type"] == "result" for event in events[:-1])
+    assert summary["battles"] == 2 * len(summary["opponents"]) * 2500
+    assert sum(event["battles"] for event in events[:-1]) == summary["battles"]
+    for wins, losses, ties in zip(summary["win_rate"], summary["loss_rate"], summary["tie_rate"]):
+        assert np.allclose(np.add(np.add(wins, losses), ties), 1.0)
+
+    pooled = stream(1, {**payload, "processes": 2})[-1]
+    assert pooled["processes"] == 2
+    assert pooled["win_rate"] == summary["win_rate"]
+    assert stream(1, {**payload, "processes": 10**6})[-1]["processes"] == 2
+
+
+def test_team_battles_match_scalar_engine():
+    team, opponents = [pikachu, pikachu], [geodude, geodude]
+    winner = simulate_team_chunk([Combatant.from_pokemon(Pokemon(**p)) for p in team],
+                                 [Combatant.from_pokemon(Pokemon(**p)) for p in opponents],
+                                 20000, np.random.SeedSequence(2))
+    scalar = [scalar_team_battle(team, opponents, seed) for seed in range(1000)]
+    assert abs((winner == USER).mean() - scalar.count("win") / 1000) < 0.05
+    assert abs((winner == TRAINER).mean() - scalar.count("loss") / 1000) < 0.05
+
+
+def test_tournament_rejects_unknown_level_and_moveless_teams():
+    team = {"name": "a", "pokemon": [pikachu]}
+    assert client.post("/level/999/tournament", json={"teams": [team]}).status_code == 404
+    moveless = {"name": "b", "pokemon": [{**pikachu, "moves": []}]}
+    assert client.post("/level/1/tournament", json={"teams": [moveless]}).status_code == 400
+    assert client.post("/level/1/tournament", json={"teams": [team], "repetitions": 0}).status_code == 422
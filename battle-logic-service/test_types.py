@@ -0,0 +1,41 @@
+import itertools
+
+import numpy as np
+
+from app import utils
+
+
+def reference_type_effectiveness(attacking_type, defender_types):
+    # The original per-hit implementation, kept as the source of truth.
+    multiplier = 1.0
+    for d_type in defender_types:
+        multiplier *= utils.type_chart.get(attacking_type.lower(), {}).get(d_type.lower(), 1.0)
+    return multiplier
+
+
+names = utils.TYPES + ["unknown"]
+defender_combos = [[]] + [[t] for t in names] + [list(p) for p in itertools.product(names, repeat=2)]
+
+
+def test_every_type_combination_matches_reference():
+    for attacking in names:
+        for defender_types in defender_combos:
+            for casing in (str.lower, str.capitalize, str.upper):
+                attack = casing(attacking)
+                defenders = [casing(t) for t in defender_types]
+                expected = reference_type_effectiveness(attack, defenders)
+                assert utils.get_type_effectiveness(attack, defenders) == expected
+
+
+def test_more_than_two_defender_types_matches_reference():
+    defenders = ["Water", "Ground", "Rock"]
+    assert utils.get_type_effectiveness("Grass", defenders) == reference_type_effectiveness("Grass", defenders)
+
+
+def test_vectorized_lookup_matches_scalar():
+    combos = [(a, d) for a in names for d in defender_combos]
+    attack_ids = np.array([utils.type_id(a) for a, _ in combos])
+    defender_ids = np.array([utils.defender_type_ids(d) for _, d in combos])
+    result = utils.type_effectiveness_ids(attack_ids, defender_ids[:, 0], defender_ids[:, 1])
+    expected = [reference_type_effectiveness(a, d) for a, d in combos]
+    assert result.tolist() == expected
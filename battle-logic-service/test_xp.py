@@ -0,0 +1,72 @@
+import copy
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.utils import LEVEL_UP_INCREMENTS, add_experience
+from app.xp import MAX_TABLE_LEVEL, add_experience_batch
+
+client = TestClient(app)
+
+
+def stats(level=5, xp=0, xp_to_next=100, attack=55.0, hp=35.0):
+    return {"level": level, "xp": xp, "xp_to_next": xp_to_next, "attack": attack, "defense": 40.0,
+            "hp": hp, "speed": 90.0, "special_atk": 50.0, "special_def": 50.0, "types": ["Electric"]}
+
+
+def random_cases(n=2000, seed=0):
+    rng = random.Random(seed)
+    cases = []
+    for _ in range(n):
+        level = rng.choice([0, 1, rng.randint(1, 100), rng.randint(100, 5000)])
+        row = stats(
+            level=level,
+            xp=rng.randint(0, 200),
+            xp_to_next=rng.choice([0, 100, level ** 3, rng.randint(-50, 10_000)]),
+            attack=rng.choice([55.0, rng.uniform(1, 300), 0.1]),
+            hp=float(rng.randint(1, 500)),
+        )
+        gained = rng.choice([0, rng.randint(1, 1000), rng.randint(1, 10 ** 9), rng.randint(1, 10 ** 15)])
+        cases.append((row, gained))
+    return cases
+
+
+def test_batch_is_bit_identical_to_iterative():
+    cases = random_cases()
+    expected = [add_experience(copy.deepcopy(row), gained, LEVEL_UP_INCREMENTS) for row, gained in cases]
+    results = add_experience_batch([copy.deepcopy(row) for row, _ in cases], [g for _, g in cases])
+    for got, want in zip(results, expected):
+        assert got == want
+        assert all(type(got[key]) is type(want[key]) for key in want)
+
+
+@pytest.mark.parametrize("row, gained", [
+    (stats(level=-3, xp=-10 ** 6, xp_to_next=-1), 10),  # negative levels go through the loop
+    (stats(level=MAX_TABLE_LEVEL - 1), 10 ** 15),        # past the end of the prefix-sum table
+    (stats(), 2 ** 70),                                  # beyond int64
+])
+def test_fallback_rows_match_iterative(row, gained):
+    expected = add_experience(copy.deepcopy(row), gained, LEVEL_UP_INCREMENTS)
+    assert add_experience_batch([row], [gained]) == [expected]
+
+
+def test_add_experience_batch_endpoint():
+    updates = [{"attacker": stats(level=level), "xp_gained": 50 * level} for level in range(1, 40)]
+    response = client.post("/add_experience/batch", json={"updates": updates})
+    assert response.status_code == 200
+    singles = [client.post("/add_experience/", json=update).json() for update in updates]
+    assert response.json()["results"] == singles
+
+
+@pytest.mark.parametrize("fields", [{"level": -1, "xp_to_next": 0}, {"level": 0}, {"xp_to_next": 0}])
+def test_never_ending_level_ups_are_rejected(fields):
+    update = {"attacker": {**stats(), **fields}, "xp_gained": 10}
+    assert client.post("/add_experience/batch", json={"updates": [update]}).status_code == 422
+    assert client.post("/add_experience/", json=update).status_code == 422
+
+
+def test_xp_gained_is_bounded():
+    update = {"attacker": stats(), "xp_gained": 10 ** 30}
+    assert client.post("/add_experience/batch", json={"updates": [update]}).status_code == 422